@@ -0,0 +1,398 @@
+"""
+Async (ASGI) variant of the Film Watch Database API
+Install required packages: pip install flask flask-cors starlette uvicorn a2wsgi
+Run: uvicorn asgi_backend:app --port 8000
+
+The routes the WordPress front ends hit (add, query, search, suggest, stats
+and find-similar) and the /api/changes feed are served natively: parsing and
+the response cache run on the event loop, and SQLite work goes to
+DB_EXECUTOR, one writer thread plus READER_THREADS reader threads that each
+keep their own WAL connection. Idle keep-alive connections and waiting
+long-polls therefore cost no thread at all. Every other route
+(batch adds, exports with ?stream, cleanups, admin and the UI) is handed to
+the Flask app in flask_backend.py, so both servers expose the same API.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept, MultiDict
+from werkzeug.http import parse_accept_header
+
+import flask_backend
+from flask_backend import (
+    APPEARANCE_QUERIES, CHANGE_FEED, CHANGES_MAX_PAGE_SIZE, CHANGES_MAX_WAIT, CHANGES_PAGE_SIZE,
+    CHANGES_POLL_SECONDS, INGEST_QUEUE, INGEST_WAIT_TIMEOUT, RESPONSE_CACHE, SEARCH_MAX_LIMIT, SUGGEST_INDEX, SUGGEST_LIMIT, SUGGEST_MAX_LIMIT,
+    SUGGEST_SOURCES, appearance_page, changes_compacted, execute_insert, find_similar_entries, fts_query, parse_entry,
+    read_changes, read_stats, search_appearances
+)
+
+READER_THREADS = 8
+
+# Threads the Flask fallback may use for the routes not served natively
+FALLBACK_THREADS = 8
+
+# How often a waiting /api/changes long-poll checks CHANGE_FEED for a commit in this process
+CHANGES_WAKE_SECONDS = 0.05
+
+# How often an /api/add?wait=1 checks whether its write-behind group has committed
+INGEST_WAKE_SECONDS = 0.01
+
+
+class DatabaseExecutor:
+    """Bounded thread pools for SQLite: one writer and n readers.
+
+    Each thread opens its own tuned connection on start and keeps it for its
+    lifetime; reader connections are query_only. Work is submitted as
+    fn(conn, *args) and awaited from the event loop.
+    """
+
+    def __init__(self, readers=READER_THREADS):
+        self._local = threading.local()
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='db-writer',
+                                          initializer=self._open, initargs=(False,))
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix='db-reader',
+                                           initializer=self._open, initargs=(True,))
+
+    def _open(self, read_only):
+        conn = flask_backend.connect()
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        self._local.conn = conn
+
+    def _call(self, fn, args):
+        conn = self._local.conn
+        try:
+            return fn(conn, *args)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    async def read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._call, fn, args)
+
+    async def write(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._writer, self._call, fn, args)
+
+    def shutdown(self):
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+DB_EXECUTOR = None
+
+FLASK_APP = WSGIMiddleware(flask_backend.app, workers=FALLBACK_THREADS)
+
+
+class FlaskFallback:
+    """Answer a natively routed request with the Flask app instead (e.g. ?stream exports)."""
+
+    async def __call__(self, scope, receive, send):
+        await FLASK_APP(scope, receive, send)
+
+
+def json_response(payload, status=200, headers=None):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    return Response(body, status_code=status, media_type='application/json', headers=headers)
+
+
+def error_response(e, status=400):
+    return json_response({'error': str(e)}, status)
+
+
+def wants_stream(request):
+    """Mirror of flask_backend.wants_stream() for Starlette requests."""
+    if request.query_params.get('stream') in ('1', 'true'):
+        return True
+    accept = parse_accept_header(request.headers.get('accept'), MIMEAccept)
+    return accept.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('if-none-match', '')
+    candidates = {tag.strip() for tag in header.split(',')}
+    return '*' in candidates or f'"{etag}"' in candidates or f'W/"{etag}"' in candidates
+
+
+def _cached(request, body, etag, cache_status):
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'X-Cache': cache_status}
+    if _etag_matches(request, etag):
+        RESPONSE_CACHE.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+def cached_response(view):
+    """Async counterpart of flask_backend.cached_response, sharing RESPONSE_CACHE.
+
+    Keys carry the representation asked for, so a JSON body is never served
+    to a client that wants the ?stream (NDJSON) one, which is not cached.
+    """
+    async def wrapper(request):
+        representation = 'application/x-ndjson' if wants_stream(request) else 'application/json'
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), RESPONSE_CACHE.generation, None,
+               representation)
+        entry = RESPONSE_CACHE.get(key)
+        if entry is not None:
+            body, _, etag = entry
+            return _cached(request, body, etag, 'HIT')
+
+        response = await view(request)
+        if not isinstance(response, Response) or response.status_code != 200:
+            return response
+
+        body = response.body
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        RESPONSE_CACHE.put(key, body, response.media_type, etag)
+        return _cached(request, body, etag, 'MISS')
+
+    return wrapper
+
+
+async def add_entry(request):
+    """Add a new entry to the database."""
+    try:
+        data = await request.json()
+        entry_text = data.get('entry', '')
+        narrative = data.get('narrative', 'Watch worn in film.')
+
+        if not entry_text:
+            return json_response({'error': 'Entry text is required'}, 400)
+
+        parsed = parse_entry(entry_text)
+        parsed['narrative'] = narrative
+
+        return await _add_one(request, parsed)
+
+    except Exception as e:
+        return error_response(e)
+
+
+async def _add_one(request, parsed):
+    """Mirror of flask_backend._add_one(): write through the ingest queue when it runs.
+
+    A ?wait=1 add sleeps on the event loop until its group commits, holding no thread.
+    """
+    if INGEST_QUEUE.running:
+        ticket = INGEST_QUEUE.submit(parsed)
+        if request.query_params.get('wait', '').lower() not in ('1', 'true', 'yes'):
+            return json_response({
+                'success': True,
+                'status': ticket.status,
+                'ingest_id': ticket.ingest_id,
+                'data': parsed
+            }, 202)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + INGEST_WAIT_TIMEOUT
+        while not ticket.done.is_set():
+            if loop.time() >= deadline:
+                return json_response({'error': 'Timed out waiting for commit', 'ingest_id': ticket.ingest_id}, 504)
+            await asyncio.sleep(INGEST_WAKE_SECONDS)
+        if ticket.status != 'success':
+            raise Exception(ticket.message)
+    else:
+        await DB_EXECUTOR.write(execute_insert, parsed)
+
+    return json_response({
+        'success': True,
+        'message': f"Successfully added: {parsed['actor']} wearing {parsed['brand']} {parsed['model']} in {parsed['title']} ({parsed['year']})",
+        'data': parsed
+    })
+
+
+def appearance_view(param, kind):
+    """Build an /api/query/<kind> endpoint; ?stream requests go to the Flask app."""
+    @cached_response
+    async def view(request):
+        if wants_stream(request):
+            return FlaskFallback()
+        try:
+            term = request.path_params[param]
+            args = MultiDict(request.query_params.multi_items())
+            page = await DB_EXECUTOR.read(partial(appearance_page, term=term, envelope={'success': True, kind: term},
+                                                  **APPEARANCE_QUERIES[kind]), args)
+            return json_response(page)
+
+        except Exception as e:
+            return error_response(e)
+
+    return view
+
+
+query_actor = appearance_view('actor_name', 'actor')
+
+query_brand = appearance_view('brand_name', 'brand')
+
+query_film = appearance_view('film_title', 'film')
+
+
+@cached_response
+async def search(request):
+    """Ranked full-text search across actors, characters, brands, models and films."""
+    try:
+        q = request.query_params.get('q', '')
+        try:
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            limit = 50
+        limit = min(max(1, limit), SEARCH_MAX_LIMIT)
+        match = fts_query(q)
+        if not match:
+            return json_response({'error': 'Search terms need at least 3 characters'}, 400)
+
+        results = await DB_EXECUTOR.read(search_appearances, match, limit)
+
+        return json_response({
+            'success': True,
+            'query': q,
+            'count': len(results),
+            'results': results
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+
+async def suggest(request):
+    """Autocomplete names by prefix from SUGGEST_INDEX (not cached, like the Flask route)."""
+    try:
+        kind = request.query_params.get('type', 'actor')
+        if kind not in SUGGEST_SOURCES:
+            return json_response({'error': f"Unknown type '{kind}' (expected one of {', '.join(SUGGEST_SOURCES)})"}, 400)
+
+        prefix = request.query_params.get('prefix', '')
+        if not prefix.strip():
+            return json_response({'error': 'A prefix is required'}, 400)
+        try:
+            limit = int(request.query_params.get('limit', SUGGEST_LIMIT))
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        limit = min(max(1, limit), SUGGEST_MAX_LIMIT)
+
+        suggestions = await DB_EXECUTOR.read(SUGGEST_INDEX.suggest, kind, prefix, limit)
+
+        return json_response({
+            'success': True,
+            'type': kind,
+            'prefix': prefix,
+            'count': len(suggestions),
+            'suggestions': suggestions
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+
+def _number(request, name, default, kind=int):
+    """A numeric query parameter, or default when it is missing or malformed (like Flask's type=)."""
+    try:
+        return kind(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def get_changes(request):
+    """Change feed after ?since=<seq>, as the Flask route serves it.
+
+    A long-poll (?wait=) holds no thread while it waits: it sleeps on the
+    event loop, waking when CHANGE_FEED moves and re-reading every
+    CHANGES_POLL_SECONDS for writes from other processes.
+    """
+    try:
+        since = max(0, _number(request, 'since', 0))
+        resync_floor = _number(request, 'floor', None)
+        limit = min(max(1, _number(request, 'limit', CHANGES_PAGE_SIZE)), CHANGES_MAX_PAGE_SIZE)
+        wait = min(max(0.0, _number(request, 'wait', 0, float)), CHANGES_MAX_WAIT)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            generation = CHANGE_FEED.generation
+            page = await DB_EXECUTOR.read(read_changes, since, limit, resync_floor)
+            compacted = changes_compacted(since, page['floor'], resync_floor)
+            if page['changes'] or compacted or loop.time() >= deadline:
+                break
+            poll_at = min(deadline, loop.time() + CHANGES_POLL_SECONDS)
+            while CHANGE_FEED.generation == generation and loop.time() < poll_at:
+                await asyncio.sleep(CHANGES_WAKE_SECONDS)
+
+        if compacted:
+            return json_response({
+                'error': f'Changes up to {page["floor"]} have been compacted; resync from since=0',
+                'floor': page['floor']
+            }, 410)
+
+        return json_response(page)
+
+    except Exception as e:
+        return error_response(e)
+
+
+@cached_response
+async def get_stats(request):
+    """Get database statistics from the trigger-maintained counters."""
+    try:
+        return json_response({
+            'success': True,
+            'stats': await DB_EXECUTOR.read(read_stats)
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+
+@cached_response
+async def find_similar(request):
+    """Find potentially duplicate entries for the same actor in the same film."""
+    try:
+        entries = await DB_EXECUTOR.read(find_similar_entries, request.path_params['actor_name'],
+                                         request.path_params['film_title'])
+
+        return json_response({
+            'success': True,
+            'count': len(entries),
+            'entries': entries
+        })
+
+    except Exception as e:
+        return error_response(e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global DB_EXECUTOR
+    DB_EXECUTOR = DatabaseExecutor()
+    flask_backend.start_background_jobs()
+    try:
+        yield
+    finally:
+        flask_backend.stop_background_jobs()
+        DB_EXECUTOR.shutdown()
+
+
+routes = [
+    Route('/api/add', add_entry, methods=['POST']),
+    Route('/api/query/actor/{actor_name}', query_actor, methods=['GET']),
+    Route('/api/query/brand/{brand_name}', query_brand, methods=['GET']),
+    Route('/api/query/film/{film_title}', query_film, methods=['GET']),
+    Route('/api/search', search, methods=['GET']),
+    Route('/api/suggest', suggest, methods=['GET']),
+    Route('/api/changes', get_changes, methods=['GET']),
+    Route('/api/stats', get_stats, methods=['GET']),
+    Route('/api/find-similar/{actor_name}/{film_title}', find_similar, methods=['GET']),
+    Mount('/', app=FLASK_APP),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan,
+                middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])])
@@ -0,0 +1 @@
+"""Benchmarks for the Film Watch Database backend. Run modules with python -m from the repo root."""
@@ -0,0 +1,124 @@
+"""
+Microbenchmark for execute_insert (and execute_insert_many for comparison).
+Inserts synthetic appearances into a copy of a generated database: "warm"
+entries pair films, actors and watches that already exist (found in the
+tables, then in ID_CACHE as it fills), "cold" entries name new ones every time.
+Run: python -m benchmarks.bench_insert [--scale 10k | --db film_watches.db] [--entries 2000] [--json out.json]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+
+import flask_backend
+from benchmarks.generate import add_dataset_arguments, prepare_db
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'inserts': len(latencies),
+        'inserts_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 1),
+        'p99_us': round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        'max_us': round(latencies[-1] * 1e6, 1),
+    }
+
+
+def make_entries(db_path, count, warm, seed):
+    """Build count distinct parsed entries; warm ones reuse existing dimension rows."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    films = conn.execute("SELECT title, year FROM films").fetchall()
+    actors = [row[0] for row in conn.execute("SELECT actor_name FROM actors")]
+    watches = conn.execute("""SELECT b.brand_name, w.model_reference
+                              FROM watches w JOIN brands b ON w.brand_id = b.brand_id""").fetchall()
+    conn.close()
+
+    entries = []
+    seen = set()
+    for i in range(count):
+        if warm:
+            # Known film, actor and watch; random triples are almost never already stored
+            while True:
+                (title, year), actor, (brand, model) = rng.choice(films), rng.choice(actors), rng.choice(watches)
+                if (title, year, actor, brand, model) not in seen:
+                    seen.add((title, year, actor, brand, model))
+                    break
+        else:
+            title, year = f"Bench Film {seed}-{i}", 1950 + i % 70
+            actor = f"Bench Actor {seed}-{i}"
+            brand, model = rng.choice(watches)[0], f"Bench Model {seed}-{i}"
+        entries.append({
+            'title': title, 'year': year, 'actor': actor, 'character': f"Bench Character {i % 50}",
+            'brand': brand, 'model': model, 'verification': 'Confirmed', 'narrative': 'Watch worn in film.'
+        })
+    return entries
+
+
+def bench_single(db_path, entries):
+    conn = flask_backend.connect(db_path)
+    flask_backend.ID_CACHE.invalidate()
+    latencies = []
+    start = time.perf_counter()
+    for entry in entries:
+        t0 = time.perf_counter()
+        try:
+            flask_backend.execute_insert(conn, entry)
+        except Exception:
+            continue  # an existing appearance; rare enough not to matter
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return _summary(latencies, elapsed)
+
+
+def bench_many(db_path, entries, chunk_size):
+    conn = flask_backend.connect(db_path)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(entries), chunk_size):
+        chunk = entries[i:i + chunk_size]
+        t0 = time.perf_counter()
+        flask_backend.execute_insert_many(conn, chunk)
+        conn.commit()
+        # Spread the chunk's time over its rows so the figures compare with execute_insert
+        latencies.extend([(time.perf_counter() - t0) / len(chunk)] * len(chunk))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return _summary(latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser, default_scale='10k')
+    parser.add_argument('--entries', type=int, default=2000, help='inserts per run')
+    parser.add_argument('--chunk', type=int, default=flask_backend.BATCH_COMMIT_SIZE,
+                        help='rows per execute_insert_many call')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = prepare_db(args, tmp)
+        runs = (
+            ('execute_insert warm', lambda: bench_single(db_path, make_entries(db_path, args.entries, True, 1))),
+            ('execute_insert cold', lambda: bench_single(db_path, make_entries(db_path, args.entries, False, 2))),
+            ('execute_insert_many warm', lambda: bench_many(db_path, make_entries(db_path, args.entries, True, 3), args.chunk)),
+            ('execute_insert_many cold', lambda: bench_many(db_path, make_entries(db_path, args.entries, False, 4), args.chunk)),
+        )
+        for label, run in runs:
+            r = results[label] = run()
+            print(f"  {label:25} {r['inserts_per_sec']:>10,.0f} inserts/s   "
+                  f"p50 {r['p50_us']:8.1f}us   p99 {r['p99_us']:8.1f}us   max {r['max_us']:9.1f}us")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
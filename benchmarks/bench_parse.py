@@ -0,0 +1,91 @@
+"""
+Microbenchmark for parse_entry.
+Builds a corpus from the appearances in film_watches.db, phrased in each of the
+three sentence forms the parser accepts, then times cold (uncached) and warm
+(LRU hit) parses.
+Run: python -m benchmarks.bench_parse [--db film_watches.db] [--rounds 20] [--json out.json]
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+
+import flask_backend
+
+
+def load_corpus(db_path):
+    """Return real entries from the database, rendered in all three grammar forms."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT a.actor_name, c.character_name, b.brand_name, w.model_reference,
+               f.title, f.year
+        FROM film_actor_watch faw
+        JOIN films f ON faw.film_id = f.film_id
+        JOIN actors a ON faw.actor_id = a.actor_id
+        JOIN characters c ON faw.character_id = c.character_id
+        JOIN watches w ON faw.watch_id = w.watch_id
+        JOIN brands b ON w.brand_id = b.brand_id
+    """)
+    rows = cursor.fetchall()
+    conn.close()
+
+    corpus = []
+    for actor, character, brand, model, title, year in rows:
+        corpus.append(f"{actor} wears a {brand} {model} in the {year} film {title}.")
+        corpus.append(f"{actor} wears a {model} by {brand} in {title} ({year})")
+        corpus.append(f"In {title} ({year}), {actor} as {character} wears a {brand} {model}")
+    return corpus
+
+
+def run(corpus, rounds, cached):
+    parser = flask_backend.ENTRY_PARSER
+    parser.cache_clear()
+    if cached:
+        for text in corpus:
+            parser.parse(text)
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            if not cached:
+                parser.cache_clear()
+            t0 = time.perf_counter()
+            parser.parse(text)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'parses': len(latencies),
+        'parses_per_sec': len(latencies) / elapsed,
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p99_us': latencies[int(len(latencies) * 0.99)] * 1e6,
+        'max_us': latencies[-1] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--db', default=flask_backend.DB_PATH)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.db)
+    print(f"Corpus: {len(corpus)} entries from {args.db}")
+    results = {}
+    for label, cached in (('cold', False), ('warm', True)):
+        r = results[label] = run(corpus, args.rounds, cached)
+        print(f"  {label:5} {r['parses_per_sec']:>10,.0f} parses/s   "
+              f"p50 {r['p50_us']:7.1f}us   p99 {r['p99_us']:7.1f}us   max {r['max_us']:8.1f}us")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
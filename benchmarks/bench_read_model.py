@@ -0,0 +1,148 @@
+"""
+Benchmark for the in-memory read model against SQLite.
+Answers the same /api/query/* pages and /api/stats both ways on a generated
+(or copied) database, checks that the answers match and reports the time per
+call for each.
+Run: python -m benchmarks.bench_read_model [--scale 100k | --db film_watches.db] [--queries 200] [--json out.json]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+
+from werkzeug.datastructures import MultiDict
+
+import flask_backend
+from benchmarks.generate import add_dataset_arguments, prepare_db
+
+# (route, search column, fields, sort field, descending, list key) as the query endpoints call appearance_page
+LOOKUPS = {
+    'actor': ('actor', ['title', 'year', 'brand', 'model', 'character', 'narrative'], 'year', True, 'films'),
+    'brand': ('brand', ['title', 'year', 'actor', 'model', 'character', 'narrative'], 'year', True, 'films'),
+    'film': ('title', ['title', 'year', 'actor', 'brand', 'model', 'character', 'narrative'], 'actor', False, 'watches'),
+}
+
+# Appearances with accented names, added to the database before the comparison
+UNICODE_ENTRIES = [
+    "In Amélie (2001), Émile Durand as Élodie wears a Rolex Submariner",
+    "In Les Misérables (2012), Éloïse Martin as Fantine wears a Cartier Tank",
+]
+
+# Terms whose case differs from the stored names: SQLite's LIKE folds ASCII
+# letters only, so 'émile' must not find 'Émile' in either answer
+CASE_TERMS = {
+    'actor': ['émile', 'Émile', 'ÉMILE', 'DURAND', 'éloïse', 'é'],
+    'brand': ['rolex', 'CARTIER'],
+    'film': ['amélie', 'AMÉLIE', 'Amélie', 'misérables', 'MISÉRABLES'],
+}
+
+
+def sample_terms(db_path, count, seed):
+    """Terms like the WordPress front ends send: actor surnames, brand names and film titles."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    actors = [row[0] for row in conn.execute("SELECT actor_name FROM actors")]
+    brands = [row[0] for row in conn.execute("SELECT brand_name FROM brands")]
+    films = [row[0] for row in conn.execute("SELECT title FROM films")]
+    conn.close()
+    return {
+        'actor': [rng.choice(actors).split()[-1] for _ in range(count)] + CASE_TERMS['actor'],
+        'brand': [rng.choice(brands) for _ in range(count)] + CASE_TERMS['brand'],
+        'film': [rng.choice(films) for _ in range(count)] + CASE_TERMS['film'],
+    }
+
+
+def run_pages(conn, route, terms, limit, repeat=3):
+    """Answer a page (and the next, if any) for every term; returns (pages, best seconds of `repeat` runs)."""
+    best = None
+    for _ in range(repeat):
+        pages, seconds = _run_pages_once(conn, route, terms, limit)
+        best = seconds if best is None else min(best, seconds)
+    return pages, best
+
+
+def _run_pages_once(conn, route, terms, limit):
+    search_column, fields, sort_field, descending, list_key = LOOKUPS[route]
+    pages = []
+    started = time.perf_counter()
+    for term in terms:
+        args = MultiDict({'limit': str(limit)})
+        page = flask_backend.appearance_page(conn, args, search_column, term, fields, sort_field, descending,
+                                             {'success': True}, list_key)
+        if page['next_cursor']:
+            # Follow one cursor too, as paging clients do
+            args['cursor'] = page['next_cursor']
+            page = flask_backend.appearance_page(conn, args, search_column, term, fields, sort_field, descending,
+                                                 {'success': True}, list_key)
+        pages.append(page)
+    return pages, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser, default_scale='100k')
+    parser.add_argument('--queries', type=int, default=200, help='lookups per route')
+    parser.add_argument('--limit', type=int, default=flask_backend.DEFAULT_PAGE_SIZE, help='page size')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = prepare_db(args, tmp, 'read_model.db')
+        flask_backend.DB_PATH = db_path
+        conn = flask_backend.connect(db_path)
+        for entry in UNICODE_ENTRIES:
+            flask_backend.execute_insert(conn, flask_backend.parse_entry(entry))
+        terms = sample_terms(db_path, args.queries, args.seed)
+
+        started = time.perf_counter()
+        flask_backend.READ_MODEL.load(db_path)
+        results['load_seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Loaded {flask_backend.READ_MODEL.stats()['entries']:,} appearances in {results['load_seconds']}s")
+
+        mismatches = 0
+        for route in LOOKUPS:
+            memory_pages, memory_seconds = run_pages(conn, route, terms[route], args.limit)
+            flask_backend.READ_MODEL.stop()
+            sqlite_pages, sqlite_seconds = run_pages(conn, route, terms[route], args.limit)
+            flask_backend.READ_MODEL.load(db_path)
+
+            mismatches += sum(a != b for a, b in zip(memory_pages, sqlite_pages))
+            r = results[route] = {
+                'sqlite_us': round(sqlite_seconds / len(terms[route]) * 1e6, 1),
+                'memory_us': round(memory_seconds / len(terms[route]) * 1e6, 1),
+                'speedup': round(sqlite_seconds / memory_seconds, 1),
+            }
+            print(f"  /api/query/{route:6} sqlite {r['sqlite_us']:9.1f}us   memory {r['memory_us']:9.1f}us   "
+                  f"{r['speedup']:6.1f}x")
+
+        timings = {}
+        for label in ('memory', 'sqlite'):
+            if label == 'sqlite':
+                flask_backend.READ_MODEL.stop()
+            started = time.perf_counter()
+            for _ in range(args.queries):
+                stats = flask_backend.read_stats(conn)
+            timings[label] = (time.perf_counter() - started) / args.queries, stats
+        mismatches += timings['memory'][1] != timings['sqlite'][1]
+        r = results['stats'] = {
+            'sqlite_us': round(timings['sqlite'][0] * 1e6, 1),
+            'memory_us': round(timings['memory'][0] * 1e6, 1),
+            'speedup': round(timings['sqlite'][0] / timings['memory'][0], 1),
+        }
+        print(f"  /api/stats        sqlite {r['sqlite_us']:9.1f}us   memory {r['memory_us']:9.1f}us   "
+              f"{r['speedup']:6.1f}x")
+        conn.close()
+
+    results['mismatches'] = mismatches
+    print(f"{mismatches} answers differ between SQLite and the read model")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
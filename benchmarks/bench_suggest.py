@@ -0,0 +1,135 @@
+"""
+Benchmark for the /api/suggest prefix index against SQLite.
+Replays typing: every prefix (up to --keystrokes characters) of sampled
+actor, brand, film and model names is answered by SUGGEST_INDEX and by the
+nearest SQLite query (name LIKE 'prefix%' grouped by appearances). Also
+reports the index build time and the cost it adds to execute_insert (warm:
+known names, cold: new ones). tests/test_suggest.py checks the answers
+against a brute-force ranking.
+Run: python -m benchmarks.bench_suggest [--scale 100k | --db film_watches.db] [--names 100] [--json out.json]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+
+import flask_backend
+from benchmarks.bench_insert import make_entries
+from benchmarks.generate import add_dataset_arguments, prepare_db
+
+# kind -> (name column, SQL ranking names that start with ? by appearances)
+SQL_SUGGEST = {
+    'actor': ('actor_name', """SELECT a.actor_id, a.actor_name, COUNT(faw.faw_id) AS n FROM actors a
+                               LEFT JOIN film_actor_watch faw ON faw.actor_id = a.actor_id
+                               WHERE a.actor_name LIKE ? || '%' GROUP BY a.actor_id ORDER BY n DESC, a.actor_name LIMIT ?"""),
+    'brand': ('brand_name', """SELECT b.brand_id, b.brand_name, COUNT(faw.faw_id) AS n FROM brands b
+                               LEFT JOIN watches w ON w.brand_id = b.brand_id
+                               LEFT JOIN film_actor_watch faw ON faw.watch_id = w.watch_id
+                               WHERE b.brand_name LIKE ? || '%' GROUP BY b.brand_id ORDER BY n DESC, b.brand_name LIMIT ?"""),
+    'film': ('title', """SELECT f.film_id, f.title, COUNT(faw.faw_id) AS n FROM films f
+                         LEFT JOIN film_actor_watch faw ON faw.film_id = f.film_id
+                         WHERE f.title LIKE ? || '%' GROUP BY f.film_id ORDER BY n DESC, f.title LIMIT ?"""),
+    'model': ('model_reference', """SELECT w.watch_id, w.model_reference, COUNT(faw.faw_id) AS n FROM watches w
+                                    LEFT JOIN film_actor_watch faw ON faw.watch_id = w.watch_id
+                                    WHERE w.model_reference LIKE ? || '%' GROUP BY w.watch_id
+                                    ORDER BY n DESC, w.model_reference LIMIT ?"""),
+}
+
+TABLES = {'actor': 'actors', 'brand': 'brands', 'film': 'films', 'model': 'watches'}
+
+
+def sample_prefixes(db_path, names, keystrokes, seed):
+    """Every prefix a user typing each sampled name would send, per kind."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    prefixes = {}
+    for kind, (column, _) in SQL_SUGGEST.items():
+        values = [row[0] for row in conn.execute(f"SELECT {column} FROM {TABLES[kind]}")]
+        typed = [rng.choice(values) for _ in range(names)]
+        prefixes[kind] = [name[:n] for name in typed for n in range(1, min(keystrokes, len(name)) + 1)]
+    conn.close()
+    return prefixes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser, default_scale='100k')
+    parser.add_argument('--names', type=int, default=100, help='names typed per kind')
+    parser.add_argument('--keystrokes', type=int, default=8, help='characters typed per name')
+    parser.add_argument('--inserts', type=int, default=500, help='execute_insert calls timed with and without the index')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    index = flask_backend.SUGGEST_INDEX
+    limit = flask_backend.SUGGEST_LIMIT
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = prepare_db(args, tmp, 'suggest.db')
+        conn = flask_backend.connect(db_path)
+        prefixes = sample_prefixes(db_path, args.names, args.keystrokes, args.seed)
+
+        started = time.perf_counter()
+        index.suggest(conn, 'actor', 'a', limit)
+        results['build_seconds'] = round(time.perf_counter() - started, 3)
+        print(f"Built the index ({index.stats()['names']}) in {results['build_seconds']}s")
+
+        for kind, typed in prefixes.items():
+            timings = {}
+            for label in ('cold', 'warm'):
+                if label == 'cold':
+                    for prefix_index in index._indexes.values():
+                        prefix_index.memo.clear()
+                started = time.perf_counter()
+                for prefix in typed:
+                    index.suggest(conn, kind, prefix, limit)
+                timings[label] = (time.perf_counter() - started) / len(typed)
+            started = time.perf_counter()
+            for prefix in typed:
+                conn.execute(SQL_SUGGEST[kind][1], (prefix, limit)).fetchall()
+            timings['sqlite'] = (time.perf_counter() - started) / len(typed)
+
+            r = results[kind] = {
+                'lookups': len(typed),
+                'sqlite_us': round(timings['sqlite'] * 1e6, 1),
+                'index_cold_us': round(timings['cold'] * 1e6, 1),
+                'index_warm_us': round(timings['warm'] * 1e6, 1),
+            }
+            print(f"  {kind:6} sqlite {r['sqlite_us']:10.1f}us   index (first lookup) {r['index_cold_us']:9.1f}us   "
+                  f"index (memoized) {r['index_warm_us']:7.1f}us   over {r['lookups']} prefixes")
+
+        results['insert_us'] = {}
+        for warm in (True, False):
+            label = 'warm' if warm else 'cold'
+            entries = make_entries(db_path, args.inserts * 2, warm, args.seed)
+            timings = {}
+            for with_index, batch in ((False, entries[:args.inserts]), (True, entries[args.inserts:])):
+                if with_index:
+                    # Rebuild and memoize the typed prefixes again, as a busy server would have them
+                    for kind, typed in prefixes.items():
+                        for prefix in typed:
+                            index.suggest(conn, kind, prefix, limit)
+                else:
+                    index.invalidate()
+                started = time.perf_counter()
+                for entry in batch:
+                    try:
+                        flask_backend.execute_insert(conn, entry)
+                    except Exception:
+                        pass  # a warm entry may already be stored
+                timings[with_index] = (time.perf_counter() - started) / len(batch)
+            r = results['insert_us'][label] = {'without_index': round(timings[False] * 1e6, 1),
+                                               'with_index': round(timings[True] * 1e6, 1)}
+            print(f"  execute_insert ({label}) {r['without_index']:8.1f}us without the index, "
+                  f"{r['with_index']:8.1f}us keeping it up to date")
+        conn.close()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+End-to-end latency benchmark for every route of the Film Watch Database API.
+Drives each route through the Flask test client against a generated (or
+copied) database and writes per-route throughput and p50/p95/p99 latency to
+a JSON file; --compare prints the change against an earlier run's file.
+Run: python -m benchmarks.e2e [--scale 100k | --db film_watches.db] [--requests 200]
+         [--json e2e.json] [--compare previous.json] [--response-cache]
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import flask_backend
+from benchmarks.generate import add_dataset_arguments, prepare_db
+
+# Routes too heavy to repeat the full --requests times
+HEAVY_REQUESTS = 5
+
+
+def _sample(db_path):
+    """Pick real names from the database so lookups have something to find."""
+    conn = sqlite3.connect(db_path)
+    sample = {
+        'actors': [row[0] for row in conn.execute("SELECT actor_name FROM actors ORDER BY actor_id LIMIT 50")],
+        'brands': [row[0] for row in conn.execute("SELECT brand_name FROM brands ORDER BY brand_id LIMIT 20")],
+        'films': [row[0] for row in conn.execute("SELECT title FROM films ORDER BY film_id LIMIT 50")],
+        'models': [row[0] for row in conn.execute("SELECT model_reference FROM watches ORDER BY watch_id LIMIT 50")],
+    }
+    conn.close()
+    return sample
+
+
+def build_routes(db_path, sample):
+    """Return (name, method, make_requests(n) -> [(path, json body)], count or None).
+
+    make_requests runs right before its route is timed, so write routes can
+    set up the rows they are about to change.
+    """
+    def cycle(values, fmt):
+        return lambda n: [(fmt(values[i % len(values)], i), None) for i in range(n)]
+
+    def new_entries(n, tag):
+        brand = sample['brands'][0]
+        return [f"Bench {tag} Actor {i} wears a {brand} Bench {tag} {i} in Bench {tag} Film {i} (1999)"
+                for i in range(n)]
+
+    def structured_entries(n, tag):
+        return [{'film_title': f"Bench {tag} Film {i}", 'release_year': 1999, 'actor_full_name': f"Bench {tag} Actor {i}",
+                 'character_name': f"Bench {tag} Character {i}", 'brand': sample['brands'][0], 'model': f"Bench {tag} {i}",
+                 'source': {'source_type': 'publication', 'title': f"Bench {tag} Source {i % 10}"}, 'confidence': 'B'}
+                for i in range(n)]
+
+    def page_queries(i):
+        # What a page with a few shortcodes sends: some lookups, a search, the totals, one repeat
+        queries = [{'type': 'actor', 'term': actors[(i + j) % len(actors)].split()[-1], 'limit': 20} for j in range(4)]
+        queries += [{'type': 'brand', 'term': brands[(i + j) % len(brands)], 'limit': 20} for j in range(2)]
+        queries += [{'type': 'film', 'term': films[i % len(films)]},
+                    {'type': 'search', 'term': sample['models'][i % len(sample['models'])].split()[0], 'limit': 10},
+                    {'type': 'stats'}, {'type': 'stats'}]
+        return queries
+
+    def newest_entries(n):
+        conn = sqlite3.connect(db_path)
+        ids = [row[0] for row in conn.execute("SELECT faw_id FROM film_actor_watch ORDER BY faw_id DESC LIMIT ?", (n,))]
+        conn.close()
+        return [(f"/api/delete-entry/{faw_id}", None) for faw_id in ids]
+
+    def unused_brands(n):
+        conn = sqlite3.connect(db_path)
+        ids = [conn.execute("INSERT INTO brands (brand_name) VALUES (?)", (f"Bench Brand {time.time_ns()}-{i}",)).lastrowid
+               for i in range(n)]
+        conn.commit()
+        conn.close()
+        return [(f"/api/delete-brand/{brand_id}", None) for brand_id in ids]
+
+    actors, brands, films = sample['actors'], sample['brands'], sample['films']
+    return [
+        ('GET /', 'GET', lambda n: [('/', None)] * n, None),
+        ('GET /ui', 'GET', lambda n: [('/ui', None)] * n, None),
+        ('GET /api/query/actor', 'GET', cycle(actors, lambda name, i: f"/api/query/actor/{name.split()[-1]}?limit=50"), None),
+        ('GET /api/query/brand', 'GET', cycle(brands, lambda name, i: f"/api/query/brand/{name}?limit=50"), None),
+        ('GET /api/query/film', 'GET', cycle(films, lambda title, i: f"/api/query/film/{title}"), None),
+        ('GET /api/search', 'GET', cycle(sample['models'], lambda model, i: f"/api/search?q={model.split()[0]}&limit=20"), None),
+        ('GET /api/suggest', 'GET',
+         cycle(actors, lambda name, i: f"/api/suggest?type={('actor', 'brand', 'film', 'model')[i % 4]}"
+                                       f"&prefix={name[:1 + i % 6]}"), None),
+        ('GET /api/stats', 'GET', lambda n: [('/api/stats', None)] * n, None),
+        ('GET /api/changes (page of 500)', 'GET',
+         lambda n: [(f"/api/changes?since={i * 500}&limit=500", None) for i in range(n)], None),
+        ('POST /api/query/batch (10 queries)', 'POST',
+         lambda n: [('/api/query/batch', {'queries': page_queries(i)}) for i in range(n)], None),
+        ('GET /api/find-similar', 'GET',
+         cycle(list(zip(actors, films)), lambda pair, i: f"/api/find-similar/{pair[0]}/{pair[1][:6]}"), None),
+        ('GET /api/duplicates', 'GET',
+         lambda n: [(f"/api/duplicates?kind={kind}", None) for kind in flask_backend.SIMILARITY_SOURCES] * n,
+         HEAVY_REQUESTS),
+        ('GET /api/cache-stats', 'GET', lambda n: [('/api/cache-stats', None)] * n, None),
+        ('GET /api/metrics', 'GET', lambda n: [('/api/metrics', None)] * n, None),
+        ('GET /api/metrics/slow-queries', 'GET', lambda n: [('/api/metrics/slow-queries', None)] * n, None),
+        ('GET /api/ingest-stats', 'GET', lambda n: [('/api/ingest-stats', None)] * n, None),
+        ('GET /api/ingest (unknown ticket)', 'GET', lambda n: [(f"/api/ingest/bench-{i}", None) for i in range(n)], None),
+        ('GET /api/stats/verify', 'GET', lambda n: [('/api/stats/verify', None)] * n, None),
+        ('POST /api/add', 'POST', lambda n: [('/api/add', {'entry': text}) for text in new_entries(n, 'Add')], None),
+        ('POST /api/add duplicate', 'POST', lambda n: [('/api/add', {'entry': text}) for text in new_entries(1, 'Add')] * n, None),
+        ('POST /api/add/batch', 'POST',
+         lambda n: [('/api/add/batch', new_entries(n * 20, 'Batch')[i * 20:(i + 1) * 20]) for i in range(n)], None),
+        ('POST /api/add_structured', 'POST',
+         lambda n: [('/api/add_structured', fields) for fields in structured_entries(n, 'Structured')], None),
+        ('POST /api/add_structured (array of 20)', 'POST',
+         lambda n: [('/api/add_structured', structured_entries(n * 20, 'Bulk')[i * 20:(i + 1) * 20]) for i in range(n)], None),
+        ('DELETE /api/delete-entry', 'DELETE', newest_entries, None),
+        ('DELETE /api/delete-brand', 'DELETE', unused_brands, None),
+        ('POST /api/stats/verify', 'POST', lambda n: [('/api/stats/verify', None)] * n, HEAVY_REQUESTS),
+        ('POST /api/changes/compact', 'POST', lambda n: [('/api/changes/compact', None)] * n, HEAVY_REQUESTS),
+        ('POST /api/cleanup-duplicate-characters?dry_run=1', 'POST',
+         lambda n: [('/api/cleanup-duplicate-characters?dry_run=1', None)] * n, HEAVY_REQUESTS),
+        ('POST /api/cleanup-duplicate-characters', 'POST',
+         lambda n: [('/api/cleanup-duplicate-characters', None)] * n, HEAVY_REQUESTS),
+        ('POST /api/cleanup-duplicate-actors', 'POST', lambda n: [('/api/cleanup-duplicate-actors', None)] * n, HEAVY_REQUESTS),
+        ('POST /api/cleanup-bad-brands', 'POST', lambda n: [('/api/cleanup-bad-brands', None)] * n, HEAVY_REQUESTS),
+    ]
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def time_route(client, method, requests):
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    for path, body in requests:
+        t0 = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        latencies.append(time.perf_counter() - t0)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requests_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Print p50/p99 for each route against an earlier run; '!' marks a >20% slowdown."""
+    print(f"\nAgainst {previous['meta'].get('commit')} ({previous['meta'].get('rows'):,} rows):")
+    for name, now in current['routes'].items():
+        before = previous['routes'].get(name)
+        if not before:
+            print(f"  {name:50} new")
+            continue
+        cells = []
+        for key in ('p50_ms', 'p99_ms'):
+            ratio = now[key] / before[key] if before[key] else float('inf')
+            flag = '!' if ratio > 1.2 else ' '
+            cells.append(f"{key[:3]} {before[key]:9.3f} -> {now[key]:9.3f} ms ({ratio:5.2f}x){flag}")
+        print(f"  {name:50} {'   '.join(cells)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser, default_scale='100k')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--response-cache', action='store_true',
+                        help='leave the HTTP response cache on (off by default so every request reaches SQLite)')
+    parser.add_argument('--json', default='e2e.json', help='where to write the results')
+    parser.add_argument('--compare', help='an earlier results file to compare against')
+    args = parser.parse_args()
+
+    if not args.response_cache:
+        flask_backend.RESPONSE_CACHE.max_size = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = prepare_db(args, tmp, 'e2e.db')
+        flask_backend.DB_PATH = db_path
+        flask_backend.POOL.close_all()
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM film_actor_watch").fetchone()[0]
+        conn.close()
+
+        client = flask_backend.app.test_client()
+        results = {
+            'meta': {
+                'commit': _git_commit(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'rows': rows,
+                'seed': None if args.db else args.seed,
+                'db': args.db,
+                'requests_per_route': args.requests,
+                'response_cache': args.response_cache,
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+            },
+            'routes': {},
+        }
+
+        exercised = set()
+        for name, method, make_requests, count in build_routes(db_path, _sample(db_path)):
+            requests = make_requests(count or args.requests)
+            exercised.update(flask_backend.app.url_map.bind('localhost').match(path.split('?')[0], method)[0]
+                             for path, _ in requests[:1])
+            r = results['routes'][name] = time_route(client, method, requests)
+            print(f"  {name:50} {r['requests_per_s']:>9,.1f} req/s   p50 {r['p50_ms']:8.3f}ms   "
+                  f"p95 {r['p95_ms']:8.3f}ms   p99 {r['p99_ms']:8.3f}ms   {r['statuses']}")
+
+        flask_backend.POOL.close_all()
+
+    missed = sorted(rule.endpoint for rule in flask_backend.app.url_map.iter_rules()
+                    if rule.endpoint not in exercised and rule.endpoint != 'static')
+    if missed:
+        print(f"Routes not exercised: {', '.join(missed)}", file=sys.stderr)
+
+    with open(args.json, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Seeded synthetic dataset generator for the Film Watch Database.
+Creates the schema from schema.sql (plus migrations) and fills it with
+plausible films, actors, characters, brands, watches and appearances.
+Run: python -m benchmarks.generate out.db [--scale 10k|100k|1m | --rows N] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import flask_backend
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schema.sql')
+
+# Named dataset sizes, in appearances
+SCALES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+
+FIRST_NAMES = [
+    'Sean', 'Roger', 'Daniel', 'Pierce', 'Timothy', 'George', 'Steve', 'Paul', 'Tom', 'Harrison',
+    'Matthew', 'Ryan', 'Keanu', 'Leonardo', 'Robert', 'Gene', 'Dustin', 'Roy', 'Richard', 'Henry',
+    'Grace', 'Audrey', 'Honor', 'Ursula', 'Eva', 'Judi', 'Scarlett', 'Charlize', 'Cate', 'Meryl',
+    'Michael', 'Denzel', 'Clint', 'Jack', 'Al', 'Marlon', 'James', 'Cary', 'Kirk', 'Burt'
+]
+LAST_NAMES = [
+    'Connery', 'Moore', 'Craig', 'Brosnan', 'Dalton', 'Lazenby', 'McQueen', 'Newman', 'Cruise', 'Ford',
+    'McConaughey', 'Gosling', 'Reeves', 'DiCaprio', 'De Niro', 'Hackman', 'Hoffman', 'Scheider',
+    'Dreyfuss', 'Fonda', 'Kelly', 'Hepburn', 'Blackman', 'Andress', 'Green', 'Dench', 'Johansson',
+    'Theron', 'Blanchett', 'Streep', 'Caine', 'Washington', 'Eastwood', 'Nicholson', 'Pacino',
+    'Brando', 'Stewart', 'Grant', 'Douglas', 'Lancaster'
+]
+TITLE_WORDS = [
+    'Golden', 'Silent', 'Midnight', 'Last', 'Crimson', 'Broken', 'Northern', 'Hidden', 'Burning',
+    'Frozen', 'Secret', 'Lost', 'Iron', 'Glass', 'Distant', 'Savage', 'Electric', 'Quiet', 'Final',
+    'Affair', 'Protocol', 'Horizon', 'Spy', 'Gun', 'Connection', 'Heist', 'Empire', 'River',
+    'Station', 'Frontier', 'Signal', 'Storm', 'Circle', 'Target', 'Mission', 'Reckoning', 'Code'
+]
+CHARACTER_NAMES = [
+    'James Bond', 'Felix Leiter', 'Thomas Crown', 'Popeye Doyle', 'Travis Bickle', 'Matt Hooper',
+    'Chief Brody', 'Ethan Hunt', 'John Wick', 'Jack Ryan', 'Indiana Jones', 'Neil Armstrong',
+    'Cooper', 'Rick Deckard', 'Frank Bullitt', 'Michael Delaney', 'Juror #8', 'Dr. Evans',
+    'Agent Smith', 'Captain Miller', 'Detective Harris', 'The Stranger', 'Colonel Hayes'
+]
+MODELS = [
+    'Submariner', 'GMT-Master', 'Daytona', 'Datejust', 'Explorer', 'Speedmaster', 'Seamaster',
+    'Constellation', 'Monaco', 'Carrera', 'Autavia', 'Navitimer', 'Chronomat', 'Tank', 'Santos',
+    'Calatrava', 'Nautilus', 'Reverso', 'Royal Oak', 'Khaki Field', 'Ventura', 'Black Bay',
+    'Pilot', 'Diver', 'Chronograph', 'Dress Watch', 'Digital LED', 'Moonwatch', 'Aquanaut'
+]
+
+
+def _person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _unique(rng, count, make):
+    """Draw count distinct values from make(rng), numbering any repeats."""
+    values = set()
+    while len(values) < count:
+        value = make(rng)
+        if value in values:
+            value = f"{value} {len(values)}"
+        values.add(value)
+    return sorted(values)
+
+
+def generate(db_path, rows, seed=1):
+    """Create db_path with about `rows` appearances and return the number written."""
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists")
+
+    rng = random.Random(seed)
+    n_films = max(10, rows // 4)
+    n_actors = max(10, rows // 6)
+    n_characters = max(10, rows // 3)
+    n_watches = max(20, rows // 20)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+
+    cursor = conn.cursor()
+    films = _unique(rng, n_films, lambda r: f"The {r.choice(TITLE_WORDS)} {r.choice(TITLE_WORDS)}")
+    cursor.executemany("INSERT INTO films (title, year) VALUES (?, ?)",
+                       [(title, rng.randint(1930, 2024)) for title in films])
+    cursor.executemany("INSERT INTO actors (actor_name) VALUES (?)",
+                       [(name,) for name in _unique(rng, n_actors, _person)])
+    cursor.executemany("INSERT INTO characters (character_name) VALUES (?)",
+                       [(rng.choice(CHARACTER_NAMES + [_person(rng)]),) for _ in range(n_characters)])
+    cursor.executemany("INSERT INTO brands (brand_name) VALUES (?)",
+                       [(name,) for name in flask_backend.DEFAULT_BRANDS])
+
+    n_brands = len(flask_backend.DEFAULT_BRANDS)
+    # A few brands dominate, as they do in the real data
+    brand_weights = [1 / (i + 1) for i in range(n_brands)]
+    watches = set()
+    while len(watches) < n_watches:
+        brand_id = rng.choices(range(1, n_brands + 1), brand_weights)[0]
+        model = f"{rng.choice(MODELS)} Ref. {rng.randint(100, 99999)}"
+        watches.add((brand_id, model))
+    cursor.executemany("INSERT INTO watches (brand_id, model_reference, verification_level) VALUES (?, ?, 'Confirmed')",
+                       sorted(watches))
+
+    # Unique on film, actor and watch, as migration 5 requires
+    appearances = {}
+    while len(appearances) < rows:
+        key = (rng.randint(1, n_films), rng.randint(1, n_actors), rng.randint(1, n_watches))
+        appearances.setdefault(key, rng.randint(1, n_characters))
+    cursor.executemany("""INSERT INTO film_actor_watch
+                          (film_id, actor_id, watch_id, character_id, narrative_role)
+                          VALUES (?, ?, ?, ?, 'Watch worn in film.')""",
+                       [key + (character_id,) for key, character_id in appearances.items()])
+    conn.commit()
+
+    flask_backend.migrate(conn)
+    conn.execute("ANALYZE")
+    conn.close()
+    return len(appearances)
+
+
+def copy_db(source, target):
+    """Copy a live database with the backup API, so a WAL file is folded in."""
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    src.backup(dst)
+    src.close()
+    dst.close()
+
+
+def add_dataset_arguments(parser, default_scale):
+    """Add the --db / --scale / --rows / --seed options shared by the benchmarks."""
+    parser.add_argument('--db', help='use a copy of this database instead of generating one')
+    parser.add_argument('--scale', choices=sorted(SCALES, key=SCALES.get), default=default_scale,
+                        help='size of the generated database')
+    parser.add_argument('--rows', type=int, help='generate exactly this many appearances (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def prepare_db(args, directory, name='bench.db'):
+    """Copy --db or generate a dataset into directory and return its path.
+
+    The original file is never written to.
+    """
+    db_path = os.path.join(directory, name)
+    if args.db:
+        copy_db(args.db, db_path)
+    else:
+        rows = args.rows or SCALES[args.scale]
+        print(f"Generating {rows:,} appearances (seed {args.seed})...")
+        generate(db_path, rows, args.seed)
+    return db_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('db')
+    parser.add_argument('--scale', choices=sorted(SCALES, key=SCALES.get), default='100k')
+    parser.add_argument('--rows', type=int, help='exact number of appearances (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written = generate(args.db, args.rows or SCALES[args.scale], args.seed)
+    print(f"Wrote {written:,} appearances to {args.db} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
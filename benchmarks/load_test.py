@@ -0,0 +1,189 @@
+"""
+HTTP load test for the Film Watch Database API servers.
+Opens many keep-alive connections at once and replays a mix of read routes
+over each for a fixed time, then reports throughput and latency per server.
+Run: python flask_backend.py                        (sync, port 5000)
+     uvicorn asgi_backend:app --port 8000           (async)
+     python -m benchmarks.load_test http://127.0.0.1:5000 http://127.0.0.1:8000 \
+         [--connections 1000] [--idle 2000] [--duration 10] [--json results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import time
+from urllib.parse import quote, urlsplit
+
+# Requests each connection cycles through, starting at a different point per connection
+DEFAULT_PATHS = [
+    '/api/stats',
+    '/api/query/actor/Connery?limit=20',
+    '/api/query/brand/Rolex?limit=20',
+    '/api/query/film/Dr. No',
+    '/api/search?q=submariner&limit=20',
+    '/api/find-similar/Sean Connery/Dr. No',
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response and return (status, keep_alive)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif status not in (204, 304):
+        await reader.read()
+        return status, False
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+class Connection:
+    """A raw keep-alive HTTP/1.1 connection that reconnects when the server closes it."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            await self.open()
+        self.writer.write(f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\n\r\n'.encode())
+        await self.writer.drain()
+        status, keep_alive = await _read_response(self.reader)
+        if not keep_alive:
+            self.close()
+        return status
+
+
+async def run(url, paths, connections, idle, duration, timeout):
+    """Drive one server and return its summary dict."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    paths = [quote(path, safe='/?=&') for path in paths]
+
+    # Connections that stay open doing nothing, as parked keep-alives from front ends do
+    parked = []
+    for _ in range(idle):
+        conn = Connection(host, port)
+        try:
+            await asyncio.wait_for(conn.open(), timeout)
+            parked.append(conn)
+        except (OSError, asyncio.TimeoutError):
+            break
+
+    latencies = []
+    errors = {}
+    deadline = time.monotonic() + duration
+
+    async def client(n):
+        conn = Connection(host, port)
+        i = n
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(conn.get(path), timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                conn.close()
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            if status >= 400:
+                errors[f'HTTP {status}'] = errors.get(f'HTTP {status}', 0) + 1
+            else:
+                latencies.append(time.perf_counter() - started)
+        conn.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(connections)))
+    elapsed = time.perf_counter() - started
+    for conn in parked:
+        conn.close()
+
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'url': url,
+        'connections': connections,
+        'idle_connections': len(parked),
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'requests_per_s': round(len(latencies) / elapsed, 1),
+        'errors': errors,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'max_ms': ms(latencies[-1] if latencies else None),
+    }
+
+
+def _raise_fd_limit(needed):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='+', help='server base URLs, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--connections', type=int, default=1000, help='concurrently active keep-alive connections')
+    parser.add_argument('--idle', type=int, default=0, help='extra connections held open without requests')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per server')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds before a request counts as failed')
+    parser.add_argument('--path', action='append', dest='paths', help='request path (repeatable; default: a read mix)')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    _raise_fd_limit(args.connections + args.idle + 256)
+
+    results = []
+    for url in args.urls:
+        print(f"{url}: {args.connections} connections ({args.idle} idle) for {args.duration:g}s...")
+        result = asyncio.run(run(url, args.paths or DEFAULT_PATHS, args.connections, args.idle,
+                                 args.duration, args.timeout))
+        results.append(result)
+        print(f"  {result['requests']:,} requests  {result['requests_per_s']:,.1f} req/s  "
+              f"p50 {result['p50_ms']} ms  p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+              f"max {result['max_ms']} ms  errors {sum(result['errors'].values())} {result['errors'] or ''}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
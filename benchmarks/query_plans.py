@@ -0,0 +1,157 @@
+"""
+Query-plan regression check for the Film Watch Database API.
+Drives every route through the Flask test client against a large generated
+database, records each SQL statement the route runs, and fails if
+EXPLAIN QUERY PLAN shows a full SCAN of film_actor_watch. The test suite
+(tests/test_query_plans.py) runs the same check on a small database.
+Run: python -m benchmarks.query_plans [--scale 1m | --rows N | --db existing.db]
+(--db is copied first; the check never writes to the original file.)
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+import tempfile
+
+import flask_backend
+from benchmarks.generate import add_dataset_arguments, prepare_db
+
+# (method, path, JSON body, reason a full scan of the fact table is expected)
+ROUTES = [
+    ('GET', '/api/query/actor/Connery', None, None),
+    ('GET', '/api/query/brand/Heuer', None, None),
+    ('GET', '/api/query/film/Golden Heist', None, None),
+    ('GET', '/api/query/actor/Connery?limit=5&fields=title,brand', None, None),
+    ('GET', f"/api/query/actor/Connery?limit=5&cursor={flask_backend.encode_cursor(1990, 1000)}", None, None),
+    ('GET', f"/api/query/film/Golden Heist?limit=5&cursor={flask_backend.encode_cursor('Sean Connery', 1000)}",
+     None, None),
+    ('GET', '/api/query/brand/Heuer?stream=1&fields=title,year', None, None),
+    ('GET', '/api/query/actor/Co?stream=1', None, None),
+    ('GET', '/api/query/brand/Ro?stream=1', None, None),
+    ('GET', '/api/query/film/8½?stream=1', None, None),
+    ('GET', '/api/search?q=Submariner&limit=20', None, None),
+    # The first lookup builds every SUGGEST_SOURCES index; later ones never touch SQLite.
+    ('GET', '/api/suggest?type=actor&prefix=Sea', None, None),
+    ('GET', '/api/suggest?type=model&prefix=Sub', None, None),
+    ('POST', '/api/query/batch', {'queries': [
+        {'type': 'actor', 'term': 'Connery', 'limit': 5},
+        {'type': 'brand', 'term': 'Heuer', 'fields': ['title', 'year']},
+        {'type': 'film', 'term': 'Golden Heist'},
+        {'type': 'search', 'term': 'Submariner'},
+        {'type': 'stats'},
+    ]}, None),
+    ('GET', '/api/changes?since=0&limit=100', None, None),
+    ('GET', '/api/changes?since=1000&limit=100&wait=0', None, None),
+    ('GET', '/api/duplicates?kind=actors', None, None),
+    ('GET', '/api/duplicates?kind=characters', None, None),
+    ('GET', '/api/duplicates?kind=brands', None, None),
+    ('GET', '/api/duplicates?kind=watches', None, None),
+    ('GET', '/api/find-similar/Sean Connery/The Golden', None, None),
+    ('GET', '/api/stats', None, None),
+    ('POST', '/api/stats/verify', None, 'recounts every appearance'),
+    ('POST', '/api/add', {'entry': 'Sean Connery wears a Rolex Submariner Ref. 6538 in Dr. No (1962)'}, None),
+    ('POST', '/api/add', {'entry': 'Sean Connery wears a Rolex Submariner Ref. 6538 in Dr. No (1962)'}, None),
+    ('POST', '/api/add/batch', ['Roger Moore wears a Seiko 0674 LC in The Spy Who Loved Me (1977)',
+                                'Daniel Craig wears an Omega Seamaster in Casino Royale (2006)'], None),
+    ('POST', '/api/add_structured', {'film_title': 'Dr. No', 'release_year': 1962, 'actor_full_name': 'Sean Connery',
+                                     'character_name': 'James Bond', 'brand': 'Rolex', 'model': 'Submariner',
+                                     'reference': '6538', 'source': {'source_type': 'prop', 'url': 'https://example.com'},
+                                     'confidence': 'A'}, None),
+    ('POST', '/api/add_structured', [{'film_title': 'Goldfinger', 'release_year': 1964, 'actor_full_name': 'Sean Connery',
+                                      'brand': 'Rolex', 'model': 'Submariner'},
+                                     {'film_title': 'Bullitt', 'release_year': 1968, 'actor_full_name': 'Steve McQueen',
+                                      'brand': 'Benrus', 'model': 'Series 3061'}], None),
+    ('DELETE', '/api/delete-entry/1', None, None),
+    ('DELETE', '/api/delete-brand/999999', None, None),
+    ('POST', '/api/cleanup-bad-brands', None, None),
+    ('POST', '/api/cleanup-duplicate-actors', None, None),
+    ('POST', '/api/cleanup-duplicate-characters?dry_run=1', None, None),
+    ('POST', '/api/cleanup-duplicate-characters', None, None),
+    ('POST', '/api/changes/compact', None, None),
+]
+
+FACT_TABLE_SCAN = re.compile(r'^SCAN (film_actor_watch|faw)\b')
+TEMP_TABLE = re.compile(r'\s*CREATE TEMP TABLE (\w+)', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def explain(conn, sql):
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN QUERY PLAN " + sql)
+    return [row[3] for row in cursor.fetchall()]
+
+
+def fact_table_scans(db_path, verbose=False):
+    """Run every route against db_path and return (method, path, sql, plan) for
+    each statement that scans film_actor_watch without an allowed reason.
+
+    The caller points flask_backend.DB_PATH at db_path and turns
+    METRICS_ENABLED off first (request tracing would replace the trace
+    callback this installs).
+    """
+    flask_backend.POOL.close_all()
+    statements = []
+    traced = flask_backend.connect(db_path)
+    traced.set_trace_callback(statements.append)
+    flask_backend.POOL.release(traced)
+
+    explainer = sqlite3.connect(db_path)
+    client = flask_backend.app.test_client()
+    failures = []
+
+    for method, path, body, allowed in ROUTES:
+        statements.clear()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+
+        seen = set()
+        for sql in statements:
+            if TEMP_TABLE.match(sql):
+                # Recreate the route's scratch tables so statements using them can be explained
+                explainer.execute(f"DROP TABLE IF EXISTS temp.{TEMP_TABLE.match(sql).group(1)}")
+                explainer.execute(sql)
+                continue
+            key = _LITERALS.sub('?', sql)
+            if key in seen or not re.match(r'\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', sql, re.IGNORECASE):
+                continue
+            seen.add(key)
+
+            plan = explain(explainer, sql)
+            scans = [line for line in plan if FACT_TABLE_SCAN.match(line)]
+            if scans and not allowed:
+                failures.append((method, path, ' '.join(sql.split()), plan))
+            elif verbose:
+                status = f"ok (scan allowed: {allowed})" if scans else "ok"
+                print(f"{status:8} {method} {path}: {' '.join(sql.split())[:100]}")
+
+        print(f"{response.status_code} {method} {path}: {len(seen)} distinct statements")
+
+    explainer.close()
+    flask_backend.POOL.close_all()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_dataset_arguments(parser, default_scale='1m')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flask_backend.DB_PATH = prepare_db(args, tmp, 'query_plans.db')
+        flask_backend.METRICS_ENABLED = False
+        failures = fact_table_scans(flask_backend.DB_PATH, args.verbose)
+
+    for method, path, sql, plan in failures:
+        print(f"FAIL {method} {path}\n  {sql[:200]}")
+        for line in plan:
+            print(f"    {line}")
+    if failures:
+        print(f"{len(failures)} statement(s) scan film_actor_watch")
+        sys.exit(1)
+    print("No full scans of film_actor_watch")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""
+Command-line tools for the Film Watch Database
+Run: python -m filmwatch init [--db film_watches.db]
+     python -m filmwatch load entries.txt [--db film_watches.db] [--resume]
+
+`load` reads one entry per line from a text file, a CSV file (an "entry"
+column, or the first column, plus an optional "narrative" column) or a JSONL
+file (entry strings or {"entry", "narrative"} objects), and writes it straight
+into the SQLite file with bulk-load pragmas. After each committed chunk the
+byte offset of the next unread line is saved to <file>.offset, so an
+interrupted run can pick up where it stopped with --resume (or --offset N).
+The fact-table indexes a load drops are recorded in the database, and the
+next load (resumed or not) rebuilds any that a killed run left missing.
+The per-row insert triggers (search index, stats counters, change log) are
+dropped inside each chunk's transaction and their work done once per chunk
+with set-based statements, so a killed run never leaves them missing.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import flask_backend
+from flask_backend import (BATCH_COMMIT_SIZE, CHANGE_TABLES, execute_insert_many, migrate, parse_entry,
+                           reload_brand_index)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+BULK_CACHE_SIZE_KB = 512 * 1024
+
+
+def init_db(db_path):
+    """Create the tables from schema.sql, refusing to touch a database that has them."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'film_actor_watch'")
+        if cursor.fetchone():
+            raise SystemExit(f"{db_path} already has a schema; not overwriting it")
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        conn.commit()
+        version = migrate(conn)
+    finally:
+        conn.close()
+    print(f"Created schema version {version} in {db_path}")
+
+
+def detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    return 'text'
+
+
+def read_entries(path, fmt, offset=0):
+    """Yield (next_offset, item) for each line of path starting at byte offset.
+
+    item is a dict with "entry" (and maybe "narrative"), or the exception
+    raised while decoding the line. Quoted CSV fields may not span lines.
+    """
+    with open(path, 'rb') as f:
+        columns = None
+        if fmt == 'csv':
+            header = next(csv.reader([f.readline().decode('utf-8-sig')]), [])
+            columns = [name.strip().lower() for name in header]
+            if 'entry' not in columns:
+                # No header row: the first column holds the entry text
+                columns = ['entry'] + columns[1:]
+                if offset == 0:
+                    f.seek(0)
+            offset = max(offset, f.tell())
+
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            line = raw.decode('utf-8-sig').strip()
+            if not line:
+                continue
+            try:
+                if fmt == 'jsonl':
+                    item = json.loads(line)
+                    if isinstance(item, str):
+                        item = {'entry': item}
+                elif fmt == 'csv':
+                    item = dict(zip(columns, next(csv.reader([line]))))
+                else:
+                    item = {'entry': line}
+            except ValueError as e:
+                item = e
+            yield offset, item
+
+
+# Where load() keeps the DDL of the indexes it dropped, so a killed load can put them back
+DROPPED_INDEXES_TABLE = 'load_dropped_indexes'
+
+
+def _drop_secondary_indexes(conn):
+    """Drop the fact table's non-unique indexes so they are rebuilt once, after the load.
+
+    UNIQUE indexes stay: the upserts' ON CONFLICT targets depend on them.
+    So do the dimension-table indexes, which the bulk lookups use. The
+    dropped DDL is saved in DROPPED_INDEXES_TABLE (created by
+    _restore_indexes, which runs first) in the same transaction.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""SELECT m.name, m.sql FROM sqlite_master m
+                      JOIN pragma_index_list('film_actor_watch') l ON l.name = m.name
+                      WHERE m.type = 'index' AND m.sql IS NOT NULL AND l."unique" = 0""")
+    indexes = cursor.fetchall()
+    cursor.executemany(f"INSERT OR REPLACE INTO {DROPPED_INDEXES_TABLE} (name, sql) VALUES (?, ?)", indexes)
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+
+
+def _restore_indexes(conn):
+    """Recreate every index a load dropped (this run's or an interrupted one's)."""
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {DROPPED_INDEXES_TABLE} (name TEXT PRIMARY KEY, sql TEXT NOT NULL)")
+    cursor.execute(f"""SELECT name, sql FROM {DROPPED_INDEXES_TABLE}
+                       WHERE name NOT IN (SELECT name FROM sqlite_master WHERE type = 'index')""")
+    restored = cursor.fetchall()
+    for _, sql in restored:
+        cursor.execute(sql)
+    cursor.execute(f"DELETE FROM {DROPPED_INDEXES_TABLE}")
+    conn.commit()
+    return [name for name, _ in restored]
+
+
+# The AFTER INSERT triggers _insert_chunk() stands in for
+_ROW_TRIGGERS_SQL = """SELECT name, sql FROM sqlite_master WHERE type = 'trigger'
+                       AND (name GLOB 'trg_changes_*_insert' OR name GLOB 'trg_stats_*_insert'
+                            OR name = 'trg_search_faw_insert')"""
+
+# What those triggers do, for every row above the (table -> max id) marks taken before the chunk
+_CHUNK_MAINTENANCE_SQL = [
+    """INSERT INTO appearance_search (rowid, actor, character, brand, model, title)
+       SELECT faw.faw_id, a.actor_name, c.character_name, b.brand_name, w.model_reference, f.title
+       FROM film_actor_watch faw
+       JOIN actors a ON faw.actor_id = a.actor_id
+       JOIN characters c ON faw.character_id = c.character_id
+       JOIN watches w ON faw.watch_id = w.watch_id
+       JOIN brands b ON w.brand_id = b.brand_id
+       JOIN films f ON faw.film_id = f.film_id
+       WHERE faw.faw_id > :film_actor_watch""",
+    """UPDATE stats SET value = value + CASE name
+           WHEN 'films' THEN (SELECT COUNT(*) FROM films WHERE film_id > :films)
+           WHEN 'actors' THEN (SELECT COUNT(*) FROM actors WHERE actor_id > :actors)
+           WHEN 'brands' THEN (SELECT COUNT(*) FROM brands WHERE brand_id > :brands)
+           WHEN 'entries' THEN (SELECT COUNT(*) FROM film_actor_watch WHERE faw_id > :film_actor_watch)
+       END
+       WHERE name IN ('films', 'actors', 'brands', 'entries')""",
+    """INSERT INTO brand_stats (brand_id, appearances)
+       SELECT w.brand_id, COUNT(*) FROM film_actor_watch faw JOIN watches w ON faw.watch_id = w.watch_id
+       WHERE faw.faw_id > :film_actor_watch GROUP BY w.brand_id
+       ON CONFLICT (brand_id) DO UPDATE SET appearances = appearances + excluded.appearances""",
+] + [
+    # CHANGE_TABLES order puts each row after the rows it refers to
+    f"""INSERT INTO changes (table_name, row_id, op)
+        SELECT '{table}', {id_column}, 'insert' FROM {table} WHERE {id_column} > :{table} ORDER BY {id_column}"""
+    for table, (id_column, _) in CHANGE_TABLES.items()
+]
+
+
+def _insert_chunk(conn, rows):
+    """execute_insert_many() with the per-row insert triggers replaced by one
+    statement each, all in the chunk's transaction; the caller commits."""
+    cursor = conn.cursor()
+    # DDL would otherwise autocommit; the write lock keeps other writers' rows above the marks out
+    if not conn.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
+    marks = {table: cursor.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM {table}").fetchone()[0]
+             for table, (id_column, _) in CHANGE_TABLES.items()}
+    triggers = cursor.execute(_ROW_TRIGGERS_SQL).fetchall()
+    for name, _ in triggers:
+        cursor.execute(f'DROP TRIGGER "{name}"')
+
+    results = execute_insert_many(conn, rows)
+    for sql in _CHUNK_MAINTENANCE_SQL:
+        cursor.execute(sql, marks)
+    for _, sql in triggers:
+        cursor.execute(sql)
+    return results
+
+
+def load(db_path, path, fmt=None, offset=0, chunk_size=BATCH_COMMIT_SIZE * 10, quiet=False):
+    """Bulk-load a file of entries into db_path and return the per-status counts."""
+    fmt = fmt or detect_format(path)
+    checkpoint = path + '.offset'
+    counts = {'success': 0, 'duplicate': 0, 'error': 0}
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute(f"PRAGMA cache_size = -{BULK_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    migrate(conn)
+    restored = _restore_indexes(conn)
+    if restored and not quiet:
+        print(f"Rebuilt indexes left dropped by an interrupted load: {', '.join(restored)}", file=sys.stderr)
+    reload_brand_index(conn)
+    _drop_secondary_indexes(conn)
+
+    started = time.perf_counter()
+    last_report = started
+
+    def report(final=False):
+        elapsed = time.perf_counter() - started
+        done = sum(counts.values())
+        rate = done / elapsed if elapsed else 0
+        print(f"\r{done:,} rows  {rate:,.0f} rows/s  "
+              f"({counts['success']:,} added, {counts['duplicate']:,} duplicate, "
+              f"{counts['error']:,} errors)  offset {offset:,}",
+              end='\n' if final else '', file=sys.stderr, flush=True)
+
+    try:
+        pending = []
+        for next_offset, item in read_entries(path, fmt, offset):
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                parsed = parse_entry(item.get('entry') or '')
+                parsed['narrative'] = item.get('narrative') or 'Watch worn in film.'
+                pending.append(parsed)
+            except Exception as e:
+                counts['error'] += 1
+                if not quiet:
+                    print(f"\nline ending at byte {next_offset}: {e}", file=sys.stderr)
+
+            if len(pending) >= chunk_size:
+                for status, _ in _insert_chunk(conn, pending):
+                    counts[status] += 1
+                conn.commit()
+                pending = []
+                offset = next_offset
+                with open(checkpoint, 'w') as f:
+                    f.write(str(offset))
+
+                now = time.perf_counter()
+                if not quiet and now - last_report >= 1:
+                    report()
+                    last_report = now
+            elif not pending:
+                offset = next_offset
+
+        if pending:
+            for status, _ in _insert_chunk(conn, pending):
+                counts[status] += 1
+            conn.commit()
+        offset = os.path.getsize(path)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+    finally:
+        conn.rollback()
+        _restore_indexes(conn)
+        conn.execute("PRAGMA optimize")
+        conn.close()
+
+    if not quiet:
+        report(final=True)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m filmwatch', description='Film Watch Database tools')
+    parser.add_argument('--db', default=flask_backend.DB_PATH, help='SQLite database file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('init', help='create the schema in an empty database')
+
+    load_cmd = commands.add_parser('load', help='bulk-load entries from a text, CSV or JSONL file')
+    load_cmd.add_argument('file')
+    load_cmd.add_argument('--format', choices=['text', 'csv', 'jsonl'])
+    load_cmd.add_argument('--chunk', type=int, default=BATCH_COMMIT_SIZE * 10, help='rows per commit')
+    load_cmd.add_argument('--offset', type=int, default=0, help='byte offset to start reading from')
+    load_cmd.add_argument('--resume', action='store_true', help='start from the offset saved by an interrupted run')
+    load_cmd.add_argument('--quiet', action='store_true')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'init':
+        init_db(args.db)
+    elif args.command == 'load':
+        offset = args.offset
+        if args.resume and os.path.exists(args.file + '.offset'):
+            with open(args.file + '.offset') as f:
+                offset = int(f.read().strip() or 0)
+            print(f"Resuming {args.file} from byte {offset:,}", file=sys.stderr)
+        load(args.db, args.file, args.format, offset, max(1, args.chunk), args.quiet)
+
+
+if __name__ == '__main__':
+    main()
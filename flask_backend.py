@@ -4,417 +4,3532 @@ Install required packages: pip install flask flask-cors
 Run: python flask_backend.py
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, has_request_context, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.datastructures import MultiDict
 import sqlite3
+import atexit
+import base64
+import bisect
+import datetime
+import json
+import queue
 import re
+import sys
+import functools
+import hashlib
+import heapq
+import itertools
+import os
+import threading
+import time
+import unicodedata
+import urllib.parse
+import uuid
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 
 app = Flask(__name__)
 CORS(app)
 
 DB_PATH = 'film_watches.db'
 
+# Seed list for the brand index; rows in the brands table are merged in on reload
+DEFAULT_BRANDS = [
+    'Audemars Piguet', 'Patek Philippe', 'Vacheron Constantin',
+    'Jaeger-LeCoultre', 'A. Lange & Söhne', 'Frederique Constant',
+    'Ulysse Nardin', 'Girard-Perregaux', 'Glashutte Original',
+    'Universal Genève', 'Richard Mille', 'Bell & Ross', 'Maurice Lacroix',
+    'Carl F. Bucherer', 'Raymond Weil', 'TAG Heuer',
+    'IWC Schaffhausen', 'Franck Muller',
+    'Rolex', 'Omega', 'Heuer', 'Hamilton', 'Panerai', 'Breitling',
+    'IWC', 'Cartier', 'Zenith', 'Breguet', 'Longines', 'Seiko',
+    'Citizen', 'Casio', 'Timex', 'Doxa', 'Hublot', 'Tudor',
+    'Bulgari', 'Chopard', 'Oris', 'Tissot', 'Rado', 'Mido',
+    'Certina', 'Swatch', 'Luminox', 'Fortis', 'Glycine', 'Stowa',
+    'Nomos', 'Junghans', 'Sinn', 'Hanhart', 'Laco', 'Damasko',
+    'Ball', 'Alpina', 'Movado', 'Ebel', 'Concord', 'Corum',
+    'Parmigiani', 'Piaget', 'Blancpain', 'Bremont', 'Christopher Ward',
+    'Squale', 'Steinhart', 'Halios', 'Monta', 'Farer', 'Lorier',
+    'G-Shock', 'Victorinox', 'Bulova', 'Gruen', 'Elgin', 'Waltham'
+]
+
+# Brand names the old parser created from "wears a/an ..." (see /api/cleanup-bad-brands)
+BAD_BRAND_NAMES = ('a', 'an', 'A', 'An')
+
+
+def fold_text(text):
+    """Case-fold text and strip accents so "Genève" and "geneve" compare equal.
+
+    Returns (folded, offsets) where offsets[i] is the index in text of the
+    character that produced folded[i], or None when the mapping is 1:1.
+    """
+    if text.isascii():
+        return text.lower(), None
+
+    folded = []
+    offsets = []
+    for i, ch in enumerate(text):
+        for part in unicodedata.normalize('NFKD', ch.casefold()):
+            if not unicodedata.combining(part):
+                folded.append(part)
+                offsets.append(i)
+    return ''.join(folded), offsets
+
+
+def _trie_pattern(words):
+    """Build a regex from a character trie so matching never rescans per word."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Optional groups are greedy, so the longest brand wins ("TAG Heuer" over "Heuer")
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class BrandIndex:
+    """Compiled, accent- and case-insensitive lookup of known watch brands."""
+
+    def __init__(self, brands):
+        self.names = {}
+        for name in brands:
+            self.names.setdefault(fold_text(name)[0], name)
+
+        pattern = _trie_pattern(self.names)
+        self._leading = re.compile(rf'({pattern})(?!\w)')
+        self._attributed = re.compile(rf' (?:by|from) ({pattern})(?!\w)')
+
+    def match(self, watch_full):
+        """Return (brand, model) for a watch description, or None if no brand is known."""
+        folded, offsets = fold_text(watch_full)
+
+        found = self._attributed.search(folded) or self._leading.match(folded)
+        if not found:
+            return None
+
+        start, end = found.span()
+        if offsets is not None:
+            start = offsets[start]
+            end = offsets[end] if end < len(offsets) else len(watch_full)
+        brand = self.names[found.group(1)]
+        model = (watch_full[:start] + watch_full[end:]).strip()
+        return brand, model
+
+
+BRAND_INDEX = BrandIndex(DEFAULT_BRANDS)
+
+
+def reload_brand_index(conn):
+    """Rebuild BRAND_INDEX from the seed list plus every brand stored in the database."""
+    global BRAND_INDEX
+    cursor = conn.cursor()
+    cursor.execute("SELECT brand_name FROM brands")
+    stored = [row[0] for row in cursor.fetchall()
+              if row[0] not in BAD_BRAND_NAMES and len(row[0]) > 1]
+    BRAND_INDEX = BrandIndex(DEFAULT_BRANDS + stored)
+    ENTRY_PARSER.cache_clear()
+    return len(BRAND_INDEX.names)
+
+
+# Entry grammar. Each form is guarded by a cheap necessary condition so a
+# sentence only reaches the regexes that could possibly match it.
+_IN_YEAR_CUE = re.compile(r'\sin\s+(?:the\s+)?\d{4}\s', re.IGNORECASE)
+
+ENTRY_FORMS = [
+    # "Sean Connery wears a Rolex Submariner in the 1962 film Dr. No"
+    (lambda text, lowered: _IN_YEAR_CUE.search(text),
+     re.compile(r'(?P<actor>.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(?P<watch>.+?)\s+(?:watch\s+)?'
+                r'in\s+(?:the\s+)?(?P<year>\d{4})\s+(?:\w+\s+)?(?P<title>.+?)$', re.IGNORECASE)),
+    # "Sean Connery wears a Rolex Submariner in Dr. No (1962)"
+    (lambda text, lowered: text.endswith(')'),
+     re.compile(r'(?P<actor>.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(?P<watch>.+?)\s+'
+                r'in\s+(?P<title>.+?)\s+\((?P<year>\d{4})\)$', re.IGNORECASE)),
+    # "In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner"
+    (lambda text, lowered: lowered.startswith('in '),
+     re.compile(r'In\s+(?P<title>.+?)\s+\((?P<year>\d{4})\),\s+(?P<actor>.+?)\s+(?:as|plays)\s+'
+                r'(?P<character>.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(?P<watch>.+?)$', re.IGNORECASE)),
+]
+
+# Longer entries are rejected before they reach the backtracking (.+?) groups
+MAX_ENTRY_LENGTH = 1000
+
+PARSE_CACHE_SIZE = 4096
+
+
+def normalize_entry(text):
+    """Collapse whitespace and drop trailing periods (keeping abbreviations like "Ref.")."""
+    return ' '.join(text.split()).rstrip('.')
+
+
+class EntryParser:
+    """Precompiled entry grammar behind an LRU cache keyed on the normalized text."""
+
+    def __init__(self, cache_size=PARSE_CACHE_SIZE):
+        self._parse_cached = functools.lru_cache(maxsize=cache_size)(self._parse)
+
+    def parse(self, text):
+        # Callers annotate the result (e.g. narrative), so never hand out the cached dict
+        return dict(self._parse_cached(normalize_entry(text)))
+
+    def cache_clear(self):
+        self._parse_cached.cache_clear()
+
+    def cache_info(self):
+        return self._parse_cached.cache_info()
+
+    def _parse(self, text):
+        if len(text) > MAX_ENTRY_LENGTH:
+            raise ValueError(f"Entry is longer than {MAX_ENTRY_LENGTH} characters")
+
+        lowered = text.lower()
+        if 'wear' not in lowered:
+            raise ValueError("Could not parse entry")
+
+        for cue, pattern in ENTRY_FORMS:
+            if not cue(text, lowered):
+                continue
+            match = pattern.match(text)
+            if match:
+                break
+        else:
+            raise ValueError("Could not parse entry")
+
+        fields = match.groupdict()
+        actor = fields['actor'].strip()
+        watch_full = fields['watch'].strip()
+        title = fields['title'].strip()
+        year = int(fields['year'])
+        character = (fields.get('character') or '').strip() or None
+    
+        brand = None
+        model = watch_full
+
+        # Resolve "... by Brand" / "... from Brand" first, then a leading brand name
+        matched = BRAND_INDEX.match(watch_full)
+        if matched:
+            brand, model = matched
+    
+        # Fallback: use first word as brand (but this might catch descriptors)
+        if not brand:
+            parts = watch_full.split(maxsplit=1)
+            if len(parts) == 2:
+                brand = parts[0]
+                model = parts[1]
+            else:
+                brand = watch_full
+                model = watch_full
+    
+        if not character:
+            character = f"{actor.split()[-1]}"
+    
+        return {
+            'actor': actor,
+            'character': character,
+            'brand': brand,
+            'model': model,
+            'title': title,
+            'year': year,
+            'verification': 'Confirmed',
+            'narrative': 'Watch worn in film.'
+        }
+
+
+ENTRY_PARSER = EntryParser()
+
+
 def parse_entry(text):
     """Parse natural language entry into structured data."""
+    with request_phase('parse'):
+        return ENTRY_PARSER.parse(text)
+
+
+# Applied to every connection the pool opens
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Schema changes on top of schema.sql, applied in order by migrate(). PRAGMA
+# user_version records how many have run, so only ever append to this list.
+MIGRATIONS = [
+    # 1: secondary indexes for the fact-table joins and the character lookups
+    """
+    CREATE INDEX IF NOT EXISTS idx_faw_actor ON film_actor_watch (actor_id, film_id, watch_id, character_id);
+    CREATE INDEX IF NOT EXISTS idx_faw_watch ON film_actor_watch (watch_id, film_id, actor_id, character_id);
+    CREATE INDEX IF NOT EXISTS idx_faw_character ON film_actor_watch (character_id);
+    CREATE INDEX IF NOT EXISTS idx_characters_name ON characters (character_name);
+    """,
+    # 2: trigram full-text index over each appearance, kept current by triggers.
+    # Trigram tables also serve LIKE '%term%' from the index (terms of 3+ chars).
+    """
+    CREATE VIRTUAL TABLE appearance_search USING fts5(
+        actor, character, brand, model, title, tokenize = 'trigram'
+    );
+
+    INSERT INTO appearance_search (rowid, actor, character, brand, model, title)
+    SELECT faw.faw_id, a.actor_name, c.character_name, b.brand_name, w.model_reference, f.title
+    FROM film_actor_watch faw
+    LEFT JOIN actors a ON faw.actor_id = a.actor_id
+    LEFT JOIN characters c ON faw.character_id = c.character_id
+    LEFT JOIN watches w ON faw.watch_id = w.watch_id
+    LEFT JOIN brands b ON w.brand_id = b.brand_id
+    LEFT JOIN films f ON faw.film_id = f.film_id;
+
+    CREATE TRIGGER trg_search_faw_insert AFTER INSERT ON film_actor_watch BEGIN
+        INSERT INTO appearance_search (rowid, actor, character, brand, model, title)
+        VALUES (NEW.faw_id,
+                (SELECT actor_name FROM actors WHERE actor_id = NEW.actor_id),
+                (SELECT character_name FROM characters WHERE character_id = NEW.character_id),
+                (SELECT b.brand_name FROM watches w JOIN brands b ON w.brand_id = b.brand_id
+                 WHERE w.watch_id = NEW.watch_id),
+                (SELECT model_reference FROM watches WHERE watch_id = NEW.watch_id),
+                (SELECT title FROM films WHERE film_id = NEW.film_id));
+    END;
+
+    CREATE TRIGGER trg_search_faw_delete AFTER DELETE ON film_actor_watch BEGIN
+        DELETE FROM appearance_search WHERE rowid = OLD.faw_id;
+    END;
+
+    CREATE TRIGGER trg_search_faw_update
+    AFTER UPDATE OF film_id, actor_id, character_id, watch_id ON film_actor_watch BEGIN
+        DELETE FROM appearance_search WHERE rowid = OLD.faw_id;
+        INSERT INTO appearance_search (rowid, actor, character, brand, model, title)
+        VALUES (NEW.faw_id,
+                (SELECT actor_name FROM actors WHERE actor_id = NEW.actor_id),
+                (SELECT character_name FROM characters WHERE character_id = NEW.character_id),
+                (SELECT b.brand_name FROM watches w JOIN brands b ON w.brand_id = b.brand_id
+                 WHERE w.watch_id = NEW.watch_id),
+                (SELECT model_reference FROM watches WHERE watch_id = NEW.watch_id),
+                (SELECT title FROM films WHERE film_id = NEW.film_id));
+    END;
+
+    CREATE TRIGGER trg_search_actor_rename AFTER UPDATE OF actor_name ON actors BEGIN
+        UPDATE appearance_search SET actor = NEW.actor_name
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE actor_id = NEW.actor_id);
+    END;
+
+    CREATE TRIGGER trg_search_character_rename AFTER UPDATE OF character_name ON characters BEGIN
+        UPDATE appearance_search SET character = NEW.character_name
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE character_id = NEW.character_id);
+    END;
+
+    CREATE TRIGGER trg_search_film_rename AFTER UPDATE OF title ON films BEGIN
+        UPDATE appearance_search SET title = NEW.title
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE film_id = NEW.film_id);
+    END;
+
+    CREATE TRIGGER trg_search_brand_rename AFTER UPDATE OF brand_name ON brands BEGIN
+        UPDATE appearance_search SET brand = NEW.brand_name
+        WHERE rowid IN (SELECT faw.faw_id FROM watches w
+                        JOIN film_actor_watch faw ON faw.watch_id = w.watch_id
+                        WHERE w.brand_id = NEW.brand_id);
+    END;
+
+    CREATE TRIGGER trg_search_watch_update AFTER UPDATE OF brand_id, model_reference ON watches BEGIN
+        UPDATE appearance_search
+        SET brand = (SELECT brand_name FROM brands WHERE brand_id = NEW.brand_id),
+            model = NEW.model_reference
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE watch_id = NEW.watch_id);
+    END;
+    """,
+    # 3: materialized counters for /api/stats, kept current by triggers
+    """
+    CREATE TABLE stats (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE brand_stats (
+        brand_id INTEGER PRIMARY KEY,
+        appearances INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX idx_brand_stats_appearances ON brand_stats (appearances);
+
+    INSERT INTO stats (name, value)
+    VALUES ('films', (SELECT COUNT(*) FROM films)),
+           ('actors', (SELECT COUNT(*) FROM actors)),
+           ('brands', (SELECT COUNT(*) FROM brands)),
+           ('entries', (SELECT COUNT(*) FROM film_actor_watch));
+
+    INSERT INTO brand_stats (brand_id, appearances)
+    SELECT w.brand_id, COUNT(*)
+    FROM film_actor_watch faw
+    JOIN watches w ON faw.watch_id = w.watch_id
+    GROUP BY w.brand_id;
+
+    CREATE TRIGGER trg_stats_film_insert AFTER INSERT ON films BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'films';
+    END;
+    CREATE TRIGGER trg_stats_film_delete AFTER DELETE ON films BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'films';
+    END;
+    CREATE TRIGGER trg_stats_actor_insert AFTER INSERT ON actors BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'actors';
+    END;
+    CREATE TRIGGER trg_stats_actor_delete AFTER DELETE ON actors BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'actors';
+    END;
+    CREATE TRIGGER trg_stats_brand_insert AFTER INSERT ON brands BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'brands';
+    END;
+    CREATE TRIGGER trg_stats_brand_delete AFTER DELETE ON brands BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'brands';
+        DELETE FROM brand_stats WHERE brand_id = OLD.brand_id;
+    END;
+
+    CREATE TRIGGER trg_stats_faw_insert AFTER INSERT ON film_actor_watch BEGIN
+        UPDATE stats SET value = value + 1 WHERE name = 'entries';
+        INSERT INTO brand_stats (brand_id, appearances)
+        SELECT brand_id, 1 FROM watches WHERE watch_id = NEW.watch_id
+        ON CONFLICT (brand_id) DO UPDATE SET appearances = appearances + 1;
+    END;
+    CREATE TRIGGER trg_stats_faw_delete AFTER DELETE ON film_actor_watch BEGIN
+        UPDATE stats SET value = value - 1 WHERE name = 'entries';
+        UPDATE brand_stats SET appearances = appearances - 1
+        WHERE brand_id = (SELECT brand_id FROM watches WHERE watch_id = OLD.watch_id);
+    END;
+    CREATE TRIGGER trg_stats_faw_rewatch AFTER UPDATE OF watch_id ON film_actor_watch BEGIN
+        UPDATE brand_stats SET appearances = appearances - 1
+        WHERE brand_id = (SELECT brand_id FROM watches WHERE watch_id = OLD.watch_id);
+        INSERT INTO brand_stats (brand_id, appearances)
+        SELECT brand_id, 1 FROM watches WHERE watch_id = NEW.watch_id
+        ON CONFLICT (brand_id) DO UPDATE SET appearances = appearances + 1;
+    END;
+    CREATE TRIGGER trg_stats_watch_rebrand AFTER UPDATE OF brand_id ON watches
+    WHEN OLD.brand_id IS NOT NEW.brand_id BEGIN
+        UPDATE brand_stats
+        SET appearances = appearances - (SELECT COUNT(*) FROM film_actor_watch WHERE watch_id = NEW.watch_id)
+        WHERE brand_id = OLD.brand_id;
+        INSERT INTO brand_stats (brand_id, appearances)
+        SELECT NEW.brand_id, COUNT(*) FROM film_actor_watch WHERE watch_id = NEW.watch_id
+        ON CONFLICT (brand_id) DO UPDATE SET appearances = appearances + excluded.appearances;
+    END;
+    """,
+    # 4: merging ids that carry the same text leaves the search row unchanged
+    """
+    DROP TRIGGER trg_search_faw_update;
+    CREATE TRIGGER trg_search_faw_update
+        AFTER UPDATE OF film_id, actor_id, character_id, watch_id ON film_actor_watch
+        WHEN OLD.watch_id IS NOT NEW.watch_id
+          OR (OLD.film_id IS NOT NEW.film_id
+              AND (SELECT title FROM films WHERE film_id = OLD.film_id)
+                  IS NOT (SELECT title FROM films WHERE film_id = NEW.film_id))
+          OR (OLD.actor_id IS NOT NEW.actor_id
+              AND (SELECT actor_name FROM actors WHERE actor_id = OLD.actor_id)
+                  IS NOT (SELECT actor_name FROM actors WHERE actor_id = NEW.actor_id))
+          OR (OLD.character_id IS NOT NEW.character_id
+              AND (SELECT character_name FROM characters WHERE character_id = OLD.character_id)
+                  IS NOT (SELECT character_name FROM characters WHERE character_id = NEW.character_id))
+    BEGIN
+        DELETE FROM appearance_search WHERE rowid = OLD.faw_id;
+        INSERT INTO appearance_search (rowid, actor, character, brand, model, title)
+        VALUES (NEW.faw_id,
+                (SELECT actor_name FROM actors WHERE actor_id = NEW.actor_id),
+                (SELECT character_name FROM characters WHERE character_id = NEW.character_id),
+                (SELECT b.brand_name FROM watches w JOIN brands b ON w.brand_id = b.brand_id
+                 WHERE w.watch_id = NEW.watch_id),
+                (SELECT model_reference FROM watches WHERE watch_id = NEW.watch_id),
+                (SELECT title FROM films WHERE film_id = NEW.film_id));
+    END;
+    """,
+    # 5: keys for upserts. An appearance is unique on film, actor and watch
+    # (the oldest of any repeats is kept; the unique index takes over from
+    # idx_faw_actor), and a character belongs to one film and actor: each
+    # existing character stays with its oldest appearance and every other
+    # film and actor using it gets a copy. ON CONFLICT DO UPDATE rewrites
+    # the existing row, so the rename triggers now skip updates that leave
+    # the name unchanged.
+    """
+    DELETE FROM film_actor_watch WHERE faw_id IN (
+        SELECT faw_id FROM (
+            SELECT faw_id, ROW_NUMBER() OVER (PARTITION BY film_id, actor_id, watch_id ORDER BY faw_id) AS rank
+            FROM film_actor_watch
+        )
+        WHERE rank > 1
+    );
+    DROP INDEX idx_faw_actor;
+    CREATE UNIQUE INDEX idx_faw_appearance ON film_actor_watch (actor_id, film_id, watch_id);
+
+    ALTER TABLE characters ADD COLUMN film_id INTEGER REFERENCES films(film_id);
+    ALTER TABLE characters ADD COLUMN actor_id INTEGER REFERENCES actors(actor_id);
+    UPDATE characters SET (film_id, actor_id) = (
+        SELECT film_id, actor_id FROM film_actor_watch
+        WHERE character_id = characters.character_id
+        ORDER BY faw_id LIMIT 1
+    );
+    DELETE FROM characters WHERE film_id IS NULL;
+    CREATE INDEX idx_characters_scope ON characters (film_id, actor_id, character_name);
+
+    INSERT INTO characters (character_name, film_id, actor_id)
+    SELECT DISTINCT c.character_name, faw.film_id, faw.actor_id
+    FROM film_actor_watch faw
+    JOIN characters c ON faw.character_id = c.character_id
+    WHERE NOT EXISTS (SELECT 1 FROM characters s
+                      WHERE s.film_id = faw.film_id AND s.actor_id = faw.actor_id
+                      AND s.character_name = c.character_name);
+
+    UPDATE film_actor_watch SET character_id = m.new_id
+    FROM (
+        SELECT faw.faw_id, MIN(s.character_id) AS new_id
+        FROM film_actor_watch faw
+        JOIN characters c ON faw.character_id = c.character_id
+        JOIN characters s ON s.film_id = faw.film_id AND s.actor_id = faw.actor_id
+                         AND s.character_name = c.character_name
+        GROUP BY faw.faw_id
+    ) m
+    WHERE film_actor_watch.faw_id = m.faw_id AND film_actor_watch.character_id != m.new_id;
+
+    DELETE FROM characters
+    WHERE NOT EXISTS (SELECT 1 FROM film_actor_watch faw WHERE faw.character_id = characters.character_id);
+    DROP INDEX idx_characters_scope;
+    DROP INDEX idx_characters_name;
+    CREATE UNIQUE INDEX idx_characters_scope ON characters (film_id, actor_id, character_name);
+
+    DROP TRIGGER trg_search_actor_rename;
+    CREATE TRIGGER trg_search_actor_rename AFTER UPDATE OF actor_name ON actors
+    WHEN OLD.actor_name IS NOT NEW.actor_name BEGIN
+        UPDATE appearance_search SET actor = NEW.actor_name
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE actor_id = NEW.actor_id);
+    END;
+
+    DROP TRIGGER trg_search_character_rename;
+    CREATE TRIGGER trg_search_character_rename AFTER UPDATE OF character_name ON characters
+    WHEN OLD.character_name IS NOT NEW.character_name BEGIN
+        UPDATE appearance_search SET character = NEW.character_name
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE character_id = NEW.character_id);
+    END;
+
+    DROP TRIGGER trg_search_film_rename;
+    CREATE TRIGGER trg_search_film_rename AFTER UPDATE OF title ON films
+    WHEN OLD.title IS NOT NEW.title BEGIN
+        UPDATE appearance_search SET title = NEW.title
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE film_id = NEW.film_id);
+    END;
+
+    DROP TRIGGER trg_search_brand_rename;
+    CREATE TRIGGER trg_search_brand_rename AFTER UPDATE OF brand_name ON brands
+    WHEN OLD.brand_name IS NOT NEW.brand_name BEGIN
+        UPDATE appearance_search SET brand = NEW.brand_name
+        WHERE rowid IN (SELECT faw.faw_id FROM watches w
+                        JOIN film_actor_watch faw ON faw.watch_id = w.watch_id
+                        WHERE w.brand_id = NEW.brand_id);
+    END;
+
+    DROP TRIGGER trg_search_watch_update;
+    CREATE TRIGGER trg_search_watch_update AFTER UPDATE OF brand_id, model_reference ON watches
+    WHEN OLD.brand_id IS NOT NEW.brand_id OR OLD.model_reference IS NOT NEW.model_reference BEGIN
+        UPDATE appearance_search
+        SET brand = (SELECT brand_name FROM brands WHERE brand_id = NEW.brand_id),
+            model = NEW.model_reference
+        WHERE rowid IN (SELECT faw_id FROM film_actor_watch WHERE watch_id = NEW.watch_id);
+    END;
+    """,
+    # 6: where each appearance was seen and how sure we are (structured adds).
+    # Missing source fields are stored as '' so the UNIQUE key matches them.
+    """
+    CREATE TABLE sources (
+        source_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_type TEXT NOT NULL DEFAULT '',
+        title TEXT NOT NULL DEFAULT '',
+        publisher TEXT NOT NULL DEFAULT '',
+        url TEXT NOT NULL DEFAULT '',
+        date_published TEXT NOT NULL DEFAULT '',
+        UNIQUE (url, title, publisher, source_type, date_published)
+    );
+    ALTER TABLE film_actor_watch ADD COLUMN source_id INTEGER REFERENCES sources(source_id);
+    ALTER TABLE film_actor_watch ADD COLUMN confidence TEXT;
+    """,
+    # 7: append-only change log behind /api/changes, fed by triggers so every
+    # writer (the API, `python -m filmwatch load`, the cleanups) is recorded.
+    # Updates that leave a row as it was (the no-op upserts) are not logged.
+    # Existing rows are seeded dimensions first, so since=0 is a full sync.
+    # changes_state holds the compaction floor and how far compaction has
+    # got (see compact_changes). There is deliberately no index on the row:
+    # inserts into several tables would each dirty a different index page.
+    """
+    CREATE TABLE changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    );
+    CREATE TABLE changes_state (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_changes_tombstones ON changes (changed_at) WHERE op = 'delete';
+
+    INSERT INTO changes (table_name, row_id, op) SELECT 'films', film_id, 'insert' FROM films ORDER BY film_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'actors', actor_id, 'insert' FROM actors ORDER BY actor_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'characters', character_id, 'insert' FROM characters ORDER BY character_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'brands', brand_id, 'insert' FROM brands ORDER BY brand_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'watches', watch_id, 'insert' FROM watches ORDER BY watch_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'sources', source_id, 'insert' FROM sources ORDER BY source_id;
+    INSERT INTO changes (table_name, row_id, op) SELECT 'film_actor_watch', faw_id, 'insert' FROM film_actor_watch ORDER BY faw_id;
+    INSERT INTO changes_state (name, value)
+    VALUES ('floor', 0), ('compacted', (SELECT COALESCE(MAX(seq), 0) FROM changes));
+
+    CREATE TRIGGER trg_changes_film_insert AFTER INSERT ON films BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('films', NEW.film_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_film_update AFTER UPDATE ON films
+    WHEN OLD.title IS NOT NEW.title
+      OR OLD.year IS NOT NEW.year BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('films', NEW.film_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_film_delete AFTER DELETE ON films BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('films', OLD.film_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_actor_insert AFTER INSERT ON actors BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('actors', NEW.actor_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_actor_update AFTER UPDATE ON actors
+    WHEN OLD.actor_name IS NOT NEW.actor_name BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('actors', NEW.actor_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_actor_delete AFTER DELETE ON actors BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('actors', OLD.actor_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_character_insert AFTER INSERT ON characters BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('characters', NEW.character_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_character_update AFTER UPDATE ON characters
+    WHEN OLD.character_name IS NOT NEW.character_name
+      OR OLD.film_id IS NOT NEW.film_id
+      OR OLD.actor_id IS NOT NEW.actor_id BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('characters', NEW.character_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_character_delete AFTER DELETE ON characters BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('characters', OLD.character_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_brand_insert AFTER INSERT ON brands BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('brands', NEW.brand_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_brand_update AFTER UPDATE ON brands
+    WHEN OLD.brand_name IS NOT NEW.brand_name BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('brands', NEW.brand_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_brand_delete AFTER DELETE ON brands BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('brands', OLD.brand_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_watch_insert AFTER INSERT ON watches BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('watches', NEW.watch_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_watch_update AFTER UPDATE ON watches
+    WHEN OLD.brand_id IS NOT NEW.brand_id
+      OR OLD.model_reference IS NOT NEW.model_reference
+      OR OLD.verification_level IS NOT NEW.verification_level BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('watches', NEW.watch_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_watch_delete AFTER DELETE ON watches BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('watches', OLD.watch_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_source_insert AFTER INSERT ON sources BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('sources', NEW.source_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_source_update AFTER UPDATE ON sources
+    WHEN OLD.source_type IS NOT NEW.source_type
+      OR OLD.title IS NOT NEW.title
+      OR OLD.publisher IS NOT NEW.publisher
+      OR OLD.url IS NOT NEW.url
+      OR OLD.date_published IS NOT NEW.date_published BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('sources', NEW.source_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_source_delete AFTER DELETE ON sources BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('sources', OLD.source_id, 'delete');
+    END;
+    CREATE TRIGGER trg_changes_faw_insert AFTER INSERT ON film_actor_watch BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('film_actor_watch', NEW.faw_id, 'insert');
+    END;
+    CREATE TRIGGER trg_changes_faw_update AFTER UPDATE ON film_actor_watch
+    WHEN OLD.film_id IS NOT NEW.film_id
+      OR OLD.actor_id IS NOT NEW.actor_id
+      OR OLD.character_id IS NOT NEW.character_id
+      OR OLD.watch_id IS NOT NEW.watch_id
+      OR OLD.narrative_role IS NOT NEW.narrative_role
+      OR OLD.source_id IS NOT NEW.source_id
+      OR OLD.confidence IS NOT NEW.confidence BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('film_actor_watch', NEW.faw_id, 'update');
+    END;
+    CREATE TRIGGER trg_changes_faw_delete AFTER DELETE ON film_actor_watch BEGIN
+        INSERT INTO changes (table_name, row_id, op) VALUES ('film_actor_watch', OLD.faw_id, 'delete');
+    END;
+    """,
+]
+
+_migrated_paths = set()
+_migrate_lock = threading.Lock()
+
+
+def _sql_statements(script):
+    """Split a SQL script into statements (trigger bodies stay whole)."""
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            if statement.strip():
+                yield statement.strip()
+            statement = ''
+
+
+def migrate(conn):
+    """Apply pending MIGRATIONS and return the schema version, or None if the
+    database has no tables yet (see `python -m filmwatch init`)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'film_actor_watch'")
+    if not cursor.fetchone():
+        return None
+
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    while version < len(MIGRATIONS):
+        # IMMEDIATE takes the write lock first, so concurrent processes migrate one at a time
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("PRAGMA user_version")
+            version = cursor.fetchone()[0]
+            if version < len(MIGRATIONS):
+                for statement in _sql_statements(MIGRATIONS[version]):
+                    cursor.execute(statement)
+                version += 1
+                cursor.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+
+POOL_MAX_IDLE = 16
+STATEMENT_CACHE_SIZE = 256
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection that remembers which database file it was opened on.
+
+    While a RequestTrace is attached, its statements are timed through the
+    trace and progress callbacks and its cursors count the rows fetched.
+    """
+    db_path = None
+    trace = None
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or (TracedCursor if self.trace is not None else sqlite3.Cursor))
+
+    def attach_trace(self, trace):
+        self.trace = trace
+        self.set_trace_callback(trace.statement)
+        self.set_progress_handler(trace.progress, SQL_PROGRESS_STEPS)
+
+    def detach_trace(self):
+        if self.trace is not None:
+            self.trace.end_statement()
+            self.trace = None
+            self.set_trace_callback(None)
+            self.set_progress_handler(None, 0)
+
+
+def connect(db_path=None):
+    """Open a tuned connection to db_path (default DB_PATH)."""
+    db_path = db_path or DB_PATH
+    conn = sqlite3.connect(db_path, timeout=5, factory=PooledConnection,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.db_path = db_path
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+
+    if db_path not in _migrated_paths:
+        with _migrate_lock:
+            if db_path not in _migrated_paths and migrate(conn) is not None:
+                _migrated_paths.add(db_path)
+    return conn
+
+
+class ConnectionPool:
+    """Keeps idle connections open between requests so pragmas and prepared
+    statements survive; a connection is only ever used by one thread at a time.
+
+    Connections are opened on `database`, by default DB_PATH; idle ones opened
+    on a database other than the one asked for are closed instead of reused.
+    """
+
+    def __init__(self, max_idle=POOL_MAX_IDLE, opener=connect):
+        self.max_idle = max_idle
+        self._opener = opener
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def acquire(self, database=None):
+        database = database or DB_PATH
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if conn.db_path == database:
+                    return conn
+                conn.close()
+        return self._opener(database)
+
+    def release(self, conn, database=None):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if conn.db_path == (database or DB_PATH) and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+POOL = ConnectionPool()
+
+
+class DataVersion:
+    """PRAGMA data_version of each database file, read on a private connection.
+
+    SQLite changes the value whenever any other connection, in this process
+    or another, commits to the file, so two readings differ exactly when
+    something was written in between. Readings of different files are not
+    comparable.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conns = {}
+
+    def get(self, db_path=None):
+        db_path = db_path or DB_PATH
+        with self._lock:
+            conn = self._conns.get(db_path)
+            if conn is None:
+                conn = self._conns[db_path] = sqlite3.connect(db_path, check_same_thread=False)
+            return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+DATA_VERSION = DataVersion()
+
+
+METRICS_ENABLED = True
+
+# Endpoint (view function) names left uninstrumented; add or remove names at
+# runtime to switch tracing off or on for single routes
+METRICS_EXCLUDED_ROUTES = {'static'}
+
+# Statements slower than this are logged with their bound parameters
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG_SIZE = 200
+
+# SQLite VM instructions between progress callbacks (the work counter's resolution)
+SQL_PROGRESS_STEPS = 1000
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _statement_kind(sql):
+    words = sql[:40].split(None, 1)
+    return words[0].upper() if words else 'OTHER'
+
+
+class RequestTrace:
+    """Timings and counters for one instrumented request.
+
+    A statement's time runs from its trace callback until its first fetch,
+    the end of a statement without rows, or the start of the next one.
+    """
+
+    __slots__ = ('route', 'started', 'status', 'phases', 'statements', 'slow',
+                 'rows', 'bytes', 'vm_steps', '_sql', '_sql_started')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.status = 500
+        self.phases = {}
+        self.statements = []
+        self.slow = []
+        self.rows = 0
+        self.bytes = 0
+        self.vm_steps = 0
+        self._sql = None
+        self._sql_started = 0.0
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def statement(self, sql):
+        """sqlite3 trace callback: sql (with its parameters bound) is starting."""
+        if sql.startswith('--'):
+            return  # a trigger or FTS5 sub-statement, running inside the current one
+        now = time.perf_counter()
+        if self._sql is not None:
+            self._finish(now)
+        self._sql = sql
+        self._sql_started = now
+
+    def end_statement(self):
+        if self._sql is not None:
+            self._finish(time.perf_counter())
+
+    def _finish(self, now):
+        seconds = now - self._sql_started
+        sql, self._sql = self._sql, None
+        self.statements.append((_statement_kind(sql), seconds))
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            self.slow.append((sql, seconds))
+
+    def progress(self):
+        """sqlite3 progress handler; returning 0 lets the statement continue."""
+        self.vm_steps += SQL_PROGRESS_STEPS
+        return 0
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports fetched rows and statement ends to the connection's trace."""
+
+    def execute(self, sql, parameters=()):
+        super().execute(sql, parameters)
+        if self.description is None:
+            self._ended(0)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        super().executemany(sql, seq_of_parameters)
+        self._ended(0)
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        self._ended(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._ended(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._ended(len(rows))
+        return rows
+
+    def _ended(self, rows):
+        trace = self.connection.trace
+        if trace is not None:
+            trace.end_statement()
+            trace.rows += rows
+
+
+def current_trace():
+    """The RequestTrace of the request being handled, or None."""
+    return g.get('trace') if has_request_context() else None
+
+
+@contextmanager
+def request_phase(name):
+    """Add the time spent in the block to the current request's trace, if it has one."""
+    trace = current_trace()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.add_phase(name, time.perf_counter() - started)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with serialization timed as a request phase."""
+
+    def dumps(self, obj, **kwargs):
+        with request_phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+app.json = TimedJSONProvider(app)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_label(value)}"' for name, value in zip(names, values))
+
+
+class Metrics:
+    """Process-wide request and SQL metrics, rendered in Prometheus text format.
+
+    Requests add their RequestTrace once, when they finish, so the lock is
+    taken once per request rather than once per statement.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, slow_log_size=SLOW_QUERY_LOG_SIZE):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._slow_log = deque(maxlen=slow_log_size)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}    # (route, method, status) -> count
+            self._latency = {}     # (route, method) -> histogram
+            self._statements = {}  # (route, statement kind) -> histogram
+            self._phases = {}      # (route, phase) -> seconds
+            self._rows = {}
+            self._bytes = {}
+            self._vm_steps = {}
+            self._slow = {}
+            self._slow_log.clear()
+
+    def _observe(self, histograms, key, seconds):
+        """Histograms are bucket counts (the last one +Inf) followed by the sum."""
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def observe(self, method, trace):
+        total = time.perf_counter() - trace.started
+        route = trace.route
+        phases = dict(trace.phases)
+        phases['sql'] = sum(seconds for _, seconds in trace.statements)
+        phases['other'] = max(0.0, total - sum(phases.values()))
+
+        with self._lock:
+            key = (route, method, trace.status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._observe(self._latency, (route, method), total)
+            for kind, seconds in trace.statements:
+                self._observe(self._statements, (route, kind), seconds)
+            for phase, seconds in phases.items():
+                self._phases[(route, phase)] = self._phases.get((route, phase), 0.0) + seconds
+            self._rows[route] = self._rows.get(route, 0) + trace.rows
+            self._bytes[route] = self._bytes.get(route, 0) + trace.bytes
+            self._vm_steps[route] = self._vm_steps.get(route, 0) + trace.vm_steps
+            if trace.slow:
+                self._slow[route] = self._slow.get(route, 0) + len(trace.slow)
+                for sql, seconds in trace.slow:
+                    self._slow_log.append({'route': route, 'method': method, 'ms': round(seconds * 1000, 3),
+                                           'sql': sql, 'at': time.strftime('%Y-%m-%dT%H:%M:%S%z')})
+
+        for sql, seconds in trace.slow:
+            app.logger.warning("Slow query (%.1f ms) in %s %s: %s", seconds * 1000, method, route, sql)
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow_log)
+
+    def render(self):
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {key: list(h) for key, h in self._latency.items()}
+            statements = {key: list(h) for key, h in self._statements.items()}
+            phases = dict(self._phases)
+            counters = [
+                ('filmwatch_sql_rows_returned_total', 'Rows fetched from SQLite.', dict(self._rows)),
+                ('filmwatch_response_bytes_total', 'Response body bytes serialized.', dict(self._bytes)),
+                ('filmwatch_sql_vm_steps_total', 'SQLite VM instructions executed, '
+                 f'in steps of {SQL_PROGRESS_STEPS}.', dict(self._vm_steps)),
+                ('filmwatch_slow_queries_total', f'Statements slower than {SLOW_QUERY_MS} ms.', dict(self._slow)),
+            ]
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, names, histograms):
+            for key, counts in sorted(histograms.items()):
+                labels = _labels(names, key)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {counts[-1]!r}')
+                lines.append(f'{name}_count{{{labels}}} {cumulative}')
+
+        family('filmwatch_http_requests_total', 'counter', 'Requests handled, by route, method and status.')
+        for key, count in sorted(requests.items()):
+            lines.append(f'filmwatch_http_requests_total{{{_labels(("route", "method", "status"), key)}}} {count}')
+
+        family('filmwatch_http_request_duration_seconds', 'histogram', 'Request latency, by route and method.')
+        histogram('filmwatch_http_request_duration_seconds', ('route', 'method'), latency)
+
+        family('filmwatch_request_phase_seconds_total', 'counter',
+               'Time spent connecting, parsing, running SQL, serializing and elsewhere.')
+        for key, seconds in sorted(phases.items()):
+            lines.append(f'filmwatch_request_phase_seconds_total{{{_labels(("route", "phase"), key)}}} {seconds!r}')
+
+        family('filmwatch_sql_statement_duration_seconds', 'histogram', 'SQLite statement time, by route and statement.')
+        histogram('filmwatch_sql_statement_duration_seconds', ('route', 'statement'), statements)
+
+        for name, help_text, values in counters:
+            family(name, 'counter', help_text)
+            for route, value in sorted(values.items()):
+                lines.append(f'{name}{{route="{_label(route)}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics()
+
+
+@app.before_request
+def start_trace():
+    if METRICS_ENABLED and request.endpoint is not None and request.endpoint not in METRICS_EXCLUDED_ROUTES:
+        g.trace = RequestTrace(request.url_rule.rule)
+
+
+@app.after_request
+def note_response(response):
+    trace = g.get('trace')
+    if trace is not None:
+        trace.status = response.status_code
+        if not response.is_streamed:
+            trace.bytes += response.content_length or 0
+    return response
+
+
+@app.teardown_request
+def finish_trace(exc):
+    trace = g.pop('trace', None)
+    if trace is not None:
+        if exc is not None:
+            trace.status = 500
+        trace.end_statement()
+        METRICS.observe(request.method, trace)
+
+
+def get_db():
+    """Return the connection for the current request, checking one out on first use.
+
+    Requests marked by snapshot_read get a read-only connection on the snapshot.
+    """
+    if 'db' not in g:
+        with request_phase('connect'):
+            snapshot = g.get('snapshot')
+            g.db = SNAPSHOT_POOL.acquire(snapshot) if snapshot else POOL.acquire()
+        trace = g.get('trace')
+        if trace is not None:
+            g.db.attach_trace(trace)
+    return g.db
+
+
+@app.teardown_appcontext
+def release_db(exc):
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.detach_trace()
+        snapshot = g.pop('snapshot', None)
+        if snapshot:
+            SNAPSHOT_POOL.release(conn, snapshot_version() or snapshot)
+        else:
+            POOL.release(conn)
+
+
+# Read snapshot mode: with SNAPSHOT_PATH set, the read endpoints query an
+# immutable copy of DB_PATH kept there instead of the live file, so they never
+# wait on ingest and several processes can serve them from the same copy
+SNAPSHOT_PATH = None
+
+# Seconds between refreshes in the process that writes the snapshot; 0 leaves
+# this process following a snapshot that another process refreshes
+SNAPSHOT_REFRESH_SECONDS = 30
+
+# Settings that still apply to a read-only, immutable connection
+SNAPSHOT_PRAGMAS = (
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def snapshot_version(path=None):
+    """Identify the snapshot file now at path as (path, inode, mtime_ns), or None if there is none.
+
+    A refresh swaps in a new file whose mtime is when its copy began, so the
+    version changes with every refresh and doubles as the snapshot's age.
+    """
+    path = path or SNAPSHOT_PATH
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (path, st.st_ino, st.st_mtime_ns)
+
+
+def open_snapshot(version):
+    """Open a read-only connection on the snapshot file identified by version."""
+    uri = f"file:{urllib.parse.quote(version[0])}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, factory=PooledConnection,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.db_path = version
+    for pragma in SNAPSHOT_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+SNAPSHOT_POOL = ConnectionPool(opener=open_snapshot)
+
+
+def refresh_snapshot(path=None):
+    """Copy DB_PATH to the snapshot path with the online backup API and swap it in.
+
+    The copy is written beside the snapshot and renamed over it, so readers
+    see either the old file or the new one; connections still open on the old
+    file keep reading it until they are returned to SNAPSHOT_POOL.
+    """
+    path = path or SNAPSHOT_PATH
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    taken_at = time.time_ns()
+    source = POOL.acquire()
+    try:
+        target = sqlite3.connect(tmp)
+        try:
+            source.backup(target)
+            # The copy inherits WAL mode from the header; immutable readers want a plain file
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+    finally:
+        POOL.release(source)
+
+    os.utime(tmp, ns=(taken_at, taken_at))
+    os.replace(tmp, path)
+    return snapshot_version(path)
+
+
+def start_snapshot_refresher(interval=SNAPSHOT_REFRESH_SECONDS, stop=None):
+    """Refresh the snapshot every `interval` seconds on a daemon thread, skipping
+    refreshes when nothing has been committed since the last one. The thread
+    exits once the `stop` event is set."""
+    stop = stop or threading.Event()
+
+    def run():
+        watcher = connect()
+        last_change = None
+        while not stop.is_set():
+            # data_version moves whenever another connection commits
+            change = watcher.execute("PRAGMA data_version").fetchone()[0]
+            if change != last_change or snapshot_version() is None:
+                try:
+                    refresh_snapshot()
+                    last_change = change
+                except (sqlite3.Error, OSError) as e:
+                    app.logger.error("Snapshot refresh failed: %s", e)
+            stop.wait(interval)
+        watcher.close()
+
+    thread = threading.Thread(target=run, name='snapshot-refresher', daemon=True)
+    thread.start()
+    return thread
+
+
+def snapshot_read(view):
+    """Serve a read endpoint from the snapshot when SNAPSHOT_PATH is set.
+
+    Responses carry X-Snapshot-Taken and X-Snapshot-Age (seconds) so clients
+    can see how stale they are. Until a snapshot exists, the live database is read.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        version = snapshot_version() if SNAPSHOT_PATH else None
+        if version is None:
+            return view(*args, **kwargs)
+
+        g.snapshot = version
+        response = app.make_response(view(*args, **kwargs))
+        taken_at = version[2] / 1e9
+        response.headers['X-Snapshot-Taken'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(taken_at))
+        response.headers['X-Snapshot-Age'] = f'{max(0.0, time.time() - taken_at):.1f}'
+        return response
+
+    return wrapper
+
+
+ID_CACHE_SIZE = 10000
+
+
+class IdCache:
+    """Bounded, thread-safe name -> id maps for the dimension tables, kept per
+    database file (conn.db_path).
+
+    Keys: films (title, year), brands (brand_name,), watches (brand_id,
+    model_reference), actors (actor_name,), characters (film_id,
+    actor_id, character_name) and sources (the SOURCE_FIELDS values).
+    Only ids from committed transactions may be stored. Writers open their
+    transaction with begin(), which drops the file's ids when another
+    connection, in this process or another, has committed since; anything
+    here that merges or deletes dimension rows must still invalidate the
+    affected tables, as its own connection sees no change.
+    """
+
+    TABLES = ('films', 'brands', 'watches', 'actors', 'characters', 'sources')
+
+    def __init__(self, max_size=ID_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._maps = {}
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.resets = 0
+
+    def _tables(self, db_path):
+        maps = self._maps.get(db_path)
+        if maps is None:
+            maps = self._maps[db_path] = {table: OrderedDict() for table in self.TABLES}
+        return maps
+
+    def begin(self, conn):
+        """Open conn's write transaction and return the epoch to pass to put_many().
+
+        PRAGMA data_version on conn ignores conn's own commits, so a change
+        since conn last wrote means another connection committed; as conn
+        now holds the write lock, none can commit before conn does.
+        """
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        seen, conn.id_cache_version = getattr(conn, 'id_cache_version', None), version
+        with self._lock:
+            if version != seen and self._maps.pop(conn.db_path, None) is not None:
+                self.epoch += 1
+                self.resets += 1
+            return self.epoch
+
+    def get(self, db_path, table, key):
+        with self._lock:
+            ids = self._tables(db_path)[table]
+            row_id = ids.get(key)
+            if row_id is None:
+                self.misses += 1
+            else:
+                ids.move_to_end(key)
+                self.hits += 1
+            return row_id
+
+    def put_many(self, db_path, epoch, entries):
+        """Store (table, key, id) triples learned since begin() returned epoch,
+        evicting the least recently used keys; dropped if the cache was reset meanwhile."""
+        with self._lock:
+            if epoch != self.epoch:
+                return
+            maps = self._tables(db_path)
+            for table, key, row_id in entries:
+                ids = maps[table]
+                ids[key] = row_id
+                ids.move_to_end(key)
+                if len(ids) > self.max_size:
+                    ids.popitem(last=False)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            self.epoch += 1
+            for maps in self._maps.values():
+                for table in tables or self.TABLES:
+                    maps[table].clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'resets': self.resets,
+                'databases': len(self._maps),
+                'sizes': {table: sum(len(maps[table]) for maps in self._maps.values()) for table in self.TABLES},
+                'max_size': self.max_size
+            }
+
+
+ID_CACHE = IdCache()
+
+
+# One statement per dimension: insert the row, or touch the existing one so
+# RETURNING yields its id either way (the rename triggers skip no-op updates)
+UPSERT_SQL = {
+    'films': """INSERT INTO films (title, year) VALUES %s
+                ON CONFLICT (title, year) DO UPDATE SET title = excluded.title
+                RETURNING title, year, film_id""",
+    'brands': """INSERT INTO brands (brand_name) VALUES %s
+                 ON CONFLICT (brand_name) DO UPDATE SET brand_name = excluded.brand_name
+                 RETURNING brand_name, brand_id""",
+    'watches': """INSERT INTO watches (brand_id, model_reference, verification_level) VALUES %s
+                  ON CONFLICT (brand_id, model_reference) DO UPDATE SET verification_level = verification_level
+                  RETURNING brand_id, model_reference, watch_id""",
+    'actors': """INSERT INTO actors (actor_name) VALUES %s
+                 ON CONFLICT (actor_name) DO UPDATE SET actor_name = excluded.actor_name
+                 RETURNING actor_name, actor_id""",
+    'characters': """INSERT INTO characters (film_id, actor_id, character_name) VALUES %s
+                     ON CONFLICT (film_id, actor_id, character_name) DO UPDATE SET character_name = excluded.character_name
+                     RETURNING film_id, actor_id, character_name, character_id""",
+    'sources': """INSERT INTO sources (source_type, title, publisher, url, date_published) VALUES %s
+                  ON CONFLICT (url, title, publisher, source_type, date_published) DO UPDATE SET url = excluded.url
+                  RETURNING source_type, title, publisher, url, date_published, source_id""",
+}
+
+# Fields of a structured entry's "source" object, in sources-table order
+SOURCE_FIELDS = ('source_type', 'title', 'publisher', 'url', 'date_published')
+
+
+def source_values(source):
+    """The sources row for a "source" object: missing fields become ''."""
+    return tuple(source.get(name) or '' for name in SOURCE_FIELDS)
+
+
+def upsert_id(cursor, table, values):
+    """Insert one dimension row (or find the existing one) and return its id."""
+    cursor.execute(UPSERT_SQL[table] % ('(' + ', '.join('?' * len(values)) + ')'), values)
+    return cursor.fetchone()[-1]
+
+
+def after_insert_commit(conn):
+    """Fold just-committed appearances into the in-memory indexes and retire cached responses.
+
+    The rows are already stored, so a failing index is logged and dropped
+    (it rebuilds on next use) instead of failing the write.
+    """
+    try:
+        READ_MODEL.catch_up(conn)
+        SUGGEST_INDEX.catch_up(conn)
+    except Exception:
+        app.logger.exception("Catching up the in-memory indexes failed; rebuilding them")
+        READ_MODEL.invalidate()
+        SUGGEST_INDEX.invalidate()
+    finally:
+        RESPONSE_CACHE.bump()
+        CHANGE_FEED.notify()
+
+
+def execute_insert(conn, data):
+    """Insert one parsed entry, raising on a duplicate appearance.
+
+    Dimension ids come from ID_CACHE when possible and from one upsert per
+    table otherwise, so an entry whose film, brand, watch, actor and
+    character are all known costs a single INSERT. Every statement is
+    atomic, so concurrent adds of the same names cannot create duplicates.
+    """
+    cursor = conn.cursor()
+    learned = []
     
-    # Remove trailing periods but preserve them in abbreviations like "Ref."
-    text = text.rstrip('.')
-    
-    # More robust patterns that better handle "a" and "an"
-    pattern1 = r'(.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(.+?)\s+(?:watch\s+)?in\s+(?:the\s+)?(\d{4})\s+(?:\w+\s+)?(.+?)$'
-  
-    pattern2 = r'(.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(.+?)\s+in\s+(.+?)\s+\((\d{4})\)$'
-  
-    pattern3 = r'In\s+(.+?)\s+\((\d{4})\),\s+(.+?)\s+(?:as|plays)\s+(.+?)\s+(?:wears?|wearing)\s+(?:a|an)\s+(.+?)$'
+    try:
+        epoch = ID_CACHE.begin(conn)
+        film_key = (data['title'], data['year'])
+        film_id = ID_CACHE.get(conn.db_path, 'films', film_key)
+        if film_id is None:
+            film_id = upsert_id(cursor, 'films', film_key)
+            learned.append(('films', film_key, film_id))
+        
+        brand_key = (data['brand'],)
+        brand_id = ID_CACHE.get(conn.db_path, 'brands', brand_key)
+        if brand_id is None:
+            brand_id = upsert_id(cursor, 'brands', brand_key)
+            learned.append(('brands', brand_key, brand_id))
+        
+        watch_key = (brand_id, data['model'])
+        watch_id = ID_CACHE.get(conn.db_path, 'watches', watch_key)
+        if watch_id is None:
+            watch_id = upsert_id(cursor, 'watches', watch_key + (data['verification'],))
+            learned.append(('watches', watch_key, watch_id))
+        
+        actor_key = (data['actor'],)
+        actor_id = ID_CACHE.get(conn.db_path, 'actors', actor_key)
+        if actor_id is None:
+            actor_id = upsert_id(cursor, 'actors', actor_key)
+            learned.append(('actors', actor_key, actor_id))
+        
+        # Characters belong to one film and actor
+        character_key = (film_id, actor_id, data['character'])
+        character_id = ID_CACHE.get(conn.db_path, 'characters', character_key)
+        if character_id is None:
+            character_id = upsert_id(cursor, 'characters', character_key)
+            learned.append(('characters', character_key, character_id))
+        
+        source_id = None
+        if data.get('source'):
+            source_key = source_values(data['source'])
+            source_id = ID_CACHE.get(conn.db_path, 'sources', source_key)
+            if source_id is None:
+                source_id = upsert_id(cursor, 'sources', source_key)
+                learned.append(('sources', source_key, source_id))
+        
+        # The same film, actor and watch is a duplicate whatever the character
+        cursor.execute("""INSERT INTO film_actor_watch 
+                         (film_id, actor_id, character_id, watch_id, narrative_role, source_id, confidence) 
+                         VALUES (?, ?, ?, ?, ?, ?, ?)
+                         ON CONFLICT DO NOTHING
+                         RETURNING faw_id""",
+                      (film_id, actor_id, character_id, watch_id, data['narrative'], source_id, data.get('confidence')))
+        
+        if cursor.fetchone() is None:
+            conn.rollback()
+            raise Exception(f"Duplicate entry: {data['actor']} wearing {data['brand']} {data['model']} in {data['title']} already exists in the database.")
+        
+        conn.commit()
+        
+    except Exception as e:
+        conn.rollback()
+        raise Exception(f"{str(e)}")
+
+    ID_CACHE.put_many(conn.db_path, epoch, learned)
+    after_insert_commit(conn)
+    return True
+
+
+BATCH_COMMIT_SIZE = 500
+
+# Keys per "IN (VALUES ...)" lookup, comfortably under SQLite's bind-parameter limit
+_BULK_LOOKUP_SIZE = 300
+
+
+def _bulk_lookup(cursor, select_sql, keys):
+    """Run select_sql (with a "VALUES %s" slot for the keys) over key tuples and return {key: id}."""
+    found = {}
+    keys = list(keys)
+    for i in range(0, len(keys), _BULK_LOOKUP_SIZE):
+        part = keys[i:i + _BULK_LOOKUP_SIZE]
+        placeholders = '(' + ', '.join('?' * len(part[0])) + ')'
+        cursor.execute(select_sql % ', '.join([placeholders] * len(part)),
+                       [value for key in part for value in key])
+        for *key, row_id in cursor.fetchall():
+            found[tuple(key)] = row_id
+    return found
+
+
+def _upsert_many(cursor, table, rows):
+    """Upsert distinct dimension rows a chunk at a time and return {key: id},
+    where the key is what the table's UPSERT_SQL returns before the id."""
+    found = {}
+    rows = list(rows)
+    for i in range(0, len(rows), _BULK_LOOKUP_SIZE):
+        part = rows[i:i + _BULK_LOOKUP_SIZE]
+        placeholders = '(' + ', '.join('?' * len(part[0])) + ')'
+        cursor.execute(UPSERT_SQL[table] % ', '.join([placeholders] * len(part)),
+                       [value for row in part for value in row])
+        for *key, row_id in cursor.fetchall():
+            found[tuple(key)] = row_id
+    return found
+
+
+def execute_insert_many(conn, rows):
+    """Insert parsed entries using set-based statements; the caller commits.
+
+    Returns a (status, message) pair per row, where status is 'success' or
+    'duplicate' (same film, actor and watch as an existing or earlier row).
+    """
+    cursor = conn.cursor()
+
+    film_ids = _upsert_many(cursor, 'films', dict.fromkeys((r['title'], r['year']) for r in rows))
+    brand_ids = _upsert_many(cursor, 'brands', dict.fromkeys((r['brand'],) for r in rows))
+
+    watches = {}
+    for r in rows:
+        watches.setdefault((brand_ids[(r['brand'],)], r['model']), r['verification'])
+    watch_ids = _upsert_many(cursor, 'watches', [key + (verification,) for key, verification in watches.items()])
+
+    actor_ids = _upsert_many(cursor, 'actors', dict.fromkeys((r['actor'],) for r in rows))
+
+    keys = [(film_ids[(r['title'], r['year'])],
+             actor_ids[(r['actor'],)],
+             watch_ids[(brand_ids[(r['brand'],)], r['model'])]) for r in rows]
+    # A join against the key list probes the index once per key; a multi-column
+    # IN (VALUES ...) would probe every combination of the column values instead
+    seen = set(_bulk_lookup(cursor, """WITH k(film_id, actor_id, watch_id) AS (VALUES %s)
+                                       SELECT faw.film_id, faw.actor_id, faw.watch_id, faw.faw_id
+                                       FROM k CROSS JOIN film_actor_watch faw
+                                       WHERE faw.film_id = k.film_id AND faw.actor_id = k.actor_id
+                                       AND faw.watch_id = k.watch_id""", set(keys)))
+
+    results = []
+    new_rows = []
+    for r, key in zip(rows, keys):
+        if key in seen:
+            results.append(('duplicate', f"Duplicate entry: {r['actor']} wearing {r['brand']} {r['model']} in {r['title']} already exists in the database."))
+        else:
+            seen.add(key)
+            new_rows.append((r, key))
+            results.append(('success', None))
+
+    character_ids = _upsert_many(cursor, 'characters',
+                                 dict.fromkeys(key[:2] + (r['character'],) for r, key in new_rows))
+    source_ids = _upsert_many(cursor, 'sources',
+                              dict.fromkeys(source_values(r['source']) for r, _ in new_rows if r.get('source')))
+
+    cursor.executemany("""INSERT INTO film_actor_watch
+                          (film_id, actor_id, character_id, watch_id, narrative_role, source_id, confidence)
+                          VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                       [(film_id, actor_id, character_ids[(film_id, actor_id, r['character'])], watch_id, r['narrative'],
+                         source_ids[source_values(r['source'])] if r.get('source') else None, r.get('confidence'))
+                        for r, (film_id, actor_id, watch_id) in new_rows])
+    return results
+
+
+RESPONSE_CACHE_SIZE = 2048
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """LRU of rendered read responses keyed on (path, args, write generation, snapshot).
+
+    The generation pairs DB_PATH's DATA_VERSION, which moves on every commit
+    by any process (so each worker of a multi-process server and writes like
+    `python -m filmwatch load` retire everything cached before them), with a
+    local counter that bump() moves after this process's writes. Entries
+    computed under an older generation are never served again and simply
+    age out. Responses read from a snapshot are keyed on its version
+    instead, with the generation left as None.
+    """
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.bumps = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @property
+    def generation(self):
+        return (self.bumps, DATA_VERSION.get())
+
+    def bump(self):
+        with self._lock:
+            self.bumps += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def put(self, key, body, mimetype, etag):
+        generation = self.generation
+        with self._lock:
+            # key[2] is the generation the response was computed under
+            if key[2] not in (None, generation) or len(body) > self.max_bytes or key in self._entries:
+                return
+            self._entries[key] = (body, mimetype, etag)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_size or self._bytes > self.max_bytes:
+                _, (old_body, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+RESPONSE_CACHE = ResponseCache()
+
+
+def _conditional(response, etag, cache_status):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Cache'] = cache_status
+    response.make_conditional(request)
+    if response.status_code == 304:
+        RESPONSE_CACHE.not_modified += 1
+    return response
+
+
+def cached_response(view):
+    """Serve a read endpoint from RESPONSE_CACHE, with a strong ETag and 304s.
+
+    Only complete 200 responses are cached; ?stream requests bypass the cache,
+    and keys end with the representation so asgi_backend can share entries.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if wants_stream():
+            return view(*args, **kwargs)
+
+        # Read the generation before the database so a write racing with this
+        # request can only leave its result under a generation already retired.
+        # A snapshot never changes, so its version alone keys what was read from it.
+        snapshot = g.get('snapshot')
+        key = (request.path, tuple(sorted(request.args.items(multi=True))),
+               None if snapshot else RESPONSE_CACHE.generation, snapshot, 'application/json')
+        entry = RESPONSE_CACHE.get(key)
+        if entry is not None:
+            body, mimetype, etag = entry
+            return _conditional(Response(body, mimetype=mimetype), etag, 'HIT')
+
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+
+        body = response.get_data()
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        RESPONSE_CACHE.put(key, body, response.mimetype, etag)
+        return _conditional(response, etag, 'MISS')
+
+    return wrapper
+
+
+@app.route('/api/add', methods=['POST'])
+def add_entry():
+    """Add a new entry to the database."""
+    try:
+        data = request.json
+        entry_text = data.get('entry', '')
+        narrative = data.get('narrative', 'Watch worn in film.')
+        
+        if not entry_text:
+            return jsonify({'error': 'Entry text is required'}), 400
+        
+        parsed = parse_entry(entry_text)
+        parsed['narrative'] = narrative
+        
+        return _add_one(parsed)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _add_one(parsed):
+    """Write one parsed entry (through the ingest queue when it runs) and build the response."""
+    if INGEST_QUEUE.running:
+        ticket = INGEST_QUEUE.submit(parsed)
+        if request.args.get('wait', '').lower() not in ('1', 'true', 'yes'):
+            return jsonify({
+                'success': True,
+                'status': ticket.status,
+                'ingest_id': ticket.ingest_id,
+                'data': parsed
+            }), 202
+        if not ticket.done.wait(INGEST_WAIT_TIMEOUT):
+            return jsonify({'error': 'Timed out waiting for commit', 'ingest_id': ticket.ingest_id}), 504
+        if ticket.status != 'success':
+            raise Exception(ticket.message)
+    else:
+        conn = get_db()
+        execute_insert(conn, parsed)
     
-    match = re.match(pattern1, text, re.IGNORECASE)
-    if match:
-        actor = match.group(1).strip()
-        watch_full = match.group(2).strip()
-        year = int(match.group(3))
-        title = match.group(4).strip()
-        character = None
+    return jsonify({
+        'success': True,
+        'message': f"Successfully added: {parsed['actor']} wearing {parsed['brand']} {parsed['model']} in {parsed['title']} ({parsed['year']})",
+        'data': parsed
+    })
+
+
+def _parse_batch_item(item):
+    """Turn one batch element (an entry string or {"entry", "narrative"}) into parsed data."""
+    if isinstance(item, str):
+        item = {'entry': item}
+    if not isinstance(item, dict):
+        raise ValueError('Each item must be an entry string or an object with "entry"')
+
+    entry_text = item.get('entry', '')
+    if not entry_text:
+        raise ValueError('Entry text is required')
+
+    parsed = parse_entry(entry_text)
+    parsed['narrative'] = item.get('narrative', 'Watch worn in film.')
+    return parsed
+
+
+def _ndjson_items(stream):
+    """Yield one decoded JSON value (or the decoding error) per non-blank line."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield e
+
+
+@app.route('/api/add/batch', methods=['POST'])
+def add_entries_batch():
+    """Add many entries, streaming back one NDJSON result line per entry.
+
+    Accepts a JSON array or an application/x-ndjson body. Entries are written
+    in chunks of ?chunk=N rows, each committed once.
+    """
+    chunk_size = max(1, request.args.get('chunk', BATCH_COMMIT_SIZE, type=int))
+
+    if request.mimetype == 'application/x-ndjson':
+        items = _ndjson_items(request.stream)
     else:
-        match = re.match(pattern2, text, re.IGNORECASE)
-        if match:
-            actor = match.group(1).strip()
-            watch_full = match.group(2).strip()
-            title = match.group(3).strip()
-            year = int(match.group(4))
-            character = None
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({'error': 'Expected a JSON array or an application/x-ndjson body'}), 400
+
+    def result_line(**fields):
+        return json.dumps(fields) + '\n'
+
+    def generate():
+        counts = {'success': 0, 'duplicate': 0, 'error': 0}
+        conn = get_db()
+
+        def flush(pending):
+            rows = [parsed for _, parsed in pending]
+            try:
+                results = execute_insert_many(conn, rows)
+                conn.commit()
+            except Exception as e:
+                # Any failure, not only SQLite's, becomes an error line so the stream carries on
+                conn.rollback()
+                results = [('error', str(e))] * len(rows)
+            else:
+                after_insert_commit(conn)
+
+            for (index, parsed), (status, message) in zip(pending, results):
+                counts[status] += 1
+                if status == 'success':
+                    yield result_line(index=index, status=status, data=parsed)
+                else:
+                    yield result_line(index=index, status=status, error=message)
+
+        pending = []
+        for index, item in enumerate(items):
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                pending.append((index, _parse_batch_item(item)))
+            except Exception as e:
+                counts['error'] += 1
+                yield result_line(index=index, status='error', error=str(e))
+                continue
+
+            if len(pending) >= chunk_size:
+                yield from flush(pending)
+                pending = []
+
+        if pending:
+            yield from flush(pending)
+
+        yield result_line(done=True, **counts)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+# Structured entries (/api/add_structured), as index.html sends them
+STRUCTURED_FIELDS = {'film_title', 'release_year', 'country', 'actor_full_name', 'character_name',
+                     'brand', 'model', 'reference', 'source', 'confidence', 'narrative'}
+SOURCE_TYPES = ('manufacturer', 'auction', 'prop', 'publication', 'frame_still', 'other')
+CONFIDENCE_LEVELS = ('A', 'B', 'C', 'D')
+MAX_FIELD_LENGTH = 255
+MIN_RELEASE_YEAR = 1888
+STRUCTURED_BATCH_MAX = 1000
+
+_DATE_PUBLISHED = re.compile(r'\d{4}(?:-\d{2}(?:-\d{2})?)?')
+
+
+def _text_field(item, name, required=False, max_length=MAX_FIELD_LENGTH):
+    """A string field with whitespace collapsed, or None when it is missing or blank."""
+    value = item.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f'"{name}" is required')
+        return None
+    if not isinstance(value, str):
+        raise ValueError(f'"{name}" must be a string')
+    value = ' '.join(value.split())
+    if len(value) > max_length:
+        raise ValueError(f'"{name}" is longer than {max_length} characters')
+    return value
+
+
+def _structured_source(source):
+    if source is None:
+        return None
+    if not isinstance(source, dict):
+        raise ValueError('"source" must be an object')
+    unknown = sorted(set(source) - set(SOURCE_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown source field(s): {', '.join(unknown)}")
+
+    source = {name: _text_field(source, name, max_length=MAX_ENTRY_LENGTH if name == 'url' else MAX_FIELD_LENGTH)
+              for name in SOURCE_FIELDS}
+    if source['source_type'] is not None and source['source_type'] not in SOURCE_TYPES:
+        raise ValueError(f"\"source_type\" must be one of {', '.join(SOURCE_TYPES)}")
+    if source['url'] is not None:
+        parts = urllib.parse.urlsplit(source['url'])
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError('"url" must be an http(s) URL')
+    date = source['date_published']
+    if date is not None:
+        try:
+            if not _DATE_PUBLISHED.fullmatch(date):
+                raise ValueError
+            datetime.date.fromisoformat((date + '-01-01')[:10])
+        except ValueError:
+            raise ValueError('"date_published" must be YYYY, YYYY-MM or YYYY-MM-DD') from None
+    return source if any(source.values()) else None
+
+
+def parse_structured(item):
+    """Validate one structured entry and return it in parse_entry's shape, plus
+    "source" (or None) and "confidence".
+
+    Known brands are matched as the parser matches them, so "omega" is
+    stored as "Omega"; a reference is appended to the model, as it is when
+    written into a sentence. "country" is accepted but not stored.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Each entry must be a JSON object')
+    unknown = sorted(set(item) - STRUCTURED_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+    year = item.get('release_year')
+    if isinstance(year, str) and year.strip().isdigit():
+        year = int(year)
+    if not isinstance(year, int) or isinstance(year, bool):
+        raise ValueError('"release_year" must be a year')
+    if not MIN_RELEASE_YEAR <= year <= datetime.date.today().year + 10:
+        raise ValueError(f'"release_year" must be between {MIN_RELEASE_YEAR} and {datetime.date.today().year + 10}')
+
+    actor = _text_field(item, 'actor_full_name', required=True)
+    brand = _text_field(item, 'brand', required=True)
+    model = _text_field(item, 'model', required=True)
+    reference = _text_field(item, 'reference')
+    if reference and reference not in model:
+        model = f"{model} {reference}"
+    _text_field(item, 'country')
+
+    confidence = item.get('confidence')
+    if confidence is not None and confidence not in CONFIDENCE_LEVELS:
+        raise ValueError(f"\"confidence\" must be one of {', '.join(CONFIDENCE_LEVELS)}")
+
+    return {
+        'actor': actor,
+        'character': _text_field(item, 'character_name') or actor.split()[-1],
+        'brand': BRAND_INDEX.names.get(fold_text(brand)[0], brand),
+        'model': model,
+        'title': _text_field(item, 'film_title', required=True),
+        'year': year,
+        'verification': 'Confirmed',
+        'narrative': _text_field(item, 'narrative', max_length=MAX_ENTRY_LENGTH) or 'Watch worn in film.',
+        'source': _structured_source(item.get('source')),
+        'confidence': confidence
+    }
+
+
+@app.route('/api/add_structured', methods=['POST'])
+def add_structured():
+    """Add an entry from its fields instead of a sentence, so nothing is parsed.
+
+    Takes one object (answered like /api/add) or an array of up to
+    STRUCTURED_BATCH_MAX objects, which are validated together and written
+    in one transaction; any invalid item rejects the whole array.
+    """
+    try:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            with request_phase('parse'):
+                parsed = parse_structured(payload)
+            return _add_one(parsed)
+        
+        if not isinstance(payload, list) or not payload:
+            return jsonify({'error': 'Expected a JSON object or a non-empty array of objects'}), 400
+        if len(payload) > STRUCTURED_BATCH_MAX:
+            return jsonify({'error': f'At most {STRUCTURED_BATCH_MAX} entries per request'}), 400
+        
+        rows, errors = [], []
+        with request_phase('parse'):
+            for index, item in enumerate(payload):
+                try:
+                    rows.append(parse_structured(item))
+                except ValueError as e:
+                    errors.append({'index': index, 'error': str(e)})
+        if errors:
+            return jsonify({'error': f'{len(errors)} of {len(payload)} entries are invalid', 'errors': errors}), 400
+        
+        conn = get_db()
+        try:
+            results = execute_insert_many(conn, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        after_insert_commit(conn)
+        
+        added = sum(status == 'success' for status, _ in results)
+        return jsonify({
+            'success': True,
+            'message': f"Added {added} of {len(rows)} entries",
+            'added': added,
+            'duplicates': len(rows) - added,
+            'results': [{'index': index, 'status': status, 'error': message} if message
+                        else {'index': index, 'status': status}
+                        for index, (status, message) in enumerate(results)]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Write-behind ingest: when the writer runs, /api/add enqueues rows and
+# returns 202 (or waits with ?wait=1) while one thread commits them in groups
+WRITE_BEHIND = False
+INGEST_GROUP_SIZE = 200
+INGEST_GROUP_MS = 50
+INGEST_QUEUE_MAX = 10000
+INGEST_RESULTS_SIZE = 10000
+INGEST_WAIT_TIMEOUT = 30
+
+# Natural key of an appearance, as names: what execute_insert calls a duplicate
+_APPEARANCE_NAMES_SQL = """
+    SELECT f.title, f.year, a.actor_name, b.brand_name, w.model_reference
+    FROM film_actor_watch faw
+    JOIN films f ON faw.film_id = f.film_id
+    JOIN actors a ON faw.actor_id = a.actor_id
+    JOIN watches w ON faw.watch_id = w.watch_id
+    JOIN brands b ON w.brand_id = b.brand_id
+"""
+
+
+def appearance_key(title, year, actor, brand, model):
+    """Hash an appearance's natural key to 64 bits for the in-memory duplicate index."""
+    raw = json.dumps([title, year, actor, brand, model]).encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), 'little')
+
+
+class IngestTicket:
+    """One queued /api/add row; done is set once its group commits (or fails)."""
+
+    def __init__(self, data):
+        self.ingest_id = uuid.uuid4().hex
+        self.data = data
+        self.key = appearance_key(data['title'], data['year'], data['actor'], data['brand'], data['model'])
+        self.status = 'queued'
+        self.message = None
+        self.done = threading.Event()
+
+
+class IngestQueue:
+    """Write-behind queue: duplicate-checked in memory, drained by one writer thread.
+
+    The writer commits a group when it holds group_size rows or group_ms
+    milliseconds after the group's first row arrived; stop() commits what is
+    still queued before the writer ends. Anything that deletes appearances
+    or renames what their key is made of must call forget() or reload_keys().
+    """
+
+    def __init__(self, group_size=INGEST_GROUP_SIZE, group_ms=INGEST_GROUP_MS, max_depth=INGEST_QUEUE_MAX):
+        self.group_size = group_size
+        self.group_ms = group_ms
+        self._queue = queue.Queue(max_depth)
+        self._lock = threading.Lock()
+        self._keys = set()
+        self._results = OrderedDict()
+        self._thread = None
+        self._stopping = False
+        self.batches = 0
+        self.rows = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.commit_seconds = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        conn = connect()
+        self.reload_keys(conn)
+        with self._lock:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._run, args=(conn,), name='ingest-writer', daemon=True)
+        self._thread.start()
+
+    def reload_keys(self, conn):
+        cursor = conn.cursor()
+        cursor.execute(_APPEARANCE_NAMES_SQL)
+        keys = set()
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            keys.update(appearance_key(*row) for row in rows)
+        with self._lock:
+            self._keys = keys
+
+    def forget(self, title, year, actor, brand, model):
+        with self._lock:
+            self._keys.discard(appearance_key(title, year, actor, brand, model))
+
+    def submit(self, data):
+        """Queue a parsed entry and return its ticket; raises on a known duplicate or a full queue."""
+        ticket = IngestTicket(data)
+        # Enqueued under the lock, so nothing lands behind the marker stop() queues
+        with self._lock:
+            if self._stopping:
+                raise Exception('Ingest queue is shutting down, try again later')
+            if ticket.key in self._keys:
+                raise Exception(f"Duplicate entry: {data['actor']} wearing {data['brand']} {data['model']} in {data['title']} already exists in the database.")
+            try:
+                self._queue.put_nowait(ticket)
+            except queue.Full:
+                raise Exception('Ingest queue is full, try again later')
+            self._keys.add(ticket.key)
+            self._results[ticket.ingest_id] = ticket
+            while len(self._results) > INGEST_RESULTS_SIZE:
+                self._results.popitem(last=False)
+        return ticket
+
+    def stop(self, timeout=INGEST_WAIT_TIMEOUT):
+        """Commit every row already queued, then end the writer.
+
+        Waits up to `timeout` seconds and returns whether the writer has ended.
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return True
+        with self._lock:
+            self._stopping = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return False
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def get(self, ingest_id):
+        with self._lock:
+            return self._results.get(ingest_id)
+
+    def _run(self, conn):
+        while True:
+            group = [self._queue.get()]
+            deadline = time.monotonic() + self.group_ms / 1000
+            while len(group) < self.group_size and group[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if group[-1] is None:
+                # stop()'s marker: everything queued before it is in this group
+                group.pop()
+                if group:
+                    self._commit(conn, group)
+                conn.close()
+                return
+            self._commit(conn, group)
+
+    def _commit(self, conn, group):
+        """Commit one group; whatever goes wrong, every ticket ends up done and the writer keeps running."""
+        started = time.perf_counter()
+        committed = False
+        try:
+            try:
+                results = execute_insert_many(conn, [ticket.data for ticket in group])
+                conn.commit()
+                committed = True
+            except Exception as e:
+                conn.rollback()
+                results = [('error', str(e))] * len(group)
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                for ticket, (status, message) in zip(group, results):
+                    ticket.status, ticket.message = status, message
+                    if status == 'error':
+                        self._keys.discard(ticket.key)
+                self.batches += 1
+                self.rows += len(group)
+                self.last_batch_size = len(group)
+                self.max_batch_size = max(self.max_batch_size, len(group))
+                self.commit_seconds += elapsed
+        except Exception as e:
+            app.logger.exception("Ingest group of %d rows failed", len(group))
+            with self._lock:
+                for ticket in group:
+                    if ticket.status == 'queued':
+                        ticket.status, ticket.message = 'error', str(e)
+                        self._keys.discard(ticket.key)
+        finally:
+            if committed:
+                after_insert_commit(conn)
+            for ticket in group:
+                ticket.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'running': self.running,
+                'queue_depth': self._queue.qsize(),
+                'batches': self.batches,
+                'rows': self.rows,
+                'avg_batch_size': round(self.rows / self.batches, 2) if self.batches else None,
+                'last_batch_size': self.last_batch_size,
+                'max_batch_size': self.max_batch_size,
+                'avg_commit_ms': round(self.commit_seconds / self.batches * 1000, 3) if self.batches else None,
+                'group_size': self.group_size,
+                'group_ms': self.group_ms,
+                'known_keys': len(self._keys)
+            }
+
+
+INGEST_QUEUE = IngestQueue()
+
+
+@app.route('/api/ingest/<ingest_id>', methods=['GET'])
+def ingest_status(ingest_id):
+    """Report what became of a row queued by /api/add in write-behind mode."""
+    ticket = INGEST_QUEUE.get(ingest_id)
+    if ticket is None:
+        return jsonify({'error': 'Unknown ingest id'}), 404
+    
+    return jsonify({
+        'success': ticket.status == 'success',
+        'ingest_id': ingest_id,
+        'status': ticket.status,
+        'error': ticket.message,
+        'data': ticket.data
+    })
+
+
+@app.route('/api/ingest-stats', methods=['GET'])
+def get_ingest_stats():
+    """Queue depth and group-commit counters for the write-behind writer."""
+    return jsonify({'success': True, 'ingest': INGEST_QUEUE.stats()})
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Selectable fields of an appearance: name -> (SQL expression, table alias it needs)
+QUERY_FIELDS = {
+    'title': ('f.title', 'f'),
+    'year': ('f.year', 'f'),
+    'actor': ('a.actor_name', 'a'),
+    'brand': ('b.brand_name', 'b'),
+    'model': ('w.model_reference', 'w'),
+    'character': ('c.character_name', 'c'),
+    'narrative': ('faw.narrative_role', None),
+}
+
+# Joins from film_actor_watch, in the order they must appear
+QUERY_JOINS = (
+    ('f', 'JOIN films f ON faw.film_id = f.film_id'),
+    ('a', 'JOIN actors a ON faw.actor_id = a.actor_id'),
+    ('c', 'JOIN characters c ON faw.character_id = c.character_id'),
+    ('w', 'JOIN watches w ON faw.watch_id = w.watch_id'),
+    ('b', 'JOIN brands b ON w.brand_id = b.brand_id'),
+)
+
+
+def encode_cursor(sort_value, faw_id):
+    raw = json.dumps([sort_value, faw_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, faw_id = json.loads(raw)
+        return sort_value, int(faw_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+STREAM_BATCH_SIZE = 500
+
+
+READ_MODEL_ENABLED = False
+
+# (search column, sort field) pairs the read model keeps posting lists ordered for
+READ_MODEL_ORDERS = {('actor', 'year'), ('brand', 'year'), ('title', 'actor')}
+
+
+def _put(column, index, value, fill):
+    """Set column[index], growing the column with fill first if it is too short."""
+    missing = index + 1 - len(column)
+    if missing > 0:
+        column.extend([fill] * missing)
+    column[index] = value
+
+
+# SQLite's LIKE folds ASCII letters only (É and é differ), so the read model must too
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+class _NameTrigrams:
+    """ASCII-lower-cased names with a trigram -> ids index, answering LIKE '%term%' in memory."""
+
+    def __init__(self):
+        self.folded = {}
+        self.grams = {}
+
+    def add(self, name_id, name):
+        folded = name.translate(_ASCII_LOWER)
+        self.folded[name_id] = folded
+        for gram in {folded[i:i + 3] for i in range(len(folded) - 2)}:
+            self.grams.setdefault(gram, []).append(name_id)
+
+    def match(self, term):
+        term = term.translate(_ASCII_LOWER)
+        if len(term) < 3:
+            candidates = self.folded
         else:
-            match = re.match(pattern3, text, re.IGNORECASE)
-            if match:
-                title = match.group(1).strip()
-                year = int(match.group(2))
-                actor = match.group(3).strip()
-                character = match.group(4).strip()
-                watch_full = match.group(5).strip()
+            # Every match contains every trigram of the term, so the rarest one bounds the candidates
+            candidates = min((self.grams.get(term[i:i + 3], ()) for i in range(len(term) - 2)), key=len)
+        folded = self.folded
+        return [name_id for name_id in candidates if term in folded[name_id]]
+
+
+# Year-ordered posting lists hold year * _FAW_SPAN + faw_id, so they sort and
+# compare as plain integers
+_FAW_SPAN = 1 << 40
+
+
+def _window(entries, key, after, descending, limit):
+    """The first `limit` entries of a posting list in query order after the
+    cursor position `after`, as a slice in the list's own (ascending) order."""
+    if descending:
+        end = bisect.bisect_left(entries, after, key=key) if after else len(entries)
+        return entries[max(0, end - limit):end]
+    start = bisect.bisect_right(entries, after, key=key) if after else 0
+    return entries[start:start + limit]
+
+
+class _ReadColumns:
+    """One load of the read model.
+
+    Dimension values live in lists indexed by their ids and appearance
+    columns in integer arrays indexed by faw_id (0 marks a missing row).
+    Each actor, brand and film has a posting list kept sorted in the order
+    its /api/query/* route pages through: (year, faw_id) for actors and
+    brands, encoded as one integer, and (actor name, faw_id) for films, whose
+    lists hold faw_ids sorted by actor_key.
+    """
+
+    _NEW_ROWS = (
+        ('films', "SELECT film_id, title, year FROM films WHERE film_id > ? ORDER BY film_id"),
+        ('actors', "SELECT actor_id, actor_name FROM actors WHERE actor_id > ? ORDER BY actor_id"),
+        ('characters', "SELECT character_id, character_name FROM characters WHERE character_id > ? ORDER BY character_id"),
+        ('brands', "SELECT brand_id, brand_name FROM brands WHERE brand_id > ? ORDER BY brand_id"),
+        ('watches', "SELECT watch_id, brand_id, model_reference FROM watches WHERE watch_id > ? ORDER BY watch_id"),
+        ('film_actor_watch', """SELECT faw_id, film_id, actor_id, character_id, watch_id, narrative_role
+                                FROM film_actor_watch WHERE faw_id > ? ORDER BY faw_id"""),
+    )
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.last_ids = dict.fromkeys((table for table, _ in self._NEW_ROWS), 0)
+        self.counts = dict.fromkeys(('films', 'actors', 'brands', 'entries'), 0)
+
+        self.film_title, self.film_year = [None], array('i', [0])
+        self.actor_name = [None]
+        self.character_name = [None]
+        self.brand_name = [None]
+        self.watch_model, self.watch_brand = [None], array('i', [0])
+
+        self.row_film, self.row_actor, self.row_character, self.row_watch, self.row_narrative = (
+            array('i', [0]) for _ in range(5))
+        self.narratives, self.narrative_ids = [None], {None: 0}
+
+        self.names = {column: _NameTrigrams() for column in ('actor', 'brand', 'title')}
+        self.postings = {column: {} for column in ('actor', 'brand', 'title')}
+        self.order_keys = {'actor': None, 'brand': None, 'title': self.actor_key}
+
+        # Field name -> values for a list of faw_ids. The columns only ever grow
+        # in place, so these can hold on to them.
+        film_title, film_year, actor_name, character_name = (
+            self.film_title, self.film_year, self.actor_name, self.character_name)
+        brand_name, watch_model, watch_brand, narratives = (
+            self.brand_name, self.watch_model, self.watch_brand, self.narratives)
+        row_film, row_actor, row_character, row_watch, row_narrative = (
+            self.row_film, self.row_actor, self.row_character, self.row_watch, self.row_narrative)
+        self.columns = {
+            'title': lambda ids: [film_title[row_film[i]] for i in ids],
+            'year': lambda ids: [film_year[row_film[i]] for i in ids],
+            'actor': lambda ids: [actor_name[row_actor[i]] for i in ids],
+            'character': lambda ids: [character_name[row_character[i]] for i in ids],
+            'brand': lambda ids: [brand_name[watch_brand[row_watch[i]]] for i in ids],
+            'model': lambda ids: [watch_model[row_watch[i]] for i in ids],
+            'narrative': lambda ids: [narratives[row_narrative[i]] for i in ids],
+        }
+
+    def actor_key(self, faw_id):
+        return self.actor_name[self.row_actor[faw_id]], faw_id
+
+    def _entry(self, column, faw_id):
+        if column == 'title':
+            return faw_id
+        return self.film_year[self.row_film[faw_id]] * _FAW_SPAN + faw_id
+
+    def _position(self, column, after):
+        """The posting-list position of a decoded (sort value, faw_id) cursor."""
+        if column == 'title':
+            return after
+        if type(after[0]) is not int:
+            raise TypeError('year cursor expected')
+        return after[0] * _FAW_SPAN + after[1]
+
+    def _owners(self, faw_id):
+        return (('actor', self.row_actor[faw_id]),
+                ('brand', self.watch_brand[self.row_watch[faw_id]]),
+                ('title', self.row_film[faw_id]))
+
+    def read_new(self, conn):
+        """Read every row added since the last call in one read transaction; returns the new appearances.
+
+        The first call loads everything and sorts each posting list once;
+        later ones insert into the sorted lists.
+        """
+        bulk = self.last_ids['film_actor_watch'] == 0
+        added = 0
+        began = not conn.in_transaction
+        if began:
+            conn.execute("BEGIN")
+        try:
+            for table, sql in self._NEW_ROWS:
+                last_id = self.last_ids[table]
+                for row in conn.execute(sql, (last_id,)):
+                    last_id = row[0]
+                    if table == 'film_actor_watch':
+                        self._add_row(row, bulk)
+                        added += 1
+                    else:
+                        self._add_dimension(table, row)
+                self.last_ids[table] = last_id
+        finally:
+            if began:
+                conn.rollback()
+
+        if bulk:
+            for column, postings in self.postings.items():
+                key = self.order_keys[column]
+                for owner, entries in postings.items():
+                    postings[owner] = array('q', sorted(entries, key=key))
+        return added
+
+    def _add_dimension(self, table, row):
+        if table == 'films':
+            film_id, title, year = row
+            _put(self.film_title, film_id, title, None)
+            _put(self.film_year, film_id, year, 0)
+            self.names['title'].add(film_id, title)
+            self.counts['films'] += 1
+        elif table == 'actors':
+            _put(self.actor_name, row[0], row[1], None)
+            self.names['actor'].add(row[0], row[1])
+            self.counts['actors'] += 1
+        elif table == 'characters':
+            _put(self.character_name, row[0], sys.intern(row[1]), None)
+        elif table == 'brands':
+            _put(self.brand_name, row[0], row[1], None)
+            self.names['brand'].add(row[0], row[1])
+            self.counts['brands'] += 1
+        else:
+            watch_id, brand_id, model = row
+            _put(self.watch_model, watch_id, model, None)
+            _put(self.watch_brand, watch_id, brand_id, 0)
+
+    def _add_row(self, row, bulk):
+        faw_id, film_id, actor_id, character_id, watch_id, narrative = row
+        narrative_id = self.narrative_ids.get(narrative)
+        if narrative_id is None:
+            narrative_id = self.narrative_ids[narrative] = len(self.narratives)
+            self.narratives.append(narrative)
+        for column, value in ((self.row_film, film_id), (self.row_actor, actor_id),
+                              (self.row_character, character_id), (self.row_watch, watch_id),
+                              (self.row_narrative, narrative_id)):
+            _put(column, faw_id, value, 0)
+
+        for column, owner in self._owners(faw_id):
+            postings, entry = self.postings[column], self._entry(column, faw_id)
+            if bulk:
+                postings.setdefault(owner, []).append(entry)
             else:
-                raise ValueError("Could not parse entry")
-    
-    # IMPORTANT: List longer brand names first
-    brands = [
-        'Audemars Piguet', 'Patek Philippe', 'Vacheron Constantin', 
-        'Jaeger-LeCoultre', 'A. Lange & Söhne', 'Frederique Constant',
-        'Ulysse Nardin', 'Girard-Perregaux', 'Glashutte Original',
-        'Universal Genève', 'Richard Mille', 'Bell & Ross', 'Maurice Lacroix', 
-        'Carl F. Bucherer', 'Raymond Weil', 'TAG Heuer', 
-        'IWC Schaffhausen', 'Franck Muller',
-        'Rolex', 'Omega', 'Heuer', 'Hamilton', 'Panerai', 'Breitling', 
-        'IWC', 'Cartier', 'Zenith', 'Breguet', 'Longines', 'Seiko', 
-        'Citizen', 'Casio', 'Timex', 'Doxa', 'Hublot', 'Tudor',
-        'Bulgari', 'Chopard', 'Oris', 'Tissot', 'Rado', 'Mido',
-        'Certina', 'Swatch', 'Luminox', 'Fortis', 'Glycine', 'Stowa',
-        'Nomos', 'Junghans', 'Sinn', 'Hanhart', 'Laco', 'Damasko',
-        'Ball', 'Alpina', 'Movado', 'Ebel', 'Concord', 'Corum',
-        'Parmigiani', 'Piaget', 'Blancpain', 'Bremont', 'Christopher Ward',
-        'Squale', 'Steinhart', 'Halios', 'Monta', 'Farer', 'Lorier',
-        'G-Shock', 'Victorinox', 'Bulova', 'Gruen', 'Elgin', 'Waltham'
-    ]
-    
-    brand = None
-    model = watch_full
-    
-    # First, check for "by [Brand]" or "from [Brand]" patterns
-    for b in brands:
-        by_pattern = f" by {b}"
-        from_pattern = f" from {b}"
-        
-        if by_pattern.lower() in watch_full.lower():
-            brand = b
-            # Remove the "by Brand" part from the model
-            model = re.sub(f' by {re.escape(b)}', '', watch_full, flags=re.IGNORECASE).strip()
-            break
-        elif from_pattern.lower() in watch_full.lower():
-            brand = b
-            # Remove the "from Brand" part from the model
-            model = re.sub(f' from {re.escape(b)}', '', watch_full, flags=re.IGNORECASE).strip()
-            break
-    
-    # If no "by/from" pattern found, check if it starts with a brand name
-    if not brand:
-        for b in brands:
-            if watch_full.lower().startswith(b.lower()):
-                brand = b
-                model = watch_full[len(b):].strip()
-                break
-    
-    # Fallback: use first word as brand (but this might catch descriptors)
-    if not brand:
-        parts = watch_full.split(maxsplit=1)
-        if len(parts) == 2:
-            brand = parts[0]
-            model = parts[1]
+                bisect.insort(postings.setdefault(owner, array('q')), entry, key=self.order_keys[column])
+        self.counts['entries'] += 1
+
+    def remove(self, faw_id):
+        if faw_id >= len(self.row_film) or not self.row_film[faw_id]:
+            return False
+        for column, owner in self._owners(faw_id):
+            entries, key, entry = self.postings[column][owner], self.order_keys[column], self._entry(column, faw_id)
+            i = bisect.bisect_left(entries, key(entry) if key else entry, key=key)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+        self.row_film[faw_id] = 0
+        self.counts['entries'] -= 1
+        return True
+
+    def page(self, search_column, term, fields, sort_field, descending, limit, after):
+        """Rows shaped like query_appearances' (fields..., sort value, faw_id)."""
+        key = self.order_keys[search_column]
+        postings = self.postings[search_column]
+        lists = [postings[owner] for owner in self.names[search_column].match(term) if postings.get(owner)]
+        if not lists:
+            return []
+        if after:
+            after = self._position(search_column, after)
+        windows = [_window(entries, key, after, descending, limit) for entries in lists]
+        if len(windows) == 1:
+            page = windows[0][::-1] if descending else windows[0]
         else:
-            brand = watch_full
-            model = watch_full
-    
-    if not character:
-        character = f"{actor.split()[-1]}"
-    
-    return {
-        'actor': actor,
-        'character': character,
-        'brand': brand,
-        'model': model,
-        'title': title,
-        'year': year,
-        'verification': 'Confirmed',
-        'narrative': 'Watch worn in film.'
-    }
+            # No list can contribute more than `limit` rows, so the page is among their windows
+            page = sorted(itertools.chain.from_iterable(windows), key=key, reverse=descending)[:limit]
+        page = list(page) if search_column == 'title' else [entry & (_FAW_SPAN - 1) for entry in page]
 
+        return list(zip(*(self.columns[name](page) for name in fields), self.columns[sort_field](page), page))
+
+    def stats(self):
+        top = heapq.nlargest(10, ((len(ids), brand_id) for brand_id, ids in self.postings['brand'].items() if ids))
+        return {
+            'films': self.counts['films'],
+            'actors': self.counts['actors'],
+            'brands': self.counts['brands'],
+            'entries': self.counts['entries'],
+            'top_brands': [{'brand': self.brand_name[brand_id], 'count': count} for count, brand_id in top]
+        }
+
+
+class ReadModel:
+    """Optional in-memory copy of the appearances that answers /api/query/*
+    pages and /api/stats without SQLite.
+
+    Inserts are folded in by catch_up() and deletes by remove(), both called
+    on the write paths before RESPONSE_CACHE is bumped; anything that rewrites
+    existing rows (merges, brand cleanups) calls invalidate(), which drops
+    the model and rebuilds it on a background thread. Until it is loaded, and
+    for connections on any other database (e.g. a snapshot), SQLite answers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+        self._stats = None
+        self._epoch = 0
+        self._loader = None
+        self.db_path = None
+        self.loads = 0
+        self.load_seconds = None
+        self.queries = 0
+        self.fallbacks = 0
+        self.appended = 0
+        self.removed = 0
+
+    def serves(self, conn):
+        columns = self._columns
+        return columns is not None and conn.db_path == columns.db_path
+
+    def load(self, db_path=None):
+        """Build the model from db_path (default DB_PATH) before returning."""
+        with self._lock:
+            self.db_path = db_path or DB_PATH
+            self._epoch += 1
+            self._columns = None
+        self._build()
+
+    def start(self, db_path=None):
+        """Build the model from db_path (default DB_PATH) on a background thread."""
+        with self._lock:
+            self.db_path = db_path or DB_PATH
+        self.invalidate()
+
+    def stop(self):
+        """Drop the model and stop maintaining it; SQLite answers everything again."""
+        with self._lock:
+            self.db_path = None
+            self._epoch += 1
+            self._columns = None
+
+    def invalidate(self):
+        with self._lock:
+            if self.db_path is None:
+                return
+            self._epoch += 1
+            self._columns = None
+            if self._loader is None:
+                self._loader = threading.Thread(target=self._build, name='read-model-loader', daemon=True)
+                self._loader.start()
+
+    def _build(self):
+        while True:
+            with self._lock:
+                epoch, db_path = self._epoch, self.db_path
+                if db_path is None:
+                    self._loader = None
+                    return
+            started = time.perf_counter()
+            try:
+                conn = connect(db_path)
+                try:
+                    columns = _ReadColumns(db_path)
+                    columns.read_new(conn)
+                    with self._lock:
+                        if epoch != self._epoch:
+                            continue  # rows were removed or rewritten while loading
+                        columns.read_new(conn)  # inserts committed while loading
+                        self._columns, self._stats, self._loader = columns, None, None
+                        self.loads += 1
+                        self.load_seconds = round(time.perf_counter() - started, 3)
+                        return
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                app.logger.error("Read model load failed: %s", e)
+                with self._lock:
+                    self._loader = None
+                return
+
+    def catch_up(self, conn):
+        """Fold appearances committed through conn into the model."""
+        if self._columns is None:
+            return
+        with self._lock:
+            columns = self._columns
+            if columns is not None and conn.db_path == columns.db_path:
+                self.appended += columns.read_new(conn)
+                self._stats = None
+
+    def remove(self, faw_id):
+        with self._lock:
+            if self._columns is None:
+                if self._loader is not None:
+                    self._epoch += 1  # the load in progress may already hold the row
+                return
+            if self._columns.remove(faw_id):
+                self.removed += 1
+                self._stats = None
+
+    def page(self, search_column, term, fields, sort_field, descending, limit, after):
+        """Answer a page of an /api/query/* lookup, or None to leave it to SQLite.
+
+        LIKE wildcards in the term and cursors of an unexpected type are left
+        to SQLite, which defines what they mean.
+        """
+        if (search_column, sort_field) not in READ_MODEL_ORDERS or '%' in term or '_' in term:
+            return None
+        with self._lock:
+            if self._columns is None:
+                return None
+            try:
+                rows = self._columns.page(search_column, term, fields, sort_field, descending, limit, after)
+            except TypeError:
+                self.fallbacks += 1
+                return None
+            self.queries += 1
+            return rows
+
+    def read_stats(self):
+        with self._lock:
+            if self._columns is None:
+                return None
+            if self._stats is None:
+                self._stats = self._columns.stats()
+            self.queries += 1
+            return self._stats
+
+    def stats(self):
+        with self._lock:
+            columns = self._columns
+            return {
+                'ready': columns is not None,
+                'loading': self._loader is not None,
+                'entries': columns.counts['entries'] if columns else None,
+                'loads': self.loads,
+                'load_seconds': self.load_seconds,
+                'queries': self.queries,
+                'fallbacks': self.fallbacks,
+                'appended': self.appended,
+                'removed': self.removed
+            }
+
+
+READ_MODEL = ReadModel()
+
+
+def query_fields(default_fields, args):
+    """The ?fields= named in args, checked against default_fields (which they default to)."""
+    if not args.get('fields'):
+        return default_fields
+    fields = [name.strip() for name in args['fields'].split(',') if name.strip()]
+    unknown = [name for name in fields if name not in default_fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def query_appearances(conn, search_column, term, default_fields, sort_field, descending, limit, args):
+    """Execute an /api/query/* lookup and return (sqlite cursor, field names).
+
+    Rows are ordered by (sort_field, faw_id); a ?cursor= from the previous
+    page (read from the query-string mapping args) is the last row's pair,
+    so each page is a range condition rather than an OFFSET. Only the
+    ?fields= requested are selected, and only the tables they need are
+    joined. Each row ends with the sort value and faw_id after the requested
+    fields. limit=None returns every match.
+    """
+    fields = query_fields(default_fields, args)
+
+    sort_expr, sort_alias = QUERY_FIELDS[sort_field]
+    aliases = {QUERY_FIELDS[name][1] for name in fields} | {sort_alias}
+    if len(term) < 3:
+        # The trigram index cannot match a term shorter than a trigram, so
+        # LIKE the joined column itself
+        search_expr, search_alias = QUERY_FIELDS[search_column]
+        match = f"{search_expr} LIKE ?"
+        aliases.add(search_alias)
+    else:
+        match = f"faw.faw_id IN (SELECT rowid FROM appearance_search WHERE {search_column} LIKE ?)"
+    if 'b' in aliases:
+        aliases.add('w')
+    joins = '\n'.join(join for alias, join in QUERY_JOINS if alias in aliases)
+
+    direction, compare = ('DESC', '<') if descending else ('ASC', '>')
+    sql = f"""
+        SELECT {', '.join(QUERY_FIELDS[name][0] for name in fields)}, {sort_expr}, faw.faw_id
+        FROM film_actor_watch faw
+        {joins}
+        WHERE {match}
+    """
+    params = [f'%{term}%']
+    if args.get('cursor'):
+        sql += f" AND ({sort_expr}, faw.faw_id) {compare} (?, ?)"
+        params.extend(decode_cursor(args['cursor']))
+    sql += f" ORDER BY {sort_expr} {direction}, faw.faw_id {direction}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
 
-def execute_insert(conn, data):
-    """Execute INSERT using parameterized queries with duplicate detection."""
     cursor = conn.cursor()
-    
-    try:
-        # Insert film
-        cursor.execute("INSERT OR IGNORE INTO films (title, year) VALUES (?, ?)",
-                      (data['title'], data['year']))
-        
-        # Insert brand
-        cursor.execute("INSERT OR IGNORE INTO brands (brand_name) VALUES (?)",
-                      (data['brand'],))
-        
-        # Get brand_id
-        cursor.execute("SELECT brand_id FROM brands WHERE brand_name = ?",
-                      (data['brand'],))
-        brand_id = cursor.fetchone()[0]
-        
-        # Insert watch
-        cursor.execute("INSERT OR IGNORE INTO watches (brand_id, model_reference, verification_level) VALUES (?, ?, ?)",
-                      (brand_id, data['model'], data['verification']))
-        
-        # Insert actor
-        cursor.execute("INSERT OR IGNORE INTO actors (actor_name) VALUES (?)",
-                      (data['actor'],))
-        
-        # Get IDs
-        cursor.execute("SELECT film_id FROM films WHERE title = ? AND year = ?",
-                      (data['title'], data['year']))
-        film_id = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT actor_id FROM actors WHERE actor_name = ?",
-                      (data['actor'],))
-        actor_id = cursor.fetchone()[0]
-        
-        cursor.execute("""SELECT w.watch_id FROM watches w 
-                         JOIN brands b ON w.brand_id = b.brand_id 
-                         WHERE b.brand_name = ? AND w.model_reference = ?""",
-                      (data['brand'], data['model']))
-        watch_id = cursor.fetchone()[0]
-        
-        # CHECK FOR DUPLICATE: Does this film-actor-watch combination already exist?
-        cursor.execute("""
-            SELECT faw_id FROM film_actor_watch 
-            WHERE film_id = ? AND actor_id = ? AND watch_id = ?
-        """, (film_id, actor_id, watch_id))
-        
-        existing = cursor.fetchone()
-        if existing:
-            conn.rollback()
-            raise Exception(f"Duplicate entry: {data['actor']} wearing {data['brand']} {data['model']} in {data['title']} already exists in the database.")
-        
-        # Check if character name already exists
-        cursor.execute("SELECT character_id FROM characters WHERE character_name = ? LIMIT 1", 
-                      (data['character'],))
-        existing_char = cursor.fetchone()
-      
-        if existing_char:
-            character_id = existing_char[0]
-        else:
-            cursor.execute("INSERT INTO characters (character_name) VALUES (?)",
-                          (data['character'],))
-            cursor.execute("SELECT last_insert_rowid()")
-            character_id = cursor.fetchone()[0]
-        
-        # Insert relationship
-        cursor.execute("""INSERT INTO film_actor_watch 
-                         (film_id, actor_id, character_id, watch_id, narrative_role) 
-                         VALUES (?, ?, ?, ?, ?)""",
-                      (film_id, actor_id, character_id, watch_id, data['narrative']))
-        
-        conn.commit()
+    cursor.execute(sql, params)
+    return cursor, fields
+
+
+def wants_stream():
+    """True for ?stream=1 or when the client prefers application/x-ndjson."""
+    if request.args.get('stream') in ('1', 'true'):
         return True
+    best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+    return best == 'application/x-ndjson'
+
+
+def stream_rows(cursor, fields, envelope, list_key):
+    """Stream cursor rows in fetchmany batches so memory stays flat however many match.
+
+    NDJSON clients get one object per line; everyone else gets the usual JSON
+    document, written incrementally with the count at the end.
+    """
+    ndjson = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+    width = len(fields)
+    trace = current_trace()
+
+    def generate():
+        count = 0
+        if not ndjson:
+            yield json.dumps(envelope)[:-1] + f', "{list_key}": ['
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            chunk = []
+            for row in rows:
+                item = json.dumps(dict(zip(fields, row[:width])))
+                if ndjson:
+                    chunk.append(item + '\n')
+                else:
+                    chunk.append(',' + item if count else item)
+                count += 1
+            chunk = ''.join(chunk)
+            if trace is not None:
+                trace.bytes += len(chunk)
+            yield chunk
+        if not ndjson:
+            yield f'], "count": {count}}}'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def appearance_page(conn, args, search_column, term, default_fields, sort_field, descending, envelope, list_key,
+                    read_model=True):
+    """Build one page of an /api/query/* answer, with next_cursor for the page after it."""
+    limit = min(max(1, args.get('limit', type=int) or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+    rows = None
+    if read_model and READ_MODEL.serves(conn):
+        fields = query_fields(default_fields, args)
+        after = decode_cursor(args['cursor']) if args.get('cursor') else None
+        rows = READ_MODEL.page(search_column, term, fields, sort_field, descending, limit + 1, after)
+    if rows is None:
+        cursor, fields = query_appearances(conn, search_column, term, default_fields,
+                                           sort_field, descending, limit + 1, args)
+        rows = cursor.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+
+    items = [dict(zip(fields, row)) for row in rows]
+    return {**envelope, 'count': len(items), list_key: items, 'next_cursor': next_cursor}
+
+
+# /api/query/<kind>: how each kind of lookup searches, what it returns and in which order
+APPEARANCE_QUERIES = {
+    'actor': {'search_column': 'actor', 'default_fields': ['title', 'year', 'brand', 'model', 'character', 'narrative'],
+              'sort_field': 'year', 'descending': True, 'list_key': 'films'},
+    'brand': {'search_column': 'brand', 'default_fields': ['title', 'year', 'actor', 'model', 'character', 'narrative'],
+              'sort_field': 'year', 'descending': True, 'list_key': 'films'},
+    'film': {'search_column': 'title', 'default_fields': ['title', 'year', 'actor', 'brand', 'model', 'character', 'narrative'],
+             'sort_field': 'actor', 'descending': False, 'list_key': 'watches'},
+}
+
+
+def appearance_response(search_column, term, default_fields, sort_field, descending, envelope, list_key):
+    """Answer an /api/query/* request as one page, or as a stream of every match."""
+    if wants_stream():
+        limit = request.args.get('limit', type=int)
+        cursor, fields = query_appearances(get_db(), search_column, term, default_fields,
+                                           sort_field, descending, max(1, limit) if limit else None,
+                                           request.args)
+        return stream_rows(cursor, fields, envelope, list_key)
+
+    return jsonify(appearance_page(get_db(), request.args, search_column, term, default_fields,
+                                   sort_field, descending, envelope, list_key))
+
+
+@app.route('/api/query/actor/<actor_name>', methods=['GET'])
+@snapshot_read
+@cached_response
+def query_actor(actor_name):
+    """Query all watches worn by an actor."""
+    try:
+        return appearance_response(term=actor_name, envelope={'success': True, 'actor': actor_name},
+                                   **APPEARANCE_QUERIES['actor'])
         
     except Exception as e:
-        conn.rollback()
-        raise Exception(f"{str(e)}")
+        return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/add', methods=['POST'])
-def add_entry():
-    """Add a new entry to the database."""
+@app.route('/api/query/brand/<brand_name>', methods=['GET'])
+@snapshot_read
+@cached_response
+def query_brand(brand_name):
+    """Query all films featuring a brand."""
     try:
-        data = request.json
-        entry_text = data.get('entry', '')
-        narrative = data.get('narrative', 'Watch worn in film.')
-        
-        if not entry_text:
-            return jsonify({'error': 'Entry text is required'}), 400
+        return appearance_response(term=brand_name, envelope={'success': True, 'brand': brand_name},
+                                   **APPEARANCE_QUERIES['brand'])
         
-        parsed = parse_entry(entry_text)
-        parsed['narrative'] = narrative
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/query/film/<film_title>', methods=['GET'])
+@snapshot_read
+@cached_response
+def query_film(film_title):
+    """Query all watches in a film."""
+    try:
+        return appearance_response(term=film_title, envelope={'success': True, 'film': film_title},
+                                   **APPEARANCE_QUERIES['film'])
         
-        conn = sqlite3.connect(DB_PATH)
-        execute_insert(conn, parsed)
-        conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+SEARCH_MAX_LIMIT = 500
+
+# bm25 weights for (actor, character, brand, model, title)
+SEARCH_WEIGHTS = (10.0, 4.0, 6.0, 3.0, 8.0)
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 MATCH expression: every word of 3+ characters
+    must appear somewhere (as a prefix or any other substring)."""
+    words = [word.replace('"', '""') for word in text.split() if len(word) >= 3]
+    return ' AND '.join(f'"{word}"' for word in words)
+
+
+def search_appearances(conn, match, limit):
+    """Run an FTS5 MATCH expression and return the best `limit` appearances, best first."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT faw.faw_id, f.title, f.year, a.actor_name, c.character_name,
+               b.brand_name, w.model_reference, faw.narrative_role, hits.score
+        FROM (SELECT rowid, bm25(appearance_search, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score
+              FROM appearance_search
+              WHERE appearance_search MATCH ?
+              ORDER BY score
+              LIMIT ?) hits
+        JOIN film_actor_watch faw ON faw.faw_id = hits.rowid
+        JOIN films f ON faw.film_id = f.film_id
+        JOIN actors a ON faw.actor_id = a.actor_id
+        JOIN characters c ON faw.character_id = c.character_id
+        JOIN watches w ON faw.watch_id = w.watch_id
+        JOIN brands b ON w.brand_id = b.brand_id
+        ORDER BY hits.score
+    """, (match, limit))
+
+    results = []
+    for row in cursor.fetchall():
+        results.append({
+            'id': row[0],
+            'title': row[1],
+            'year': row[2],
+            'actor': row[3],
+            'character': row[4],
+            'brand': row[5],
+            'model': row[6],
+            'narrative': row[7],
+            # bm25 is lower-is-better; flip it so clients can sort descending
+            'score': round(-row[8], 4)
+        })
+    return results
+
+
+@app.route('/api/search', methods=['GET'])
+@snapshot_read
+@cached_response
+def search():
+    """Ranked full-text search across actors, characters, brands, models and films."""
+    try:
+        q = request.args.get('q', '')
+        limit = min(max(1, request.args.get('limit', 50, type=int)), SEARCH_MAX_LIMIT)
+        match = fts_query(q)
+        if not match:
+            return jsonify({'error': 'Search terms need at least 3 characters'}), 400
+
+        results = search_appearances(get_db(), match, limit)
         
         return jsonify({
             'success': True,
-            'message': f"Successfully added: {parsed['actor']} wearing {parsed['brand']} {parsed['model']} in {parsed['title']} ({parsed['year']})",
-            'data': parsed
+            'query': q,
+            'count': len(results),
+            'results': results
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/query/actor/<actor_name>', methods=['GET'])
-def query_actor(actor_name):
-    """Query all watches worn by an actor."""
+def read_stats(conn, read_model=True):
+    """Read the totals and top ten brands from the trigger-maintained counters
+    (or from READ_MODEL when it is loaded)."""
+    if read_model and READ_MODEL.serves(conn):
+        stats = READ_MODEL.read_stats()
+        if stats is not None:
+            return stats
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT name, value FROM stats")
+    counts = dict(cursor.fetchall())
+
+    cursor.execute("""
+        SELECT b.brand_name, s.appearances
+        FROM brand_stats s
+        JOIN brands b ON s.brand_id = b.brand_id
+        WHERE s.appearances > 0
+        ORDER BY s.appearances DESC
+        LIMIT 10
+    """)
+    top_brands = [{'brand': row[0], 'count': row[1]} for row in cursor.fetchall()]
+
+    return {
+        'films': counts.get('films', 0),
+        'actors': counts.get('actors', 0),
+        'brands': counts.get('brands', 0),
+        'entries': counts.get('entries', 0),
+        'top_brands': top_brands
+    }
+
+
+@app.route('/api/stats', methods=['GET'])
+@snapshot_read
+@cached_response
+def get_stats():
+    """Get database statistics from the trigger-maintained counters."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT f.title, f.year, b.brand_name, w.model_reference, 
-                   c.character_name, faw.narrative_role
-            FROM film_actor_watch faw
-            JOIN films f ON faw.film_id = f.film_id
-            JOIN actors a ON faw.actor_id = a.actor_id
-            JOIN characters c ON faw.character_id = c.character_id
-            JOIN watches w ON faw.watch_id = w.watch_id
-            JOIN brands b ON w.brand_id = b.brand_id
-            WHERE a.actor_name LIKE ?
-            ORDER BY f.year DESC
-        """, (f'%{actor_name}%',))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        films = []
-        for row in results:
-            films.append({
-                'title': row[0],
-                'year': row[1],
-                'brand': row[2],
-                'model': row[3],
-                'character': row[4],
-                'narrative': row[5]
-            })
-        
         return jsonify({
             'success': True,
-            'actor': actor_name,
-            'count': len(films),
-            'films': films
+            'stats': read_stats(get_db())
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/query/brand/<brand_name>', methods=['GET'])
-def query_brand(brand_name):
-    """Query all films featuring a brand."""
+QUERY_BATCH_MAX = 50
+
+
+def _batch_subquery(query):
+    """Check one /api/query/batch sub-query and return its dedup key."""
+    if not isinstance(query, dict):
+        raise ValueError('Each query must be an object')
+    kind = query.get('type')
+    if kind != 'stats' and kind != 'search' and kind not in APPEARANCE_QUERIES:
+        raise ValueError(f"Unknown type {kind!r} (expected one of {', '.join([*APPEARANCE_QUERIES, 'search', 'stats'])})")
+    if kind == 'stats':
+        return (kind,)
+
+    term = query.get('term')
+    if not isinstance(term, str) or not term.strip():
+        raise ValueError('"term" is required')
+    limit = query.get('limit')
+    if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool)):
+        raise ValueError('"limit" must be an integer')
+    if kind == 'search':
+        return (kind, term, min(max(1, limit or 50), SEARCH_MAX_LIMIT))
+
+    fields = query.get('fields')
+    if isinstance(fields, list):
+        fields = ','.join(map(str, fields))
+    if fields is not None and not isinstance(fields, str):
+        raise ValueError('"fields" must be a list or a comma-separated string')
+    cursor = query.get('cursor')
+    if cursor is not None and not isinstance(cursor, str):
+        raise ValueError('"cursor" must be a string')
+    return (kind, term, min(max(1, limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE), fields or None, cursor)
+
+
+def _run_subquery(conn, key):
+    """Answer one sub-query as its own endpoint would."""
+    kind = key[0]
+    if kind == 'stats':
+        return {'success': True, 'stats': read_stats(conn, read_model=False)}
+    if kind == 'search':
+        _, q, limit = key
+        match = fts_query(q)
+        if not match:
+            raise ValueError('Search terms need at least 3 characters')
+        results = search_appearances(conn, match, limit)
+        return {'success': True, 'query': q, 'count': len(results), 'results': results}
+
+    _, term, limit, fields, cursor = key
+    args = MultiDict({'limit': limit})
+    if fields:
+        args['fields'] = fields
+    if cursor:
+        args['cursor'] = cursor
+    return appearance_page(conn, args, term=term, envelope={'success': True, kind: term}, read_model=False,
+                           **APPEARANCE_QUERIES[kind])
+
+
+@app.route('/api/query/batch', methods=['POST'])
+@snapshot_read
+def query_batch():
+    """Answer several lookups in one request, e.g. every shortcode on a page.
+
+    Takes {"queries": [...]} (or the bare list) of up to QUERY_BATCH_MAX
+    {"id", "type", "term", "limit", "fields", "cursor"} objects, where type
+    is actor, brand, film, search or stats. All of them read one SQLite
+    transaction, so they see the same data; the in-memory read model is not
+    used, as it can be a commit ahead of or behind that transaction.
+    Identical sub-queries run once. Results are keyed by id (default: the
+    query's position); a failing sub-query gets {"error"} without failing
+    the rest.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
+        payload = request.get_json(silent=True)
+        queries = payload.get('queries') if isinstance(payload, dict) else payload
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'Expected {"queries": [...]} or a non-empty JSON array'}), 400
+        if len(queries) > QUERY_BATCH_MAX:
+            return jsonify({'error': f'At most {QUERY_BATCH_MAX} queries per request'}), 400
+
+        keys = {}
+        for index, query in enumerate(queries):
+            query_id = query.get('id', index) if isinstance(query, dict) else index
+            if not isinstance(query_id, (str, int)) or isinstance(query_id, bool):
+                return jsonify({'error': f'Query {index}: "id" must be a string or an integer'}), 400
+            query_id = str(query_id)
+            if query_id in keys:
+                return jsonify({'error': f'Duplicate query id {query_id!r}'}), 400
+            try:
+                keys[query_id] = _batch_subquery(query)
+            except ValueError as e:
+                keys[query_id] = e
+
+        answers = {}
+        conn = get_db()
+        conn.execute("BEGIN")
+        try:
+            for key in keys.values():
+                if isinstance(key, ValueError) or key in answers:
+                    continue
+                try:
+                    answers[key] = _run_subquery(conn, key)
+                except (ValueError, sqlite3.OperationalError) as e:
+                    answers[key] = {'error': str(e)}
+        finally:
+            conn.rollback()
+
+        return jsonify({
+            'success': True,
+            'count': len(keys),
+            'executed': len(answers),
+            'results': {query_id: {'error': str(key)} if isinstance(key, ValueError) else answers[key]
+                        for query_id, key in keys.items()}
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def verify_stats(conn, repair=True):
+    """Recount everything behind /api/stats and compare it with the counters.
+
+    Returns {counter: {'stored': n, 'actual': m}} for each counter that has
+    drifted (brand counters are keyed "brand:<id>"). With repair=True the
+    counters are reset to the recount. The write lock is held throughout so
+    the recount and the counters describe the same snapshot.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("""
+            SELECT 'films', COUNT(*) FROM films
+            UNION ALL SELECT 'actors', COUNT(*) FROM actors
+            UNION ALL SELECT 'brands', COUNT(*) FROM brands
+            UNION ALL SELECT 'entries', COUNT(*) FROM film_actor_watch
+        """)
+        actual = dict(cursor.fetchall())
         cursor.execute("""
-            SELECT f.title, f.year, a.actor_name, w.model_reference,
-                   c.character_name, faw.narrative_role
+            SELECT w.brand_id, COUNT(*)
             FROM film_actor_watch faw
-            JOIN films f ON faw.film_id = f.film_id
-            JOIN actors a ON faw.actor_id = a.actor_id
-            JOIN characters c ON faw.character_id = c.character_id
             JOIN watches w ON faw.watch_id = w.watch_id
-            JOIN brands b ON w.brand_id = b.brand_id
-            WHERE b.brand_name LIKE ?
-            ORDER BY f.year DESC
-        """, (f'%{brand_name}%',))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        films = []
-        for row in results:
-            films.append({
-                'title': row[0],
-                'year': row[1],
-                'actor': row[2],
-                'model': row[3],
-                'character': row[4],
-                'narrative': row[5]
-            })
+            GROUP BY w.brand_id
+        """)
+        actual_brands = dict(cursor.fetchall())
+
+        cursor.execute("SELECT name, value FROM stats")
+        stored = dict(cursor.fetchall())
+        cursor.execute("SELECT brand_id, appearances FROM brand_stats WHERE appearances != 0")
+        stored_brands = dict(cursor.fetchall())
+
+        drift = {}
+        for name, value in actual.items():
+            if stored.get(name) != value:
+                drift[name] = {'stored': stored.get(name), 'actual': value}
+        for brand_id in set(actual_brands) | set(stored_brands):
+            if stored_brands.get(brand_id, 0) != actual_brands.get(brand_id, 0):
+                drift[f'brand:{brand_id}'] = {'stored': stored_brands.get(brand_id, 0),
+                                              'actual': actual_brands.get(brand_id, 0)}
+
+        if drift and repair:
+            cursor.executemany("INSERT OR REPLACE INTO stats (name, value) VALUES (?, ?)", actual.items())
+            cursor.execute("DELETE FROM brand_stats")
+            cursor.executemany("INSERT INTO brand_stats (brand_id, appearances) VALUES (?, ?)",
+                               actual_brands.items())
+        conn.commit()
+        if drift and repair:
+            RESPONSE_CACHE.bump()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return drift
+
+
+STATS_VERIFY_INTERVAL = 3600
+
+# Outcome of the most recent verify_stats run, reported by /api/stats/verify
+STATS_VERIFICATION = {'checked_at': None, 'drift': None}
+
+
+def _record_verification(drift):
+    STATS_VERIFICATION['checked_at'] = time.time()
+    STATS_VERIFICATION['drift'] = drift
+    if drift:
+        app.logger.warning("Stats counters drifted and were repaired: %s", drift)
+
+
+def start_stats_verifier(interval=STATS_VERIFY_INTERVAL, stop=None):
+    """Reconcile the stats counters every `interval` seconds on a daemon thread,
+    until the `stop` event is set."""
+    stop = stop or threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            conn = POOL.acquire()
+            try:
+                _record_verification(verify_stats(conn))
+            except sqlite3.Error as e:
+                app.logger.error("Stats verification failed: %s", e)
+            finally:
+                POOL.release(conn)
+
+    thread = threading.Thread(target=run, name='stats-verifier', daemon=True)
+    thread.start()
+    return thread
+
+
+@app.route('/api/stats/verify', methods=['GET', 'POST'])
+def verify_stats_endpoint():
+    """GET reports the last scheduled check; POST recounts now and repairs any drift."""
+    try:
+        if request.method == 'POST':
+            _record_verification(verify_stats(get_db()))
         
         return jsonify({
             'success': True,
-            'brand': brand_name,
-            'count': len(films),
-            'films': films
+            'checked_at': STATS_VERIFICATION['checked_at'],
+            'drift': STATS_VERIFICATION['drift']
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/query/film/<film_title>', methods=['GET'])
-def query_film(film_title):
-    """Query all watches in a film."""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT f.title, f.year, a.actor_name, b.brand_name, 
-                   w.model_reference, c.character_name, faw.narrative_role
-            FROM film_actor_watch faw
-            JOIN films f ON faw.film_id = f.film_id
-            JOIN actors a ON faw.actor_id = a.actor_id
-            JOIN characters c ON faw.character_id = c.character_id
-            JOIN watches w ON faw.watch_id = w.watch_id
-            JOIN brands b ON w.brand_id = b.brand_id
-            WHERE f.title LIKE ?
-            ORDER BY a.actor_name
-        """, (f'%{film_title}%',))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        watches = []
-        for row in results:
-            watches.append({
-                'title': row[0],
-                'year': row[1],
-                'actor': row[2],
-                'brand': row[3],
-                'model': row[4],
-                'character': row[5],
-                'narrative': row[6]
-            })
-        
-        return jsonify({
-            'success': True,
-            'film': film_title,
-            'count': len(watches),
-            'watches': watches
-        })
-        
+# Tables in the change log (migration 7) -> (id column, columns served with each upsert)
+CHANGE_TABLES = {
+    'films': ('film_id', ('title', 'year')),
+    'actors': ('actor_id', ('actor_name',)),
+    'characters': ('character_id', ('character_name', 'film_id', 'actor_id')),
+    'brands': ('brand_id', ('brand_name',)),
+    'watches': ('watch_id', ('brand_id', 'model_reference', 'verification_level')),
+    'sources': ('source_id', ('source_type', 'title', 'publisher', 'url', 'date_published')),
+    'film_actor_watch': ('faw_id', ('film_id', 'actor_id', 'character_id', 'watch_id', 'narrative_role',
+                                    'source_id', 'confidence')),
+}
+
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
+
+# Longest ?wait= a long-poll may ask for, in seconds
+CHANGES_MAX_WAIT = 30
+
+# How often a long-poll re-reads the log for writes made by other processes
+CHANGES_POLL_SECONDS = 1.0
+
+# Compaction drops superseded entries every interval; tombstones are kept this long
+CHANGES_COMPACT_INTERVAL = 3600
+CHANGES_TOMBSTONE_SECONDS = 30 * 24 * 3600
+
+
+class ChangeFeed:
+    """Wakes /api/changes long-polls when this process commits a write.
+
+    The log itself is written by triggers; the write paths call notify()
+    after their commit (next to RESPONSE_CACHE.bump()). Writes from other
+    processes are picked up by the waiters re-reading every
+    CHANGES_POLL_SECONDS.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.generation = 0
+        self.waiting = 0
+
+    def notify(self):
+        with self._cond:
+            self.generation += 1
+            self._cond.notify_all()
+
+    def wait(self, generation, timeout):
+        """Block until a write after `generation` or for `timeout` seconds."""
+        with self._cond:
+            self.waiting += 1
+            try:
+                self._cond.wait_for(lambda: self.generation != generation, timeout)
+            finally:
+                self.waiting -= 1
+
+    def stats(self):
+        with self._cond:
+            return {'generation': self.generation, 'waiting': self.waiting}
+
+
+CHANGE_FEED = ChangeFeed()
+
+
+def _changed_rows(cursor, table, ids):
+    """Current values of the given rows of table, as {id: {column: value}}."""
+    id_column, columns = CHANGE_TABLES[table]
+    rows = {}
+    for i in range(0, len(ids), _BULK_LOOKUP_SIZE):
+        part = ids[i:i + _BULK_LOOKUP_SIZE]
+        cursor.execute(f"SELECT {id_column}, {', '.join(columns)} FROM {table} "
+                       f"WHERE {id_column} IN ({', '.join('?' * len(part))})", part)
+        for row_id, *values in cursor.fetchall():
+            rows[row_id] = dict(zip(columns, values))
+    return rows
+
+
+def changes_compacted(since, floor, resync_floor=None):
+    """Whether a replica at `since` may have missed tombstones that compaction dropped.
+
+    Since 0 never has: a full sync has no rows to delete. Nor has a full
+    sync paging on below the floor, which passes back the floor its first
+    page reported as resync_floor.
+    """
+    return 0 < since < floor and resync_floor != floor
+
+
+def read_changes(conn, since, limit, resync_floor=None):
+    """One page of the change log after seq `since`, in seq order.
+
+    Inserts and updates are both served as upserts (compaction can leave a
+    new row with only its update), and each carries the row as it is now, not as it was at that seq, so
+    a row changed twice may be served twice with the same values; applying
+    a page is idempotent. An upsert whose row has since been deleted is
+    served as a delete. The page, the rows and `latest` are read in one
+    transaction. If changes_compacted() holds, the changes list is empty
+    and the caller must answer 410.
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("SELECT value FROM changes_state WHERE name = 'floor'")
+        floor = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'changes'), 0)")
+        latest = cursor.fetchone()[0]
+        entries = []
+        if not changes_compacted(since, floor, resync_floor):
+            cursor.execute("SELECT seq, table_name, row_id, op FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                           (since, limit))
+            entries = cursor.fetchall()
+
+        upserted = {}
+        for _, table, row_id, op in entries:
+            if op != 'delete':
+                upserted.setdefault(table, []).append(row_id)
+        rows = {table: _changed_rows(cursor, table, ids) for table, ids in upserted.items()}
+    finally:
+        # Through the cursor, so a long-poll's wait is not timed as part of the ROLLBACK
+        cursor.execute("ROLLBACK")
+
+    changes = []
+    for seq, table, row_id, op in entries:
+        row = rows[table].get(row_id) if op != 'delete' else None
+        changes.append({'seq': seq, 'table': table, 'id': row_id,
+                        'op': 'delete' if row is None else 'upsert', 'row': row})
+
+    return {
+        'success': True,
+        'since': since,
+        'next_since': changes[-1]['seq'] if changes else since,
+        'latest': latest,
+        'floor': floor,
+        'count': len(changes),
+        'more': bool(changes) and changes[-1]['seq'] < latest,
+        'changes': changes
+    }
+
+
+def compact_changes(conn, tombstone_seconds=CHANGES_TOMBSTONE_SECONDS):
+    """Drop change-log entries no replica needs and return what was removed.
+
+    An entry is superseded once the same row has a later one: any reader
+    behind it will still get the later entry, so dropping it is always
+    safe. Ids are never reused, so only rows updated or deleted since the
+    last run can have one, and a run with none of those does not scan the
+    log. Replicas do lose the order rows first appeared in (an appearance
+    can come before a film renamed after it), so they should apply a page
+    before checking foreign keys. Delete entries older than
+    tombstone_seconds are dropped as well, and the floor is raised past
+    them (see changes_compacted).
+    """
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("SELECT value FROM changes_state WHERE name = 'compacted'")
+        compacted = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM changes")
+        latest = cursor.fetchone()[0]
+        cursor.execute("SELECT 1 FROM changes WHERE seq > ? AND op != 'insert' LIMIT 1", (compacted,))
+        superseded = 0
+        if cursor.fetchone():
+            # CROSS JOIN keeps the log as the outer loop: one scan, probing the few changed rows
+            cursor.execute("""
+                DELETE FROM changes WHERE seq IN (
+                    WITH changed AS MATERIALIZED (
+                        SELECT table_name, row_id, MAX(seq) AS last_seq FROM changes
+                        WHERE seq > ? AND op != 'insert'
+                        GROUP BY table_name, row_id
+                    )
+                    SELECT c.seq FROM changes c
+                    CROSS JOIN changed t ON c.table_name = t.table_name AND c.row_id = t.row_id
+                    WHERE c.seq < t.last_seq
+                )
+            """, (compacted,))
+            superseded = cursor.rowcount
+        cursor.execute("UPDATE changes_state SET value = ? WHERE name = 'compacted'", (latest,))
+
+        cursor.execute("DELETE FROM changes WHERE op = 'delete' AND changed_at < ? RETURNING seq",
+                       (int(time.time()) - tombstone_seconds,))
+        expired = [row[0] for row in cursor.fetchall()]
+        if expired:
+            cursor.execute("UPDATE changes_state SET value = MAX(value, ?) WHERE name = 'floor'", (max(expired),))
+
+        cursor.execute("SELECT value FROM changes_state WHERE name = 'floor'")
+        floor = cursor.fetchone()[0]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {'superseded': superseded, 'expired_tombstones': len(expired), 'floor': floor}
+
+
+def start_change_compactor(interval=CHANGES_COMPACT_INTERVAL, stop=None):
+    """Compact the change log every `interval` seconds on a daemon thread,
+    until the `stop` event is set."""
+    stop = stop or threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            conn = POOL.acquire()
+            try:
+                app.logger.info("Compacted the change log: %s", compact_changes(conn))
+            except sqlite3.Error as e:
+                app.logger.error("Change log compaction failed: %s", e)
+            finally:
+                POOL.release(conn)
+
+    thread = threading.Thread(target=run, name='change-compactor', daemon=True)
+    thread.start()
+    return thread
+
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """Rows changed after ?since=<seq> (0, the default, is a full sync), oldest first.
+
+    Follow next_since while `more` is true; ?limit= sets the page size.
+    With ?wait=<seconds> (up to CHANGES_MAX_WAIT) an empty page is held
+    until something changes or the wait runs out. A since below the
+    compaction floor gets 410 Gone, and the replica must resync from 0,
+    passing the floor of its first page back as ?floor= until it has
+    caught up. Never cached or served from a snapshot.
+    """
+    try:
+        since = max(0, request.args.get('since', 0, type=int))
+        resync_floor = request.args.get('floor', type=int)
+        limit = min(max(1, request.args.get('limit', CHANGES_PAGE_SIZE, type=int)), CHANGES_MAX_PAGE_SIZE)
+        wait = min(max(0.0, request.args.get('wait', 0, type=float)), CHANGES_MAX_WAIT)
+
+        conn = get_db()
+        deadline = time.monotonic() + wait
+        while True:
+            # Read the generation first, so a commit landing during the read still wakes us
+            generation = CHANGE_FEED.generation
+            page = read_changes(conn, since, limit, resync_floor)
+            compacted = changes_compacted(since, page['floor'], resync_floor)
+            remaining = deadline - time.monotonic()
+            if page['changes'] or compacted or remaining <= 0:
+                break
+            CHANGE_FEED.wait(generation, min(remaining, CHANGES_POLL_SECONDS))
+
+        if compacted:
+            return jsonify({
+                'error': f'Changes up to {page["floor"]} have been compacted; resync from since=0',
+                'floor': page['floor']
+            }), 410
+
+        return jsonify(page)
+
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
-@app.route('/api/stats', methods=['GET'])
-def get_stats():
-    """Get database statistics."""
+@app.route('/api/changes/compact', methods=['POST'])
+def compact_changes_endpoint():
+    """Compact the change log now (see compact_changes)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM films")
-        film_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM actors")
-        actor_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM brands")
-        brand_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM film_actor_watch")
-        entry_count = cursor.fetchone()[0]
-        
-        cursor.execute("""
-            SELECT b.brand_name, COUNT(*) as count
-            FROM film_actor_watch faw
-            JOIN watches w ON faw.watch_id = w.watch_id
-            JOIN brands b ON w.brand_id = b.brand_id
-            GROUP BY b.brand_name
-            ORDER BY count DESC
-            LIMIT 10
-        """)
-        top_brands = [{'brand': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'stats': {
-                'films': film_count,
-                'actors': actor_count,
-                'brands': brand_count,
-                'entries': entry_count,
-                'top_brands': top_brands
-            }
-        })
-        
+        return jsonify({'success': True, **compact_changes(get_db())})
+
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
+def snapshot_info():
+    version = snapshot_version() if SNAPSHOT_PATH else None
+    if version is None:
+        return {'path': SNAPSHOT_PATH, 'taken_at': None, 'age_seconds': None}
+    taken_at = version[2] / 1e9
+    return {
+        'path': SNAPSHOT_PATH,
+        'taken_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(taken_at)),
+        'age_seconds': round(time.time() - taken_at, 1)
+    }
+
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Report hit/miss counters for the in-process caches."""
+    return jsonify({
+        'success': True,
+        'id_cache': ID_CACHE.stats(),
+        'response_cache': RESPONSE_CACHE.stats(),
+        'similarity_index': SIMILARITY_INDEX.stats(),
+        'suggest_index': SUGGEST_INDEX.stats(),
+        'change_feed': CHANGE_FEED.stats(),
+        'read_model': READ_MODEL.stats(),
+        'parse_cache': ENTRY_PARSER.cache_info()._asdict(),
+        'snapshot': snapshot_info()
+    })
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Request, SQL and serialization metrics in Prometheus text format."""
+    return Response(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/metrics/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """The most recent statements slower than SLOW_QUERY_MS, with bound parameters."""
+    return jsonify({
+        'success': True,
+        'threshold_ms': SLOW_QUERY_MS,
+        'queries': METRICS.slow_queries()
+    })
+
+
 @app.route('/')
 def index():
     """Health check endpoint."""
@@ -423,10 +3538,24 @@ def index():
         'message': 'Film Watch Database API',
         'endpoints': [
             'POST /api/add',
+            'POST /api/add/batch',
+            'POST /api/add_structured',
             'GET /api/query/actor/<name>',
             'GET /api/query/brand/<name>',
             'GET /api/query/film/<title>',
+            'POST /api/query/batch',
+            'GET /api/search?q=<text>',
+            'GET /api/suggest?type=<type>&prefix=<text>',
+            'GET /api/changes?since=<seq>&wait=<seconds>',
+            'POST /api/changes/compact',
             'GET /api/stats',
+            'GET|POST /api/stats/verify',
+            'GET /api/cache-stats',
+            'GET /api/metrics',
+            'GET /api/metrics/slow-queries',
+            'GET /api/ingest/<id>',
+            'GET /api/ingest-stats',
+            'GET /api/duplicates?kind=<kind>',
             'POST /api/cleanup-bad-brands',
             'POST /api/cleanup-duplicate-characters',
             'POST /api/cleanup-duplicate-actors',
@@ -440,38 +3569,46 @@ def serve_ui():
     return send_from_directory('.', 'web_interface.html')
 
 
+def find_similar_entries(conn, actor_name, film_title):
+    """Return appearances whose actor and film title contain the given text."""
+    if min(len(actor_name), len(film_title)) < 3:
+        # Too short for the trigram index
+        match = "a.actor_name LIKE ? AND f.title LIKE ?"
+    else:
+        match = "faw.faw_id IN (SELECT rowid FROM appearance_search WHERE actor LIKE ? AND title LIKE ?)"
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT faw.faw_id, f.title, f.year, a.actor_name, 
+               c.character_name, b.brand_name, w.model_reference
+        FROM film_actor_watch faw
+        JOIN films f ON faw.film_id = f.film_id
+        JOIN actors a ON faw.actor_id = a.actor_id
+        JOIN characters c ON faw.character_id = c.character_id
+        JOIN watches w ON faw.watch_id = w.watch_id
+        JOIN brands b ON w.brand_id = b.brand_id
+        WHERE {match}
+        ORDER BY faw.faw_id
+    """, (f'%{actor_name}%', f'%{film_title}%'))
+
+    entries = []
+    for row in cursor.fetchall():
+        entries.append({
+            'id': row[0],
+            'film': f"{row[1]} ({row[2]})",
+            'actor': row[3],
+            'character': row[4],
+            'watch': f"{row[5]} {row[6]}"
+        })
+    return entries
+
+
 @app.route('/api/find-similar/<actor_name>/<film_title>', methods=['GET'])
+@snapshot_read
+@cached_response
 def find_similar(actor_name, film_title):
     """Find potentially duplicate entries for the same actor in the same film."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT faw.faw_id, f.title, f.year, a.actor_name, 
-                   c.character_name, b.brand_name, w.model_reference
-            FROM film_actor_watch faw
-            JOIN films f ON faw.film_id = f.film_id
-            JOIN actors a ON faw.actor_id = a.actor_id
-            JOIN characters c ON faw.character_id = c.character_id
-            JOIN watches w ON faw.watch_id = w.watch_id
-            JOIN brands b ON w.brand_id = b.brand_id
-            WHERE a.actor_name LIKE ? AND f.title LIKE ?
-            ORDER BY faw.faw_id
-        """, (f'%{actor_name}%', f'%{film_title}%'))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        entries = []
-        for row in results:
-            entries.append({
-                'id': row[0],
-                'film': f"{row[1]} ({row[2]})",
-                'actor': row[3],
-                'character': row[4],
-                'watch': f"{row[5]} {row[6]}"
-            })
+        entries = find_similar_entries(get_db(), actor_name, film_title)
         
         return jsonify({
             'success': True,
@@ -487,16 +3624,28 @@ def find_similar(actor_name, film_title):
 def delete_entry(entry_id):
     """Delete a specific entry by ID."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
-        cursor.execute("DELETE FROM film_actor_watch WHERE faw_id = ?", (entry_id,))
+        names = None
+        if INGEST_QUEUE.running:
+            cursor.execute(_APPEARANCE_NAMES_SQL + " WHERE faw.faw_id = ?", (entry_id,))
+            names = cursor.fetchone()
         
-        if cursor.rowcount == 0:
+        suggest_version = SUGGEST_INDEX.version
+        cursor.execute("DELETE FROM film_actor_watch WHERE faw_id = ? RETURNING film_id, actor_id, watch_id", (entry_id,))
+        deleted = cursor.fetchone()
+        
+        if deleted is None:
             return jsonify({'error': 'Entry not found'}), 404
         
         conn.commit()
-        conn.close()
+        READ_MODEL.remove(entry_id)
+        SUGGEST_INDEX.remove(suggest_version, entry_id, *deleted)
+        RESPONSE_CACHE.bump()
+        CHANGE_FEED.notify()
+        if names:
+            INGEST_QUEUE.forget(*names)
         
         return jsonify({
             'success': True,
@@ -507,49 +3656,177 @@ def delete_entry(entry_id):
         return jsonify({'error': str(e)}), 400
 
 
+# Mergeable dimension tables: table -> (id column, name column, columns the name is unique within)
+MERGE_KEYS = {
+    'actors': ('actor_id', 'actor_name', ()),
+    'characters': ('character_id', 'character_name', ('film_id', 'actor_id')),
+}
+
+# Number of merge groups (and of ids per group) listed in a merge report
+MERGE_PREVIEW_LIMIT = 100
+
+# The columns film_actor_watch is UNIQUE on
+_FACT_UNIQUE = ('film_id', 'actor_id', 'watch_id')
+
+
+def merge_duplicates(conn, table, dry_run=False):
+    """Merge rows of a dimension table that share a key into the oldest (lowest id).
+
+    Runs as one transaction of set-based statements: a temp table maps every
+    duplicate id to its keeper, appearances that would collide on the fact
+    table's UNIQUE columns once remapped are dropped (keeping the oldest),
+    the survivors are repointed with a single UPDATE ... FROM, and the
+    duplicates are deleted. With dry_run=True the same report is computed
+    without writing anything. Merging actors also merges the characters
+    they played under one name in the same film, so characters stay scoped
+    to one film and actor. SUGGEST_INDEX is updated here, as only the merge
+    knows which rows it removed; callers must invalidate the other caches
+    after a real merge.
+    """
+    id_column, key, scope = MERGE_KEYS[table]
+    suggest_version = SUGGEST_INDEX.version
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS temp.merge_map")
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("CREATE TEMP TABLE merge_map (old_id INTEGER PRIMARY KEY, new_id INTEGER NOT NULL)")
+        cursor.execute(f"""
+            INSERT INTO merge_map (old_id, new_id)
+            SELECT old_id, new_id FROM (
+                SELECT {id_column} AS old_id, MIN({id_column}) OVER (PARTITION BY {', '.join(scope + (key,))}) AS new_id
+                FROM {table}
+            )
+            WHERE old_id != new_id
+        """)
+        merged = cursor.rowcount
+
+        cursor.execute(f"""
+            SELECT m.new_id, t.{key}, GROUP_CONCAT(m.old_id)
+            FROM merge_map m
+            JOIN {table} t ON t.{id_column} = m.new_id
+            GROUP BY m.new_id
+            ORDER BY COUNT(*) DESC, m.new_id
+            LIMIT {MERGE_PREVIEW_LIMIT}
+        """)
+        preview = []
+        for keep_id, name, ids in cursor.fetchall():
+            ids = ids.split(',')
+            preview.append({'keep_id': keep_id, 'name': name, 'count': len(ids),
+                            'merged_ids': [int(x) for x in ids[:MERGE_PREVIEW_LIMIT]]})
+        cursor.execute("SELECT COUNT(DISTINCT new_id) FROM merge_map")
+        groups = cursor.fetchone()[0]
+
+        # Appearances touching a merged id, ranked within the row they would become
+        partition = ', '.join(f"COALESCE(m.new_id, faw.{c})" if c == id_column else f"faw.{c}"
+                              for c in _FACT_UNIQUE)
+        ranked = f"""
+            SELECT faw.faw_id, m.new_id,
+                   ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY faw.faw_id) AS rank
+            FROM film_actor_watch faw
+            LEFT JOIN merge_map m ON faw.{id_column} = m.old_id
+            WHERE faw.{id_column} IN (SELECT old_id FROM merge_map UNION SELECT new_id FROM merge_map)
+        """
+
+        if dry_run:
+            cursor.execute(f"""
+                SELECT COUNT(*) FILTER (WHERE rank > 1),
+                       COUNT(*) FILTER (WHERE rank = 1 AND new_id IS NOT NULL)
+                FROM ({ranked})
+            """)
+            deduplicated, repointed = cursor.fetchone()
+            conn.rollback()
+        else:
+            cursor.execute(f"""DELETE FROM film_actor_watch WHERE faw_id IN (SELECT faw_id FROM ({ranked}) WHERE rank > 1)
+                               RETURNING faw_id, film_id, actor_id, watch_id""")
+            removed = cursor.fetchall()
+            deduplicated = len(removed)
+            cursor.execute(f"""
+                UPDATE film_actor_watch SET {id_column} = m.new_id
+                FROM merge_map m
+                WHERE film_actor_watch.{id_column} = m.old_id
+                  AND film_actor_watch.{id_column} IN (SELECT old_id FROM merge_map)
+            """)
+            repointed = cursor.rowcount
+            if table == 'actors':
+                _rescope_characters(cursor)
+            cursor.execute("SELECT old_id, new_id FROM merge_map")
+            mapping = cursor.fetchall()
+            cursor.execute(f"DELETE FROM {table} WHERE {id_column} IN (SELECT old_id FROM merge_map)")
+            conn.commit()
+            SUGGEST_INDEX.merge(suggest_version, table, mapping, removed)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS temp.merge_map")
+
+    return {
+        'dry_run': dry_run,
+        'groups': groups,
+        'merged': merged,
+        'appearances_repointed': repointed,
+        'appearances_deduplicated': deduplicated,
+        'merges': preview
+    }
+
+
+def _rescope_characters(cursor):
+    """Move the characters of merged actors (temp.merge_map) to the keepers,
+    folding each into the keeper's character of that name in that film."""
+    cursor.execute("DROP TABLE IF EXISTS temp.character_map")
+    cursor.execute("""
+        CREATE TEMP TABLE character_map AS
+        SELECT old_id, new_id FROM (
+            SELECT c.character_id AS old_id,
+                   MIN(c.character_id) OVER (PARTITION BY c.film_id, COALESCE(m.new_id, c.actor_id),
+                                             c.character_name) AS new_id
+            FROM characters c
+            LEFT JOIN merge_map m ON c.actor_id = m.old_id
+            WHERE c.actor_id IN (SELECT old_id FROM merge_map UNION SELECT new_id FROM merge_map)
+        )
+        WHERE old_id != new_id
+    """)
+    cursor.execute("""
+        UPDATE film_actor_watch SET character_id = cm.new_id
+        FROM character_map cm
+        WHERE film_actor_watch.character_id = cm.old_id
+    """)
+    cursor.execute("DELETE FROM characters WHERE character_id IN (SELECT old_id FROM character_map)")
+    cursor.execute("""
+        UPDATE characters SET actor_id = m.new_id
+        FROM merge_map m
+        WHERE characters.actor_id = m.old_id
+    """)
+    cursor.execute("DROP TABLE temp.character_map")
+
+
+def _merge_response(table):
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    report = merge_duplicates(get_db(), table, dry_run)
+    if not dry_run and report['merged']:
+        ID_CACHE.invalidate(table, 'characters')
+        SIMILARITY_INDEX.invalidate(table, 'characters')
+        READ_MODEL.invalidate()
+        RESPONSE_CACHE.bump()
+        CHANGE_FEED.notify()
+
+    verb = 'Would merge' if dry_run else 'Merged'
+    return jsonify({
+        'success': True,
+        'message': f"{verb} {report['merged']} duplicate {table} into {report['groups']} unique {table}",
+        **report
+    })
+
+
 @app.route('/api/cleanup-duplicate-characters', methods=['POST'])
 def cleanup_duplicate_characters():
-    """Merge duplicate character records, keeping the oldest one."""
+    """Merge characters of one film and actor sharing a name, keeping the oldest (?dry_run=1 to preview).
+
+    Inserts upsert characters on that key, so once migration 5 has run
+    there is nothing left to merge; the route stays for existing clients.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Find all duplicate character names
-        cursor.execute("""
-            SELECT character_name, GROUP_CONCAT(character_id) as ids, COUNT(*) as count
-            FROM characters
-            GROUP BY character_name
-            HAVING count > 1
-        """)
-        
-        duplicates = cursor.fetchall()
-        total_merged = 0
-        
-        for char_name, ids_str, count in duplicates:
-            ids = [int(x) for x in ids_str.split(',')]
-            keep_id = min(ids)  # Keep the oldest (lowest ID)
-            delete_ids = [x for x in ids if x != keep_id]
-            
-            # Update all references to point to the kept ID
-            for old_id in delete_ids:
-                cursor.execute("""
-                    UPDATE film_actor_watch 
-                    SET character_id = ? 
-                    WHERE character_id = ?
-                """, (keep_id, old_id))
-                
-                # Delete the duplicate character record
-                cursor.execute("DELETE FROM characters WHERE character_id = ?", (old_id,))
-                
-            total_merged += len(delete_ids)
-            
-        conn.commit()
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': f'Merged {total_merged} duplicate characters into {len(duplicates)} unique characters'
-        })
+        return _merge_response('characters')
     
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -557,48 +3834,559 @@ def cleanup_duplicate_characters():
 
 @app.route('/api/cleanup-duplicate-actors', methods=['POST'])
 def cleanup_duplicate_actors():
-    """Merge duplicate actor records, keeping the oldest one."""
+    """Merge duplicate actor records, keeping the oldest one (?dry_run=1 to preview)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        return _merge_response('actors')
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+# Names compared for near-duplicates: kind -> query for rows added after a given id
+SIMILARITY_SOURCES = {
+    'actors': "SELECT actor_id, actor_name FROM actors WHERE actor_id > ? ORDER BY actor_id",
+    'characters': "SELECT character_id, character_name FROM characters WHERE character_id > ? ORDER BY character_id",
+    'brands': "SELECT brand_id, brand_name FROM brands WHERE brand_id > ? ORDER BY brand_id",
+    'watches': """SELECT w.watch_id, b.brand_name || ' ' || w.model_reference
+                  FROM watches w JOIN brands b ON w.brand_id = b.brand_id
+                  WHERE w.watch_id > ? ORDER BY w.watch_id""",
+}
+
+# MinHash LSH: names whose trigram sets have Jaccard similarity j share a
+# bucket with probability 1 - (1 - j**ROWS)**BANDS (0.96 at j = 0.43,
+# i.e. Dice 0.6)
+MINHASH_BANDS = 16
+MINHASH_ROWS = 2
+
+# Minimum Dice coefficient of two names' trigram sets to call them duplicates
+DUPLICATE_THRESHOLD = 0.6
+
+# Buckets larger than this hold a very common gram pair and are not compared pairwise
+LSH_MAX_BUCKET = 200
+
+MAX_DUPLICATE_CLUSTERS = 1000
+
+
+def similarity_key(name):
+    """Reduce a name to folded letters and digits: "TAG Heuer" -> "tagheuer"."""
+    return ''.join(ch for ch in fold_text(name)[0] if ch.isalnum())
+
+
+def _trigrams(key):
+    return frozenset(key[i:i + 3] for i in range(len(key) - 2)) or frozenset([key])
+
+
+@functools.lru_cache(maxsize=65536)
+def _gram_hashes(gram):
+    digest = hashlib.shake_128(gram.encode()).digest(4 * MINHASH_BANDS * MINHASH_ROWS)
+    return tuple(memoryview(digest).cast('I'))
+
+
+class _NameIndex:
+    """LSH buckets over the similarity keys of one kind of name."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.reset()
+
+    def reset(self):
+        self.last_id = 0
+        self.ids = {}        # name -> ids carrying exactly that name
+        self.names = {}      # similarity key -> names reducing to it
+        self.grams = {}      # similarity key -> trigram set
+        self.buckets = {}    # (band, hashes...) -> similarity keys
+
+    def refresh(self, cursor):
+        """Index the rows added since the last refresh."""
+        cursor.execute(self.sql, (self.last_id,))
+        for row_id, name in cursor.fetchall():
+            self.add(row_id, name)
+
+    def add(self, row_id, name):
+        self.last_id = max(self.last_id, row_id)
+        self.ids.setdefault(name, []).append(row_id)
+        key = similarity_key(name)
+        if key in self.names:
+            self.names[key].add(name)
+            return
+
+        self.names[key] = {name}
+        grams = self.grams[key] = _trigrams(key)
+        signature = tuple(map(min, zip(*map(_gram_hashes, grams))))
+        for band in range(MINHASH_BANDS):
+            bucket = (band,) + signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]
+            self.buckets.setdefault(bucket, set()).add(key)
+
+    def clusters(self, threshold):
+        """Return (clusters, skipped_buckets), most similar clusters first.
+
+        Only keys sharing a bucket and not already linked are compared, and
+        linked keys are joined with union-find. A cluster's score is its weakest link; names that
+        reduce to the same key score 1.0. Ids sharing one exact name are not a cluster on their
+        own: only characters repeat names, once per film and actor.
+        """
+        parent = {}
+        score = {}
+
+        def find(key):
+            while parent.get(key, key) != key:
+                parent[key] = parent.get(parent[key], parent[key])
+                key = parent[key]
+            return key
+
+        skipped = 0
+        for members in self.buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > LSH_MAX_BUCKET:
+                skipped += 1
+                continue
+            members = sorted(members)
+            for i, a in enumerate(members):
+                ga = self.grams[a]
+                for b in members[i + 1:]:
+                    ra, rb = find(a), find(b)
+                    if ra == rb:
+                        continue
+                    gb = self.grams[b]
+                    similarity = 2 * len(ga & gb) / (len(ga) + len(gb))
+                    if similarity >= threshold:
+                        parent[rb] = ra
+                        score[ra] = min(score.get(ra, 1.0), score.pop(rb, 1.0), similarity)
+
+        groups = {}
+        for key in self.names:
+            groups.setdefault(find(key), []).append(key)
+
+        clusters = []
+        for root, keys in groups.items():
+            names = sorted(name for key in keys for name in self.names[key])
+            if len(names) < 2:
+                continue
+            clusters.append({
+                'score': round(score.get(root, 1.0), 3),
+                'members': [{'name': name, 'ids': self.ids[name]} for name in names]
+            })
+        clusters.sort(key=lambda c: (-c['score'], -len(c['members'])))
+        return clusters, skipped
+
+
+class SimilarityIndex:
+    """Thread-safe near-duplicate indexes for the kinds in SIMILARITY_SOURCES.
+
+    Each index catches up on rows added since it last ran, so inserts from
+    any source are picked up incrementally. Anything that deletes, renames
+    or merges rows must invalidate the affected kinds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {kind: _NameIndex(sql) for kind, sql in SIMILARITY_SOURCES.items()}
+
+    def clusters(self, conn, kind, threshold=DUPLICATE_THRESHOLD):
+        with self._lock:
+            index = self._indexes[kind]
+            index.refresh(conn.cursor())
+            return index.clusters(threshold)
+
+    def invalidate(self, *kinds):
+        with self._lock:
+            for kind in kinds or self._indexes:
+                self._indexes[kind].reset()
+
+    def stats(self):
+        with self._lock:
+            return {kind: {'names': len(index.ids), 'keys': len(index.names), 'buckets': len(index.buckets)}
+                    for kind, index in self._indexes.items()}
+
+
+SIMILARITY_INDEX = SimilarityIndex()
+
+
+@app.route('/api/duplicates', methods=['GET'])
+@cached_response
+def find_duplicates():
+    """List clusters of near-duplicate names (?kind=actors|characters|brands|watches)."""
+    try:
+        kind = request.args.get('kind', 'actors')
+        if kind not in SIMILARITY_SOURCES:
+            return jsonify({'error': f"Unknown kind '{kind}' (expected one of {', '.join(SIMILARITY_SOURCES)})"}), 400
         
-        # Find all duplicate actor names
-        cursor.execute("""
-            SELECT actor_name, GROUP_CONCAT(actor_id) as ids, COUNT(*) as count
-            FROM actors
-            GROUP BY actor_name
-            HAVING count > 1
-        """)
+        threshold = request.args.get('threshold', DUPLICATE_THRESHOLD, type=float)
+        limit = min(max(1, request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)), MAX_DUPLICATE_CLUSTERS)
         
-        duplicates = cursor.fetchall()
-        total_merged = 0
+        clusters, skipped = SIMILARITY_INDEX.clusters(get_db(), kind, threshold)
         
-        for actor_name, ids_str, count in duplicates:
-            ids = [int(x) for x in ids_str.split(',')]
-            keep_id = min(ids)  # Keep the oldest (lowest ID)
-            delete_ids = [x for x in ids if x != keep_id]
-            
-            # Update all references to point to the kept ID
-            for old_id in delete_ids:
-                cursor.execute("""
-                    UPDATE film_actor_watch 
-                    SET actor_id = ? 
-                    WHERE actor_id = ?
-                """, (keep_id, old_id))
-                
-                # Delete the duplicate actor record
-                cursor.execute("DELETE FROM actors WHERE actor_id = ?", (old_id,))
-                
-            total_merged += len(delete_ids)
-            
-        conn.commit()
-        conn.close()
+        return jsonify({
+            'success': True,
+            'kind': kind,
+            'threshold': threshold,
+            'count': len(clusters),
+            'clusters': clusters[:limit],
+            'skipped_buckets': skipped
+        })
         
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+# Items per block of a _SortedKeys
+SORTED_BLOCK = 1024
+
+# Prefixes whose best matches each kind keeps; others are ranked from the sorted keys again
+SUGGEST_MEMO_SIZE = 4096
+
+# /api/suggest?type=: the names each kind offers as (id, name, detail), read incrementally by id
+SUGGEST_SOURCES = {
+    'actor': "SELECT actor_id, actor_name, NULL FROM actors WHERE actor_id > ? ORDER BY actor_id",
+    'brand': "SELECT brand_id, brand_name, NULL FROM brands WHERE brand_id > ? ORDER BY brand_id",
+    'film': "SELECT film_id, title, year FROM films WHERE film_id > ? ORDER BY film_id",
+    'model': "SELECT watch_id, model_reference, brand_id FROM watches WHERE watch_id > ? ORDER BY watch_id",
+}
+
+_SUGGEST_APPEARANCES = "SELECT faw_id, film_id, actor_id, watch_id FROM film_actor_watch WHERE faw_id > ? ORDER BY faw_id"
+
+_WORD = re.compile(r'\w+')
+
+
+def _word_suffixes(name):
+    """The folded name from its start and from each word, so "craig" finds "Daniel Craig"."""
+    folded = fold_text(name)[0]
+    return {folded} | {folded[m.start():] for m in _WORD.finditer(folded)}
+
+
+class _SortedKeys:
+    """A sorted list held as blocks of about SORTED_BLOCK items, so an insert
+    moves one block rather than the whole list.
+
+    append() and sort() load it in bulk, as for a list; add() and remove()
+    keep it sorted afterwards.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.maxes = []     # last item of each block
+        self._unsorted = []
+
+    def append(self, item):
+        self._unsorted.append(item)
+
+    def sort(self):
+        items = sorted(itertools.chain(itertools.chain.from_iterable(self.blocks), self._unsorted))
+        self.blocks = [items[i:i + SORTED_BLOCK] for i in range(0, len(items), SORTED_BLOCK)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self._unsorted = []
+
+    def add(self, item):
+        if not self.blocks:
+            self.blocks.append([item])
+            self.maxes.append(item)
+            return
+        i = min(bisect.bisect_left(self.maxes, item), len(self.blocks) - 1)
+        block = self.blocks[i]
+        bisect.insort(block, item)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * SORTED_BLOCK:
+            self.blocks[i:i + 1] = [block[:SORTED_BLOCK], block[SORTED_BLOCK:]]
+            self.maxes[i:i + 1] = [block[SORTED_BLOCK - 1], block[-1]]
+
+    def remove(self, item):
+        i = bisect.bisect_left(self.maxes, item)
+        if i == len(self.blocks):
+            return
+        block = self.blocks[i]
+        j = bisect.bisect_left(block, item)
+        if j < len(block) and block[j] == item:
+            del block[j]
+            if block:
+                self.maxes[i] = block[-1]
+            else:
+                del self.blocks[i], self.maxes[i]
+
+    def from_item(self, start):
+        """Iterate over the items from the first one >= start."""
+        i = bisect.bisect_left(self.maxes, start)
+        if i < len(self.blocks):
+            block = self.blocks[i]
+            yield from itertools.islice(block, bisect.bisect_left(block, start), None)
+            for block in itertools.islice(self.blocks, i + 1, None):
+                yield from block
+
+    def __len__(self):
+        return sum(map(len, self.blocks)) + len(self._unsorted)
+
+
+class _PrefixIndex:
+    """Sorted, case-folded word-start keys of one kind of name, ranked by appearances."""
+
+    def __init__(self):
+        self.last_id = 0
+        self.keys = _SortedKeys()   # (folded suffix, id)
+        self.names = {}     # id -> (name, detail, word suffixes)
+        self.counts = {}    # id -> appearances
+        self.memo = {}      # folded prefix -> best SUGGEST_MAX_LIMIT (-count, name, id), least recently used first
+        self.memo_depth = 0  # longest prefix ever memoized
+
+    def add(self, row_id, name, detail, bulk=False):
+        """Index a new name with no appearances yet; unless bulk, rerank() it afterwards."""
+        self.last_id = max(self.last_id, row_id)
+        suffixes = tuple(_word_suffixes(name))
+        self.names[row_id] = (name, detail, suffixes)
+        self.counts[row_id] = 0
+        for suffix in suffixes:
+            if bulk:
+                self.keys.append((suffix, row_id))
+            else:
+                self.keys.add((suffix, row_id))
+
+    def drop(self, row_id):
+        if row_id not in self.names:
+            return
+        for suffix in self.names[row_id][2]:
+            self.keys.remove((suffix, row_id))
+        self.rerank(row_id, self.counts[row_id], removed=True)
+        del self.names[row_id], self.counts[row_id]
+
+    def rerank(self, row_id, old_count, removed=False):
+        """Patch the memoized matches after row_id was added (old_count None) or its count changed.
+
+        A list shorter than SUGGEST_MAX_LIMIT holds every match, so it can
+        always be patched; a full one is dropped when row_id falls, since a
+        match it left out may now rank higher.
+        """
+        if not self.memo:
+            return
+        name, _, suffixes = self.names[row_id]
+        item = None if removed else (-self.counts[row_id], name, row_id)
+        listed = None if old_count is None else (-old_count, name, row_id)
+        depth = self.memo_depth
+        prefixes = {suffix[:end] for suffix in suffixes for end in range(1, min(len(suffix), depth) + 1)}
+        for prefix in prefixes:
+            best = self.memo.get(prefix)
+            if best is None:
+                continue
+            complete = len(best) < SUGGEST_MAX_LIMIT
+            old = None
+            if listed is not None:
+                i = bisect.bisect_left(best, listed)
+                if i < len(best) and best[i] == listed:
+                    old = best.pop(i)
+            if complete:
+                if item is not None:
+                    bisect.insort(best, item)
+            elif old is not None and (item is None or item > old):
+                del self.memo[prefix]
+            elif item is not None and (old is not None or item < best[-1]):
+                bisect.insort(best, item)
+                del best[SUGGEST_MAX_LIMIT:]
+
+    def best(self, prefix):
+        best = self.memo.pop(prefix, None)
+        if best is None:
+            ids = set()
+            for key, row_id in self.keys.from_item((prefix,)):
+                if not key.startswith(prefix):
+                    break
+                ids.add(row_id)
+            best = heapq.nsmallest(SUGGEST_MAX_LIMIT, ((-self.counts[r], self.names[r][0], r) for r in ids))
+            if len(self.memo) >= SUGGEST_MEMO_SIZE:
+                del self.memo[next(iter(self.memo))]
+            self.memo_depth = max(self.memo_depth, len(prefix))
+        self.memo[prefix] = best
+        return best
+
+
+class SuggestIndex:
+    """Thread-safe prefix indexes behind /api/suggest, one per SUGGEST_SOURCES kind.
+
+    Built from SQLite by the first lookup; after that lookups never touch it.
+    Inserts are folded in by catch_up(), deleted appearances by remove() and
+    merges by merge(), all called on the write paths before RESPONSE_CACHE
+    is bumped. Brand cleanups rewrite watches wholesale and call
+    invalidate(), so the next lookup rebuilds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = None
+        self.db_path = None
+        self.last_faw_id = 0
+        self.version = 0
+        self.builds = 0
+        self.build_seconds = None
+        self.lookups = 0
+        self.memo_hits = 0
+
+    def _build(self, conn):
+        started = time.perf_counter()
+        self._indexes = {kind: _PrefixIndex() for kind in SUGGEST_SOURCES}
+        self.db_path = conn.db_path
+        self.last_faw_id = 0
+        self.version += 1
+        self._read_new(conn, bulk=True)
+        for index in self._indexes.values():
+            index.keys.sort()
+        self.builds += 1
+        self.build_seconds = round(time.perf_counter() - started, 3)
+
+    def _read_new(self, conn, bulk):
+        changed = {}
+        began = not conn.in_transaction
+        if began:
+            conn.execute("BEGIN")
+        try:
+            for kind, sql in SUGGEST_SOURCES.items():
+                index = self._indexes[kind]
+                for row_id, name, detail in conn.execute(sql, (index.last_id,)):
+                    index.add(row_id, name, detail, bulk)
+                    if not bulk:
+                        changed[kind, row_id] = None
+            for faw_id, film_id, actor_id, watch_id in conn.execute(_SUGGEST_APPEARANCES, (self.last_faw_id,)):
+                self.last_faw_id = faw_id
+                self._count(film_id, actor_id, watch_id, 1, None if bulk else changed)
+        finally:
+            if began:
+                conn.rollback()
+        self._rerank(changed)
+
+    def _count(self, film_id, actor_id, watch_id, delta, changed):
+        """Add delta to the appearances of one appearance's names, noting their earlier counts in changed."""
+        models = self._indexes['model']
+        brand_id = models.names[watch_id][1] if watch_id in models.names else None
+        for kind, row_id in (('film', film_id), ('actor', actor_id), ('model', watch_id), ('brand', brand_id)):
+            counts = self._indexes[kind].counts
+            if row_id in counts:
+                if changed is not None:
+                    changed.setdefault((kind, row_id), counts[row_id])
+                counts[row_id] += delta
+
+    def _rerank(self, changed):
+        # Once per name, however many of its appearances changed
+        for (kind, row_id), old_count in changed.items():
+            self._indexes[kind].rerank(row_id, old_count)
+
+    def suggest(self, conn, kind, prefix, limit):
+        """Return up to limit names of kind starting a word with prefix, most appearances first."""
+        prefix = fold_text(prefix.strip())[0]
+        with self._lock:
+            if self._indexes is None or self.db_path != conn.db_path:
+                self._build(conn)
+            index = self._indexes[kind]
+            self.lookups += 1
+            self.memo_hits += prefix in index.memo
+            best = index.best(prefix)[:limit]
+            brands = self._indexes['brand'].names
+            suggestions = []
+            for negative_count, name, row_id in best:
+                suggestion = {'id': row_id, 'name': name, 'count': -negative_count}
+                detail = index.names[row_id][1]
+                if kind == 'film':
+                    suggestion['year'] = detail
+                elif kind == 'model':
+                    suggestion['brand'] = brands.get(detail, (None,))[0]
+                suggestions.append(suggestion)
+            return suggestions
+
+    def catch_up(self, conn):
+        """Fold names and appearances committed through conn into the indexes."""
+        if self._indexes is None:
+            return
+        with self._lock:
+            if self._indexes is not None and conn.db_path == self.db_path:
+                self._read_new(conn, bulk=False)
+
+    def remove(self, version, faw_id, film_id, actor_id, watch_id):
+        """Uncount a deleted appearance; version is self.version read before the delete committed."""
+        with self._lock:
+            if self._indexes is None:
+                return
+            if version != self.version:
+                self._indexes = None  # rebuilt meanwhile, with or without the row
+            elif faw_id <= self.last_faw_id:
+                changed = {}
+                self._count(film_id, actor_id, watch_id, -1, changed)
+                self._rerank(changed)
+
+    def merge(self, version, table, mapping, removed):
+        """Apply a merge_duplicates() run: fold each (old_id, new_id) of table into
+        new_id, then uncount the removed (faw_id, film_id, actor_id, watch_id) rows."""
+        with self._lock:
+            if self._indexes is None:
+                return
+            if version != self.version:
+                self._indexes = None
+                return
+            changed = {}
+            mapping = dict(mapping) if table == 'actors' else {}
+            index = self._indexes['actor']
+            for old_id, new_id in mapping.items():
+                if old_id in index.counts and new_id in index.counts:
+                    changed.setdefault(('actor', new_id), index.counts[new_id])
+                    index.counts[new_id] += index.counts[old_id]
+                index.drop(old_id)
+            for faw_id, film_id, actor_id, watch_id in removed:
+                if faw_id <= self.last_faw_id:
+                    self._count(film_id, mapping.get(actor_id, actor_id), watch_id, -1, changed)
+            self._rerank(changed)
+
+    def drop(self, kind, row_id):
+        """Forget a deleted name that no appearance uses."""
+        with self._lock:
+            if self._indexes is not None:
+                self._indexes[kind].drop(row_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._indexes = None
+            self.version += 1
+
+    def stats(self):
+        with self._lock:
+            indexes = self._indexes or {}
+            return {
+                'ready': self._indexes is not None,
+                'builds': self.builds,
+                'build_seconds': self.build_seconds,
+                'lookups': self.lookups,
+                'memo_hits': self.memo_hits,
+                'names': {kind: len(index.names) for kind, index in indexes.items()},
+                'memoized_prefixes': sum(len(index.memo) for index in indexes.values())
+            }
+
+
+SUGGEST_INDEX = SuggestIndex()
+
+
+@app.route('/api/suggest', methods=['GET'])
+def suggest():
+    """Autocomplete names (?type=actor|brand|film|model&prefix=...), most appearances first.
+
+    Answered from SUGGEST_INDEX without SQLite, and kept out of
+    RESPONSE_CACHE, which keystroke-rate prefixes would only churn.
+    """
+    try:
+        kind = request.args.get('type', 'actor')
+        if kind not in SUGGEST_SOURCES:
+            return jsonify({'error': f"Unknown type '{kind}' (expected one of {', '.join(SUGGEST_SOURCES)})"}), 400
+
+        prefix = request.args.get('prefix', '')
+        if not prefix.strip():
+            return jsonify({'error': 'A prefix is required'}), 400
+        limit = min(max(1, request.args.get('limit', SUGGEST_LIMIT, type=int)), SUGGEST_MAX_LIMIT)
+
+        suggestions = SUGGEST_INDEX.suggest(get_db(), kind, prefix, limit)
+
         return jsonify({
             'success': True,
-            'message': f'Merged {total_merged} duplicate actors into {len(duplicates)} unique actors'
+            'type': kind,
+            'prefix': prefix,
+            'count': len(suggestions),
+            'suggestions': suggestions
         })
-    
+
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -607,7 +4395,7 @@ def cleanup_duplicate_actors():
 def cleanup_bad_brands():
     """Fix entries where brand is incorrectly set to 'a', 'an', 'A', or 'An'."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Find all watches with bad brand names
@@ -632,9 +4420,7 @@ def cleanup_bad_brands():
                 new_model = model_parts[1] if len(model_parts) > 1 else model_parts[0]
                 
                 # Insert or get the correct brand
-                cursor.execute("INSERT OR IGNORE INTO brands (brand_name) VALUES (?)", (new_brand,))
-                cursor.execute("SELECT brand_id FROM brands WHERE brand_name = ?", (new_brand,))
-                new_brand_id = cursor.fetchone()[0]
+                new_brand_id = upsert_id(cursor, 'brands', (new_brand,))
                 
                 # Update the watch with correct brand and model
                 cursor.execute("""
@@ -653,7 +4439,15 @@ def cleanup_bad_brands():
         """)
         
         conn.commit()
-        conn.close()
+        reload_brand_index(conn)
+        ID_CACHE.invalidate('brands', 'watches')
+        SIMILARITY_INDEX.invalidate('brands', 'watches')
+        SUGGEST_INDEX.invalidate()
+        if INGEST_QUEUE.running and fixed_count:
+            INGEST_QUEUE.reload_keys(conn)
+        READ_MODEL.invalidate()
+        RESPONSE_CACHE.bump()
+        CHANGE_FEED.notify()
         
         return jsonify({
             'success': True,
@@ -669,7 +4463,7 @@ def cleanup_bad_brands():
 def delete_brand(brand_id):
     """Delete a brand if it has no associated watches."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Check if any watches use this brand
@@ -683,7 +4477,13 @@ def delete_brand(brand_id):
         
         cursor.execute("DELETE FROM brands WHERE brand_id = ?", (brand_id,))
         conn.commit()
-        conn.close()
+        reload_brand_index(conn)
+        ID_CACHE.invalidate('brands')
+        SIMILARITY_INDEX.invalidate('brands')
+        SUGGEST_INDEX.drop('brand', brand_id)
+        READ_MODEL.invalidate()
+        RESPONSE_CACHE.bump()
+        CHANGE_FEED.notify()
         
         return jsonify({
             'success': True,
@@ -694,6 +4494,73 @@ def delete_brand(brand_id):
         return jsonify({'error': str(e)}), 400
 
 
+# How long stop_background_jobs() waits for each job to finish
+BACKGROUND_STOP_TIMEOUT = 10
+
+# The running background jobs: the event that stops them and their threads
+_BACKGROUND_JOBS = {'stop': None, 'threads': []}
+
+
+def start_background_jobs():
+    """Start the periodic jobs and in-memory indexes a serving process needs.
+
+    Called once per server process: by __main__ under the dev server and by
+    asgi_backend's lifespan. Other WSGI servers should call it from their
+    worker start hook (e.g. gunicorn's post_worker_init). Does nothing while
+    the jobs already run.
+    """
+    if _BACKGROUND_JOBS['stop'] is not None:
+        return
+    stop = _BACKGROUND_JOBS['stop'] = threading.Event()
+    threads = _BACKGROUND_JOBS['threads'] = []
+
+    try:
+        with app.app_context():
+            print(f"Brand index: {reload_brand_index(get_db())} brands")
+    except sqlite3.Error as e:
+        print(f"Brand index: using built-in list ({e})")
+
+    if STATS_VERIFY_INTERVAL:
+        threads.append(start_stats_verifier(STATS_VERIFY_INTERVAL, stop))
+
+    if CHANGES_COMPACT_INTERVAL:
+        threads.append(start_change_compactor(CHANGES_COMPACT_INTERVAL, stop))
+
+    if SNAPSHOT_PATH:
+        if SNAPSHOT_REFRESH_SECONDS:
+            threads.append(start_snapshot_refresher(SNAPSHOT_REFRESH_SECONDS, stop))
+            print(f"Read snapshot: {SNAPSHOT_PATH}, refreshed every {SNAPSHOT_REFRESH_SECONDS}s")
+        else:
+            print(f"Read snapshot: {SNAPSHOT_PATH}, refreshed by another process")
+
+    if READ_MODEL_ENABLED:
+        READ_MODEL.start()
+        print("Read model: loading in the background")
+
+    if WRITE_BEHIND and not INGEST_QUEUE.running:
+        INGEST_QUEUE.start()
+        print(f"Write-behind ingest: groups of {INGEST_GROUP_SIZE} rows or {INGEST_GROUP_MS} ms")
+
+    # Servers without a shutdown hook (the dev server, WSGI) still commit queued rows on exit
+    atexit.register(stop_background_jobs)
+
+
+def stop_background_jobs(timeout=BACKGROUND_STOP_TIMEOUT):
+    """Stop what start_background_jobs() started, waiting up to `timeout` seconds for each job."""
+    stop = _BACKGROUND_JOBS['stop']
+    if stop is None:
+        return
+    stop.set()
+    if not INGEST_QUEUE.stop(timeout):
+        app.logger.error("The ingest writer did not finish within %ss; queued rows may be lost", timeout)
+    for thread in _BACKGROUND_JOBS['threads']:
+        thread.join(timeout)
+    READ_MODEL.stop()
+    _BACKGROUND_JOBS['stop'] = None
+    _BACKGROUND_JOBS['threads'] = []
+    atexit.unregister(stop_background_jobs)
+
+
 if __name__ == '__main__':
     print("=" * 60)
     print("🎬 Film Watch Database API Server")
@@ -701,10 +4568,24 @@ if __name__ == '__main__':
     print("Server starting on http://127.0.0.1:5000")
     print("\nAvailable endpoints:")
     print("  POST   /api/add                        - Add new entry")
+    print("  POST   /api/add/batch                  - Add many entries (JSON array or NDJSON)")
+    print("  POST   /api/add_structured             - Add entries from fields (object or array)")
     print("  GET    /api/query/actor/NAME           - Query by actor")
     print("  GET    /api/query/brand/NAME           - Query by brand")
     print("  GET    /api/query/film/TITLE           - Query by film")
+    print("  POST   /api/query/batch                - Several queries in one read transaction")
+    print("  GET    /api/search?q=TEXT              - Ranked full-text search")
+    print("  GET    /api/suggest?type=T&prefix=TEXT - Autocomplete names by prefix")
+    print("  GET    /api/changes?since=SEQ&wait=S   - Change feed for incremental sync")
+    print("  POST   /api/changes/compact            - Compact the change log")
     print("  GET    /api/stats                      - Get statistics")
+    print("  POST   /api/stats/verify               - Recount and repair statistics")
+    print("  GET    /api/cache-stats                - Cache hit/miss counters")
+    print("  GET    /api/metrics                    - Prometheus metrics")
+    print("  GET    /api/metrics/slow-queries       - Recent slow SQL statements")
+    print("  GET    /api/ingest/ID                  - Status of a write-behind add")
+    print("  GET    /api/ingest-stats               - Write-behind queue metrics")
+    print("  GET    /api/duplicates?kind=KIND       - Near-duplicate name clusters")
     print("  POST   /api/cleanup-bad-brands         - Fix 'a'/'an' brand entries")
     print("  POST   /api/cleanup-duplicate-actors   - Merge duplicate actors")
     print("  POST   /api/cleanup-duplicate-characters - Merge duplicate characters")
@@ -713,5 +4594,11 @@ if __name__ == '__main__':
     print("  GET    /ui                             - Web interface")
     print("\nPress CTRL+C to stop the server")
     print("=" * 60)
-    
+
+    # The debug reloader runs this script twice: a watcher process that only
+    # restarts the server, and the server itself (WERKZEUG_RUN_MAIN=true).
+    # Background work belongs to the server alone.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
+
     app.run(debug=True, port=5000, host='127.0.0.1')
\ No newline at end of file
@@ -1,3 +1,6 @@
+-- Baseline schema (version 0). Later changes live in MIGRATIONS in flask_backend.py.
+PRAGMA user_version = 0;
+
 DROP TABLE IF EXISTS film_actor_watch;
 DROP TABLE IF EXISTS actors;
 DROP TABLE IF EXISTS characters;
@@ -0,0 +1,200 @@
+"""Tests for the write endpoints (/api/add and /api/add_structured)."""
+
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+WRITERS = 8
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'add.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text("In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner\n")
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    flask_backend.POOL.close_all()
+    return path
+
+
+def test_concurrent_adds_create_one_character(db_path):
+    """Writers racing to add the same new character in one film end up sharing one row."""
+    barrier = threading.Barrier(WRITERS)
+    statuses = []
+
+    def add(n):
+        client = flask_backend.app.test_client()
+        barrier.wait()
+        response = client.post('/api/add', json={
+            'entry': f"In Goldfinger (1964), Gert Frobe as Auric Goldfinger wears a Rolex Model {n}"})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=add, args=(n,)) for n in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * WRITERS
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM characters WHERE character_name = 'Auric Goldfinger'").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM actors WHERE actor_name = 'Gert Frobe'").fetchone()[0] == 1
+    assert conn.execute("""SELECT COUNT(*) FROM film_actor_watch faw JOIN films f ON faw.film_id = f.film_id
+                           WHERE f.title = 'Goldfinger'""").fetchone()[0] == WRITERS
+    assert flask_backend.verify_stats(conn, repair=False) == {}
+    conn.close()
+
+
+def test_id_cache_keeps_databases_apart(db_path, tmp_path):
+    other = str(tmp_path / 'other.db')
+    entries = tmp_path / 'other.txt'
+    # The same names as db_path's, stored under other ids
+    entries.write_text("In Thunderball (1965), Adolfo Celi as Emilio Largo wears a Breitling Top Time\n"
+                       "In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner\n")
+    filmwatch.init_db(other)
+    filmwatch.load(other, str(entries), quiet=True)
+    entry = "In Dr. No (1962), Sean Connery as James Bond wears a Rolex GMT-Master"
+
+    for path in (db_path, other):
+        conn = flask_backend.connect(path)
+        flask_backend.execute_insert(conn, flask_backend.parse_entry(entry))
+        conn.close()
+
+    conn = sqlite3.connect(other)
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    assert conn.execute("""SELECT COUNT(*) FROM film_actor_watch faw JOIN actors a ON faw.actor_id = a.actor_id
+                           WHERE a.actor_name = 'Sean Connery'""").fetchone()[0] == 2
+    conn.close()
+
+
+def test_id_cache_drops_ids_merged_away_by_another_process(db_path):
+    conn = flask_backend.connect(db_path)
+    # Cache Goldfinger's "James Bond" (character 2)
+    flask_backend.execute_insert(conn, flask_backend.parse_entry(
+        "In Goldfinger (1964), Sean Connery as James Bond wears a Rolex Submariner"))
+    resets = flask_backend.ID_CACHE.stats()['resets']
+
+    # Another process finds an older duplicate of it, as databases from before
+    # migration 5 can hold, and merges character 2 into it
+    subprocess.run([sys.executable, '-c', f"""
+import flask_backend
+conn = flask_backend.connect({db_path!r})
+conn.execute("DROP INDEX idx_characters_scope")
+conn.execute(\"\"\"INSERT INTO characters (character_id, character_name, film_id, actor_id)
+                SELECT 0, character_name, film_id, actor_id FROM characters WHERE character_id = 2\"\"\")
+conn.commit()
+assert flask_backend.merge_duplicates(conn, 'characters', False)['merged'] == 1
+conn.execute("CREATE UNIQUE INDEX idx_characters_scope ON characters (film_id, actor_id, character_name)")
+conn.commit()
+"""], check=True)
+
+    flask_backend.execute_insert(conn, flask_backend.parse_entry(
+        "In Goldfinger (1964), Sean Connery as James Bond wears a Rolex GMT-Master"))
+
+    assert flask_backend.ID_CACHE.stats()['resets'] == resets + 1
+    assert conn.execute("""SELECT DISTINCT faw.character_id FROM film_actor_watch faw JOIN films f ON faw.film_id = f.film_id
+                           WHERE f.title = 'Goldfinger'""").fetchall() == [(0,)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+    conn.close()
+
+
+def structured(**fields):
+    item = {'film_title': 'Thunderball', 'release_year': 1965, 'actor_full_name': 'Sean Connery',
+            'character_name': 'James Bond', 'brand': 'breitling', 'model': 'Top Time', 'reference': '2002'}
+    item.update(fields)
+    return item
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'release_year': 'soon'}, '"release_year" must be a year'),
+    ({'release_year': True}, '"release_year" must be a year'),
+    ({'release_year': 1700}, '"release_year" must be between 1888 and'),
+    ({'source': {'source_type': 'rumour'}}, '"source_type" must be one of manufacturer'),
+    ({'source': {'url': 'ftp://example.com/a'}}, '"url" must be an http(s) URL'),
+    ({'source': {'date_published': '1965-13'}}, '"date_published" must be YYYY, YYYY-MM or YYYY-MM-DD'),
+    ({'source': {'isbn': '123'}}, 'Unknown source field(s): isbn'),
+    ({'film_title': 'x' * 256}, '"film_title" is longer than 255 characters'),
+    ({'model': 'x' * 256}, '"model" is longer than 255 characters'),
+    ({'narrative': 'x' * 1001}, '"narrative" is longer than 1000 characters'),
+    ({'brand': '   '}, '"brand" is required'),
+    ({'actor_full_name': 7}, '"actor_full_name" must be a string'),
+    ({'confidence': 'E'}, '"confidence" must be one of A, B, C, D'),
+    ({'studio': 'Eon'}, 'Unknown field(s): studio'),
+])
+def test_structured_rejects_invalid_fields(db_path, fields, error):
+    response = flask_backend.app.test_client().post('/api/add_structured', json=structured(**fields))
+
+    assert response.status_code == 400
+    assert response.json['error'].startswith(error)
+
+
+@pytest.mark.parametrize('payload, error', [
+    ([], 'Expected a JSON object or a non-empty array of objects'),
+    ('In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner',
+     'Expected a JSON object or a non-empty array of objects'),
+    ([structured()] * (flask_backend.STRUCTURED_BATCH_MAX + 1), 'At most 1000 entries per request'),
+])
+def test_structured_rejects_invalid_payloads(db_path, payload, error):
+    response = flask_backend.app.test_client().post('/api/add_structured', json=payload)
+
+    assert response.status_code == 400
+    assert response.json['error'] == error
+
+
+def test_structured_array_with_an_invalid_item_writes_nothing(db_path):
+    payload = [structured(), 'not an object', structured(film_title='Goldfinger', release_year='1964'),
+               structured(release_year=1700)]
+
+    response = flask_backend.app.test_client().post('/api/add_structured', json=payload)
+
+    assert response.status_code == 400
+    assert response.json['error'] == '2 of 4 entries are invalid'
+    assert [error['index'] for error in response.json['errors']] == [1, 3]
+    assert response.json['errors'][0]['error'] == 'Each entry must be a JSON object'
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM film_actor_watch").fetchone()[0] == 1
+    conn.close()
+
+
+def test_structured_adds_an_entry(db_path):
+    source = {'source_type': 'publication', 'title': 'The Bond Watches', 'url': 'https://example.com/bond',
+              'date_published': '2012-05'}
+
+    response = flask_backend.app.test_client().post('/api/add_structured', json=structured(
+        release_year=' 1965 ', country='UK', confidence='B', source=source, narrative='  Worn   underwater. '))
+
+    assert response.status_code == 200
+    assert response.json['data'] == {
+        'actor': 'Sean Connery', 'character': 'James Bond', 'brand': 'Breitling', 'model': 'Top Time 2002',
+        'title': 'Thunderball', 'year': 1965, 'verification': 'Confirmed', 'narrative': 'Worn underwater.',
+        'source': {**source, 'publisher': None}, 'confidence': 'B'}
+    conn = sqlite3.connect(db_path)
+    row = conn.execute("""
+        SELECT f.title, f.year, b.brand_name, w.model_reference, faw.confidence, s.source_type, s.url
+        FROM film_actor_watch faw
+        JOIN films f ON faw.film_id = f.film_id
+        JOIN watches w ON faw.watch_id = w.watch_id
+        JOIN brands b ON w.brand_id = b.brand_id
+        JOIN sources s ON faw.source_id = s.source_id
+    """).fetchone()
+    assert row == ('Thunderball', 1965, 'Breitling', 'Top Time 2002', 'B', 'publication', 'https://example.com/bond')
+    conn.close()
+
+
+def test_structured_array_reports_duplicates(db_path):
+    payload = [structured(), structured(model='Top Time 2002'),
+               structured(film_title='Dr. No', release_year=1962, brand='Rolex', model='Submariner', reference=None)]
+
+    response = flask_backend.app.test_client().post('/api/add_structured', json=payload)
+
+    assert response.status_code == 200
+    assert (response.json['added'], response.json['duplicates']) == (1, 2)
+    assert [result['status'] for result in response.json['results']] == ['success', 'duplicate', 'duplicate']
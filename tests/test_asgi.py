@@ -0,0 +1,116 @@
+"""Tests for the ASGI server (asgi_backend.py), driven through the ASGI protocol."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import asgi_backend
+import filmwatch
+import flask_backend
+
+
+class Lifespan:
+    """Run asgi_backend.app's lifespan: startup on enter, shutdown on exit."""
+
+    def __init__(self, app):
+        self.app = app
+        self.messages = asyncio.Queue()
+        self.sent = asyncio.Queue()
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(self.app({'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}},
+                                                 self.messages.get, self.sent.put))
+        await self.messages.put({'type': 'lifespan.startup'})
+        assert (await self.sent.get())['type'] == 'lifespan.startup.complete'
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.messages.put({'type': 'lifespan.shutdown'})
+        assert (await self.sent.get())['type'] == 'lifespan.shutdown.complete'
+        await self.task
+
+
+async def request(app, method, path, body=None, query=b''):
+    """Send one HTTP request to app; returns (status, decoded JSON body)."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query, 'root_path': '',
+             'headers': [(b'host', b'test'), (b'content-type', b'application/json'),
+                         (b'content-length', str(len(payload)).encode())],
+             'client': ('127.0.0.1', 1), 'server': ('test', 80), 'state': {}}
+    received = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    status, chunks = None, []
+
+    async def receive():
+        return received.pop() if received else {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+
+    await app(scope, receive, send)
+    return status, json.loads(b''.join(chunks))
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'asgi.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text("In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner\n")
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    monkeypatch.setattr(flask_backend, 'STATS_VERIFY_INTERVAL', 0)
+    monkeypatch.setattr(flask_backend, 'CHANGES_COMPACT_INTERVAL', 0)
+    monkeypatch.setitem(flask_backend.STATS_VERIFICATION, 'checked_at', None)
+    monkeypatch.setitem(flask_backend.STATS_VERIFICATION, 'drift', None)
+    return path
+
+
+def test_lifespan_runs_the_stats_verifier(db_path, monkeypatch):
+    monkeypatch.setattr(flask_backend, 'STATS_VERIFY_INTERVAL', 0.05)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE stats SET value = value + 5 WHERE name = 'entries'")
+    conn.commit()
+
+    async def scenario():
+        async with Lifespan(asgi_backend.app):
+            for _ in range(100):
+                if flask_backend.STATS_VERIFICATION['checked_at'] is not None:
+                    break
+                await asyncio.sleep(0.05)
+            return await request(asgi_backend.app, 'GET', '/api/stats/verify')
+
+    status, body = asyncio.run(scenario())
+
+    assert status == 200
+    assert body['drift'] == {'entries': {'stored': 6, 'actual': 1}}
+    assert conn.execute("SELECT value FROM stats WHERE name = 'entries'").fetchone()[0] == 1
+    assert not any(thread.name == 'stats-verifier' for thread in threading.enumerate())
+    conn.close()
+
+
+def test_lifespan_shutdown_commits_acknowledged_rows(db_path, monkeypatch):
+    monkeypatch.setattr(flask_backend, 'WRITE_BEHIND', True)
+    # Hold the row in the writer's group long past shutdown
+    monkeypatch.setattr(flask_backend.INGEST_QUEUE, 'group_ms', 60000)
+
+    async def scenario():
+        async with Lifespan(asgi_backend.app):
+            return await request(asgi_backend.app, 'POST', '/api/add', {
+                'entry': "In Thunderball (1965), Sean Connery as James Bond wears a Breitling Top Time"})
+
+    status, body = asyncio.run(scenario())
+
+    assert status == 202
+    assert flask_backend.INGEST_QUEUE.get(body['ingest_id']).status == 'success'
+    assert not flask_backend.INGEST_QUEUE.running
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM film_actor_watch").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,53 @@
+"""Tests for the response cache behind the read endpoints."""
+
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text("In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner\n")
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    flask_backend.RESPONSE_CACHE.clear()
+    return flask_backend.app.test_client()
+
+
+def test_another_process_writing_retires_cached_responses(client):
+    first = client.get('/api/stats')
+    assert first.headers['X-Cache'] == 'MISS'
+    assert client.get('/api/stats').headers['X-Cache'] == 'HIT'
+
+    # A write this process never sees: another worker or the bulk loader
+    subprocess.run([sys.executable, '-c', f"""
+import flask_backend
+conn = flask_backend.connect({flask_backend.DB_PATH!r})
+flask_backend.execute_insert(conn, flask_backend.parse_entry(
+    "In Goldfinger (1964), Sean Connery as James Bond wears a Rolex Submariner"))
+"""], check=True)
+
+    second = client.get('/api/stats', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['X-Cache'] == 'MISS'
+    assert second.json['stats']['entries'] == first.json['stats']['entries'] + 1
+
+
+def test_write_that_skips_bump_retires_cached_responses(client):
+    first = client.get('/api/query/actor/Connery')
+    conn = sqlite3.connect(flask_backend.DB_PATH)
+    conn.execute("UPDATE films SET year = 1963 WHERE title = 'Dr. No'")
+    conn.commit()
+    conn.close()
+
+    second = client.get('/api/query/actor/Connery')
+    assert second.headers['X-Cache'] == 'MISS'
+    assert second.json['films'][0]['year'] == 1963 != first.json['films'][0]['year']
@@ -0,0 +1,152 @@
+"""Tests for the bulk loader (python -m filmwatch load)."""
+
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FACT_INDEXES = {'idx_faw_appearance', 'idx_faw_watch', 'idx_faw_character'}
+
+
+def fact_indexes(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'film_actor_watch' AND sql IS NOT NULL")}
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'load.db')
+    filmwatch.init_db(path)
+    return path
+
+
+def write_entries(path, count):
+    with open(path, 'w') as f:
+        for i in range(count):
+            f.write(f"In Film {i} (1962), Actor {i % 500} as Agent {i} wears a Rolex Model {i % 300}\n")
+
+
+def test_load_keeps_unique_index_and_restores_the_rest(db_path, tmp_path):
+    entries = str(tmp_path / 'entries.txt')
+    write_entries(entries, 50)
+
+    counts = filmwatch.load(db_path, entries, quiet=True)
+
+    assert counts == {'success': 50, 'duplicate': 0, 'error': 0}
+    assert fact_indexes(db_path) == FACT_INDEXES
+
+
+def triggers(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall())
+    finally:
+        conn.close()
+
+
+def test_load_maintains_search_stats_and_changes_per_chunk(db_path, tmp_path):
+    entries = str(tmp_path / 'entries.txt')
+    write_entries(entries, 50)
+    filmwatch.load(db_path, entries, quiet=True)
+    before = triggers(db_path)
+    conn = sqlite3.connect(db_path)
+    since = conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+    conn.close()
+
+    # New rows among known names, in chunks that do not divide the file
+    write_entries(entries, 120)
+    counts = filmwatch.load(db_path, entries, chunk_size=7, quiet=True)
+
+    assert counts == {'success': 70, 'duplicate': 50, 'error': 0}
+    assert triggers(db_path) == before
+    conn = flask_backend.connect(db_path)
+    try:
+        assert flask_backend.verify_stats(conn, repair=False) == {}
+        assert conn.execute("""SELECT COUNT(*) FROM film_actor_watch faw
+                               JOIN appearance_search s ON s.rowid = faw.faw_id
+                               JOIN actors a ON faw.actor_id = a.actor_id
+                               JOIN films f ON faw.film_id = f.film_id
+                               WHERE s.actor = a.actor_name AND s.title = f.title""").fetchone()[0] == 120
+        assert flask_backend.query_appearances(conn, 'title', 'Film 119', ['title'], 'year', True, None, {})[0] \
+            .fetchall()[0][0] == 'Film 119'
+        changes = conn.execute("SELECT table_name, row_id, op FROM changes WHERE seq > ? ORDER BY seq",
+                               (since,)).fetchall()
+        assert {op for _, _, op in changes} == {'insert'}
+        assert len(changes) == len(set(changes))
+        assert {row_id for table, row_id, _ in changes if table == 'film_actor_watch'} == set(range(51, 121))
+        # A new appearance's change comes after its new film's
+        position = {(table, row_id): index for index, (table, row_id, _) in enumerate(changes)}
+        for (table, row_id), index in position.items():
+            if table == 'film_actor_watch':
+                film_id = conn.execute("SELECT film_id FROM film_actor_watch WHERE faw_id = ?", (row_id,)).fetchone()[0]
+                assert position[('films', film_id)] < index
+    finally:
+        conn.close()
+
+
+def test_failed_chunk_keeps_the_insert_triggers(db_path, tmp_path, monkeypatch):
+    entries = str(tmp_path / 'entries.txt')
+    write_entries(entries, 30)
+    before = triggers(db_path)
+
+    def fail(conn, rows):
+        conn.execute("INSERT INTO films (title, year) VALUES ('Half-written', 1999)")
+        raise RuntimeError('disk full')
+
+    monkeypatch.setattr(filmwatch, 'execute_insert_many', fail)
+    with pytest.raises(RuntimeError):
+        filmwatch.load(db_path, entries, chunk_size=10, quiet=True)
+
+    assert triggers(db_path) == before
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM films").fetchone()[0] == 0
+    conn.close()
+
+
+def test_killed_load_resumes_and_rebuilds_indexes(db_path, tmp_path):
+    entries = str(tmp_path / 'entries.txt')
+    write_entries(entries, 200000)
+    checkpoint = entries + '.offset'
+
+    load = subprocess.Popen([sys.executable, '-m', 'filmwatch', '--db', db_path, 'load', entries,
+                             '--chunk', '500', '--quiet'], cwd=ROOT)
+    deadline = time.monotonic() + 60
+    while not os.path.exists(checkpoint) and load.poll() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert load.poll() is None, 'the load finished before it could be interrupted'
+    load.send_signal(signal.SIGKILL)
+    load.wait()
+
+    # The unique index survives the kill; the dropped ones are remembered
+    assert 'idx_faw_appearance' in fact_indexes(db_path)
+    conn = sqlite3.connect(db_path)
+    saved = {name for (name,) in conn.execute(f"SELECT name FROM {filmwatch.DROPPED_INDEXES_TABLE}")}
+    conn.close()
+    assert saved | fact_indexes(db_path) == FACT_INDEXES
+
+    subprocess.run([sys.executable, '-m', 'filmwatch', '--db', db_path, 'load', entries, '--resume', '--quiet'],
+                   cwd=ROOT, check=True)
+
+    assert fact_indexes(db_path) == FACT_INDEXES
+    assert not os.path.exists(checkpoint)
+    conn = flask_backend.connect(db_path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM film_actor_watch").fetchone()[0] == 200000
+        with pytest.raises(Exception, match='Duplicate entry'):
+            flask_backend.execute_insert(conn, flask_backend.parse_entry(
+                "In Film 7 (1962), Actor 7 as Agent 7 wears a Rolex Model 7"))
+    finally:
+        conn.close()
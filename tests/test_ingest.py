@@ -0,0 +1,67 @@
+"""Tests for the write-behind ingest queue behind /api/add."""
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+
+def entry(n):
+    return flask_backend.parse_entry(f"In Ingest Film {n} (1962), Sean Connery as James Bond wears a Rolex Submariner")
+
+
+@pytest.fixture
+def ingest_queue(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ingest.db')
+    filmwatch.init_db(path)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    ingest_queue = flask_backend.IngestQueue(group_size=1, group_ms=1)
+    ingest_queue.start()
+    yield ingest_queue
+    ingest_queue.stop()
+
+
+def test_writer_survives_an_unexpected_error(ingest_queue, monkeypatch):
+    insert_many = flask_backend.execute_insert_many
+
+    def broken(conn, rows):
+        raise RuntimeError('writer blew up')
+
+    monkeypatch.setattr(flask_backend, 'execute_insert_many', broken)
+    ticket = ingest_queue.submit(entry(1))
+    assert ticket.done.wait(5)
+    assert (ticket.status, ticket.message) == ('error', 'writer blew up')
+
+    monkeypatch.setattr(flask_backend, 'execute_insert_many', insert_many)
+    ticket = ingest_queue.submit(entry(1))
+    assert ticket.done.wait(5)
+    assert ticket.status == 'success'
+    assert ingest_queue.running
+
+
+def test_failing_hook_does_not_fail_committed_rows(ingest_queue, monkeypatch):
+    def broken(conn):
+        raise RuntimeError('index blew up')
+
+    monkeypatch.setattr(flask_backend.READ_MODEL, 'catch_up', broken)
+    ticket = ingest_queue.submit(entry(2))
+    assert ticket.done.wait(5)
+    assert ticket.status == 'success'
+    assert ingest_queue.running
+
+
+def test_stop_commits_queued_rows(ingest_queue):
+    # A group that would otherwise wait a minute for more rows
+    ingest_queue.group_size, ingest_queue.group_ms = 100, 60000
+    tickets = [ingest_queue.submit(entry(n)) for n in range(3)]
+    assert all(ticket.status == 'queued' for ticket in tickets)
+
+    assert ingest_queue.stop(timeout=5)
+
+    assert [ticket.status for ticket in tickets] == ['success'] * 3
+    assert not ingest_queue.running
+    with pytest.raises(Exception, match='shutting down'):
+        ingest_queue.submit(entry(4))
+    conn = flask_backend.connect(flask_backend.DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM film_actor_watch").fetchone()[0] == 3
+    conn.close()
@@ -0,0 +1,150 @@
+"""Tests for the duplicate merges (/api/cleanup-duplicate-actors and -characters)."""
+
+import sqlite3
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+ENTRIES = [
+    "In Dr. No (1962), Sean Connery as James Bond wears a Rolex Submariner",
+    "In Thunderball (1965), Adolfo Celi as Emilio Largo wears a Breitling Top Time",
+]
+
+
+def legacy_actors(conn):
+    """Rebuild actors without UNIQUE (actor_name), as older databases have it, so duplicates can exist."""
+    triggers = [sql for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'actors'")]
+    conn.executescript("""
+        PRAGMA foreign_keys = OFF;
+        PRAGMA legacy_alter_table = ON;
+        BEGIN;
+        CREATE TABLE actors_legacy (actor_id INTEGER PRIMARY KEY AUTOINCREMENT, actor_name VARCHAR(255) NOT NULL);
+        INSERT INTO actors_legacy SELECT actor_id, actor_name FROM actors;
+        DROP TABLE actors;
+        ALTER TABLE actors_legacy RENAME TO actors;
+    """ + ';\n'.join(triggers) + """;
+        COMMIT;
+        PRAGMA legacy_alter_table = OFF;
+        PRAGMA foreign_keys = ON;
+    """)
+
+
+def one(conn, sql, *params):
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def add_appearance(conn, film, actor_id, character, watch):
+    """Insert an appearance by ids, creating its character, as the upserts cannot on a legacy table."""
+    film_id = one(conn, "SELECT film_id FROM films WHERE title = ?", film)
+    watch_id = one(conn, "SELECT watch_id FROM watches WHERE model_reference = ?", watch)
+    character_id = conn.execute("INSERT INTO characters (character_name, film_id, actor_id) VALUES (?, ?, ?)",
+                                (character, film_id, actor_id)).lastrowid
+    return conn.execute("""INSERT INTO film_actor_watch (film_id, actor_id, character_id, watch_id, narrative_role)
+                           VALUES (?, ?, ?, ?, 'Watch worn in film.')""",
+                        (film_id, actor_id, character_id, watch_id)).lastrowid
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'merge.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text('\n'.join(ENTRIES) + '\n')
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    flask_backend.POOL.close_all()
+    return path
+
+
+@pytest.fixture
+def duplicate_actor(db_path):
+    """A second "Sean Connery": once in Dr. No with the same watch, once alone in Thunderball."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    legacy_actors(conn)
+    duplicate_id = conn.execute("INSERT INTO actors (actor_name) VALUES ('Sean Connery')").lastrowid
+    colliding = add_appearance(conn, 'Dr. No', duplicate_id, 'James Bond', 'Submariner')
+    moved = add_appearance(conn, 'Thunderball', duplicate_id, 'James Bond', 'Submariner')
+    conn.close()
+    return duplicate_id, colliding, moved
+
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+                for table in ('actors', 'characters', 'film_actor_watch', 'changes', 'stats')}
+    finally:
+        conn.close()
+
+
+def test_dry_run_reports_the_merge_without_writing(db_path, duplicate_actor):
+    client = flask_backend.app.test_client()
+    before = snapshot(db_path)
+
+    preview = client.post('/api/cleanup-duplicate-actors?dry_run=1').json
+    assert snapshot(db_path) == before
+
+    applied = client.post('/api/cleanup-duplicate-actors').json
+    assert preview['message'].startswith('Would merge 1 duplicate actors')
+    assert {**preview, 'dry_run': False, 'message': None} == {**applied, 'message': None}
+    assert snapshot(db_path) != before
+
+
+def test_merging_actors_that_share_a_film(db_path, duplicate_actor):
+    duplicate_id, colliding, moved = duplicate_actor
+    conn = sqlite3.connect(db_path)
+    keeper_id = one(conn, "SELECT MIN(actor_id) FROM actors WHERE actor_name = 'Sean Connery'")
+    since = one(conn, "SELECT MAX(seq) FROM changes")
+
+    report = flask_backend.app.test_client().post('/api/cleanup-duplicate-actors').json
+
+    assert (report['merged'], report['groups']) == (1, 1)
+    assert report['appearances_deduplicated'] == 1
+    assert report['appearances_repointed'] == 1
+    assert report['merges'] == [{'keep_id': keeper_id, 'name': 'Sean Connery', 'count': 1, 'merged_ids': [duplicate_id]}]
+
+    # The Dr. No repeat collided on idx_faw_appearance and went; Thunderball moved to the keeper
+    assert one(conn, "SELECT COUNT(*) FROM actors WHERE actor_name = 'Sean Connery'") == 1
+    assert one(conn, "SELECT COUNT(*) FROM film_actor_watch WHERE faw_id = ?", colliding) == 0
+    assert one(conn, "SELECT actor_id FROM film_actor_watch WHERE faw_id = ?", moved) == keeper_id
+    # Every character still belongs to the film and actor of its appearances, and none is orphaned
+    assert one(conn, """SELECT COUNT(*) FROM film_actor_watch faw JOIN characters c ON faw.character_id = c.character_id
+                        WHERE c.film_id != faw.film_id OR c.actor_id != faw.actor_id""") == 0
+    assert one(conn, """SELECT COUNT(*) FROM characters c
+                        WHERE NOT EXISTS (SELECT 1 FROM film_actor_watch faw WHERE faw.character_id = c.character_id)""") == 0
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    # The counters and the change log describe the merged rows
+    assert flask_backend.verify_stats(conn, repair=False) == {}
+    changes = set(conn.execute("SELECT table_name, row_id, op FROM changes WHERE seq > ?", (since,)).fetchall())
+    assert {('actors', duplicate_id, 'delete'), ('film_actor_watch', colliding, 'delete'),
+            ('film_actor_watch', moved, 'update')} <= changes
+    conn.close()
+
+    # Search follows the merge
+    films = flask_backend.app.test_client().get('/api/query/actor/Connery').json['films']
+    assert sorted(film['title'] for film in films) == ['Dr. No', 'Thunderball']
+
+
+def test_merging_characters(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # Databases from before migration 5 can still hold repeats of a character
+    conn.execute("DROP INDEX idx_characters_scope")
+    actor_id = one(conn, "SELECT actor_id FROM actors WHERE actor_name = 'Sean Connery'")
+    keeper_id = one(conn, "SELECT character_id FROM characters WHERE character_name = 'James Bond'")
+    conn.execute("INSERT INTO watches (brand_id, model_reference) SELECT brand_id, 'GMT-Master' FROM brands WHERE brand_name = 'Rolex'")
+    moved = add_appearance(conn, 'Dr. No', actor_id, 'James Bond', 'GMT-Master')
+    duplicate_id = one(conn, "SELECT character_id FROM film_actor_watch WHERE faw_id = ?", moved)
+
+    client = flask_backend.app.test_client()
+    assert client.post('/api/cleanup-duplicate-characters?dry_run=1').json['merged'] == 1
+    report = client.post('/api/cleanup-duplicate-characters').json
+
+    assert (report['merged'], report['appearances_repointed'], report['appearances_deduplicated']) == (1, 1, 0)
+    assert one(conn, "SELECT character_id FROM film_actor_watch WHERE faw_id = ?", moved) == keeper_id
+    assert one(conn, "SELECT COUNT(*) FROM characters WHERE character_id = ?", duplicate_id) == 0
+    assert flask_backend.verify_stats(conn, repair=False) == {}
+    assert client.post('/api/cleanup-duplicate-characters').json['merged'] == 0
+    conn.close()
@@ -0,0 +1,70 @@
+"""Tests for the schema migrations applied by flask_backend.migrate()."""
+
+import sqlite3
+
+import pytest
+
+import filmwatch
+import flask_backend
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    """A version-0 database (schema.sql alone) holding what migration 5 has to untangle."""
+    path = str(tmp_path / 'baseline.db')
+    conn = sqlite3.connect(path)
+    with open(filmwatch.SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    conn.executescript("""
+        INSERT INTO films (film_id, title, year) VALUES (1, 'Dr. No', 1962), (2, 'Goldfinger', 1964);
+        INSERT INTO actors (actor_id, actor_name) VALUES (1, 'Sean Connery'), (2, 'Shirley Eaton');
+        INSERT INTO characters (character_id, character_name) VALUES (1, 'James Bond'), (2, 'Bond'), (3, 'Unused');
+        INSERT INTO brands (brand_id, brand_name) VALUES (1, 'Rolex');
+        INSERT INTO watches (watch_id, brand_id, model_reference, verification_level)
+        VALUES (1, 1, 'Submariner', 'Confirmed'), (2, 1, 'GMT-Master', 'Confirmed');
+        INSERT INTO film_actor_watch (faw_id, film_id, actor_id, character_id, watch_id, narrative_role) VALUES
+            (1, 1, 1, 1, 1, 'Watch worn in film.'),
+            -- the same appearance again, under another character
+            (2, 1, 1, 2, 1, 'Watch worn in film.'),
+            -- character 1 shared with another film, and with another actor
+            (3, 2, 1, 1, 1, 'Watch worn in film.'),
+            (4, 2, 2, 1, 2, 'Watch worn in film.');
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migrating_a_baseline_database(baseline_db):
+    conn = flask_backend.connect(baseline_db)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(flask_backend.MIGRATIONS)
+    # The repeated appearance is gone, the oldest kept
+    assert [row[0] for row in conn.execute("SELECT faw_id FROM film_actor_watch ORDER BY faw_id")] == [1, 3, 4]
+    # Each appearance has a character of its own film and actor, under the name it had
+    rows = conn.execute("""
+        SELECT faw.faw_id, c.character_id, c.character_name, c.film_id = faw.film_id AND c.actor_id = faw.actor_id
+        FROM film_actor_watch faw JOIN characters c ON faw.character_id = c.character_id
+        ORDER BY faw.faw_id
+    """).fetchall()
+    assert [(faw_id, name, scoped) for faw_id, _, name, scoped in rows] == [
+        (1, 'James Bond', 1), (3, 'James Bond', 1), (4, 'James Bond', 1)]
+    assert rows[0][1] == 1
+    # Characters nobody plays any more are dropped
+    assert conn.execute("SELECT COUNT(*) FROM characters").fetchone()[0] == 3
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    assert flask_backend.verify_stats(conn, repair=False) == {}
+    assert [row[0] for row in conn.execute(
+        "SELECT rowid FROM appearance_search WHERE character LIKE '%James%' ORDER BY rowid")] == [1, 3, 4]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO film_actor_watch (film_id, actor_id, character_id, watch_id) VALUES (1, 1, 1, 1)")
+    conn.close()
+
+
+def test_migrating_twice_is_a_no_op(baseline_db):
+    conn = flask_backend.connect(baseline_db)
+    before = conn.execute("SELECT * FROM characters ORDER BY 1").fetchall()
+    assert flask_backend.migrate(conn) == len(flask_backend.MIGRATIONS)
+    assert conn.execute("SELECT * FROM characters ORDER BY 1").fetchall() == before
+    conn.close()
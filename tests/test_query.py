@@ -0,0 +1,208 @@
+"""Tests for the /api/query/* lookups and find-similar."""
+
+import base64
+import json
+import sqlite3
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import filmwatch
+import flask_backend
+
+ENTRIES = [
+    "In 8½ (1963), Marcello Mastroianni as Guido Anselmi wears a Rolex Submariner",
+    "In Goldfinger (1964), Sean Connery as James Bond wears a Rolex Submariner",
+    "In Émile (2001), Ian McKellen as Émile wears a Omega Seamaster",
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'query.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text('\n'.join(ENTRIES) + '\n')
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    return path
+
+
+# Three films a year, so pages break inside runs of equal sort values
+PAGED_ENTRIES = [f"In Mission {n} ({1960 + n // 3}), Sean Connery as Agent {n} wears a Rolex Model {n}"
+                 for n in range(24)]
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = flask_backend.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def titles(conn, search_column, term):
+    cursor, _ = flask_backend.query_appearances(conn, search_column, term, ['title'], 'year', True, None, {})
+    return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize('search_column, term, expected', [
+    ('title', '8½', ['8½']),
+    ('title', '½', ['8½']),
+    ('title', 'Gold', ['Goldfinger']),
+    ('actor', 'Mc', ['Émile']),
+    ('brand', 'Om', ['Émile']),
+])
+def test_query_matches_like(conn, search_column, term, expected):
+    assert titles(conn, search_column, term) == expected
+
+
+def test_short_terms_match_the_baseline_like(conn):
+    for term in ('8½', '½', 'É', 'Ém', 'in'):
+        baseline = [title for (title,) in conn.execute(
+            "SELECT title FROM films WHERE title LIKE ? ORDER BY year DESC", (f'%{term}%',))]
+        assert titles(conn, 'title', term) == baseline, term
+
+
+def test_find_similar_short_title(conn):
+    entries = flask_backend.find_similar_entries(conn, 'Marcello', '8½')
+    assert [entry['film'] for entry in entries] == ['8½ (1963)']
+
+
+@pytest.mark.parametrize('kind, term', [
+    ('film', 'émile'), ('film', 'ÉMILE'), ('film', 'Émile'), ('film', 'mile'), ('film', 'É'),
+    ('actor', 'MCKELLEN'), ('brand', 'omega'),
+])
+def test_read_model_folds_case_like_sqlite(db_path, conn, kind, term):
+    query = flask_backend.APPEARANCE_QUERIES[kind]
+
+    def page():
+        return flask_backend.appearance_page(conn, MultiDict(), query['search_column'], term, query['default_fields'],
+                                             query['sort_field'], query['descending'], {}, query['list_key'])
+
+    sqlite_page = page()
+    flask_backend.READ_MODEL.load(db_path)
+    try:
+        assert flask_backend.READ_MODEL.serves(conn)
+        assert page() == sqlite_page
+    finally:
+        flask_backend.READ_MODEL.stop()
+
+
+@pytest.fixture(params=['sqlite', 'read_model'])
+def client(request, tmp_path, monkeypatch):
+    path = str(tmp_path / 'pages.db')
+    entries = tmp_path / 'entries.txt'
+    entries.write_text('\n'.join(PAGED_ENTRIES) + '\n')
+    filmwatch.init_db(path)
+    filmwatch.load(path, str(entries), quiet=True)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    flask_backend.POOL.close_all()
+    flask_backend.RESPONSE_CACHE.clear()
+    if request.param == 'read_model':
+        flask_backend.READ_MODEL.load(path)
+    yield flask_backend.app.test_client()
+    flask_backend.READ_MODEL.stop()
+    flask_backend.RESPONSE_CACHE.clear()
+
+
+def all_pages(client, path, **args):
+    """Follow next_cursor from the first page to the last; returns the pages."""
+    pages = [client.get(path, query_string=args).json]
+    while pages[-1]['next_cursor']:
+        pages.append(client.get(path, query_string={**args, 'cursor': pages[-1]['next_cursor']}).json)
+    return pages
+
+
+@pytest.mark.parametrize('path, list_key', [
+    ('/api/query/actor/Connery', 'films'),
+    ('/api/query/film/Mission', 'watches'),
+])
+@pytest.mark.parametrize('limit', [1, 5, 7, 24])
+def test_pages_concatenate_to_the_whole_answer(client, path, list_key, limit):
+    whole = client.get(path, query_string={'limit': 100}).json
+
+    pages = all_pages(client, path, limit=limit)
+
+    assert len(whole[list_key]) == 24 and whole['next_cursor'] is None
+    assert [item for page in pages for item in page[list_key]] == whole[list_key]
+    assert [page['count'] for page in pages] == [len(page[list_key]) for page in pages]
+    assert all(page['count'] == limit for page in pages[:-1])
+    # The last page is the one with no next_cursor, even when it is full
+    assert pages[-1]['next_cursor'] is None
+    assert pages[-1]['count'] == 24 - limit * (len(pages) - 1) > 0
+
+
+def test_cursor_is_stable_across_writes(client):
+    path = '/api/query/actor/Connery'
+    first = client.get(path, query_string={'limit': 6, 'fields': 'title,year'}).json
+    assert [film['year'] for film in first['films']] == [1967] * 3 + [1966] * 3
+
+    # Rows sorting before and after the cursor arrive, and one already paged out goes
+    for entry in ("In Mission 98 (1970), Sean Connery as Agent 98 wears a Rolex Model 98",
+                  "In Mission 99 (1961), Sean Connery as Agent 99 wears a Rolex Model 99"):
+        response = client.post('/api/add', json={'entry': entry})
+        assert response.status_code == 200, response.json
+    conn = sqlite3.connect(flask_backend.DB_PATH)
+    faw_id = conn.execute("""SELECT faw_id FROM film_actor_watch faw JOIN films f ON faw.film_id = f.film_id
+                             WHERE f.title = 'Mission 23'""").fetchone()[0]
+    conn.close()
+    assert client.delete(f'/api/delete-entry/{faw_id}').status_code == 200
+
+    rest = all_pages(client, path, limit=6, fields='title,year', cursor=first['next_cursor'])
+
+    titles = [film['title'] for page in rest for film in page['films']]
+    # Resumes right after the last row seen: nothing repeated, nothing skipped
+    assert titles == [f'Mission {n}' for n in range(17, 5, -1)] + ['Mission 99'] + \
+        [f'Mission {n}' for n in range(5, -1, -1)]
+    assert not set(titles) & {film['title'] for film in first['films']}
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor!',
+    base64.urlsafe_b64encode(b'not json').decode(),
+    base64.urlsafe_b64encode(b'[1962]').decode(),
+    base64.urlsafe_b64encode(b'[1962, "x"]').decode(),
+    base64.urlsafe_b64encode(b'{"year": 1962}').decode(),
+])
+def test_invalid_cursor_is_rejected(client, cursor):
+    response = client.get('/api/query/actor/Connery', query_string={'cursor': cursor})
+
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
+
+
+def test_ndjson_stream_is_one_object_per_line(client, monkeypatch):
+    # Several fetchmany batches, the last one short
+    monkeypatch.setattr(flask_backend, 'STREAM_BATCH_SIZE', 5)
+    page = client.get('/api/query/actor/Connery', query_string={'limit': 100, 'fields': 'title,year'}).json
+
+    response = client.get('/api/query/actor/Connery', query_string={'fields': 'title,year'},
+                          headers={'Accept': 'application/x-ndjson'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n') and '\n\n' not in body
+    assert [json.loads(line) for line in body.splitlines()] == page['films']
+
+
+@pytest.mark.parametrize('term, count', [('Connery', 24), ('Nobody', 0)])
+def test_json_stream_is_one_document(client, monkeypatch, term, count):
+    monkeypatch.setattr(flask_backend, 'STREAM_BATCH_SIZE', 5)
+    page = client.get(f'/api/query/actor/{term}', query_string={'limit': 100}).json
+
+    response = client.get(f'/api/query/actor/{term}', query_string={'stream': '1'})
+
+    assert response.mimetype == 'application/json'
+    assert response.is_streamed
+    assert json.loads(response.get_data()) == {'success': True, 'actor': term, 'films': page['films'], 'count': count}
+
+
+def test_stream_resumes_from_a_cursor(client):
+    first = client.get('/api/query/film/Mission', query_string={'limit': 10}).json
+
+    response = client.get('/api/query/film/Mission', query_string={'stream': '1', 'cursor': first['next_cursor']},
+                          headers={'Accept': 'application/x-ndjson'})
+
+    rest = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    whole = client.get('/api/query/film/Mission', query_string={'limit': 100}).json['watches']
+    assert first['watches'] + rest == whole
@@ -0,0 +1,37 @@
+"""No backend query may fully scan film_actor_watch (see benchmarks/query_plans.py)."""
+
+import urllib.parse
+
+import flask_backend
+from benchmarks import query_plans
+from benchmarks.generate import generate
+
+# Endpoints that run no SQL of their own
+NO_SQL_ENDPOINTS = {'static', 'serve_ui', 'index', 'ingest_status', 'get_ingest_stats', 'get_cache_stats',
+                    'get_metrics', 'get_slow_queries'}
+
+
+def test_routes_cover_every_endpoint():
+    adapter = flask_backend.app.url_map.bind('localhost')
+    checked = {adapter.match(urllib.parse.urlsplit(path).path, method)[0]
+               for method, path, _, _ in query_plans.ROUTES}
+    endpoints = {rule.endpoint for rule in flask_backend.app.url_map.iter_rules()}
+    assert endpoints - NO_SQL_ENDPOINTS - checked == set()
+
+
+def test_no_full_scans_of_film_actor_watch(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'plans.db')
+    generate(db_path, 20000)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', db_path)
+    monkeypatch.setattr(flask_backend, 'METRICS_ENABLED', False)
+
+    assert query_plans.fact_table_scans(db_path) == []
+
+
+def test_the_check_catches_a_scan(tmp_path):
+    db_path = str(tmp_path / 'plans.db')
+    generate(db_path, 100)
+    conn = flask_backend.connect(db_path)
+    plan = query_plans.explain(conn, "SELECT COUNT(*) FROM film_actor_watch WHERE narrative_role LIKE '%worn%'")
+    conn.close()
+    assert any(query_plans.FACT_TABLE_SCAN.match(line) for line in plan)
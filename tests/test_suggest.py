@@ -0,0 +1,133 @@
+"""SUGGEST_INDEX must answer /api/suggest as a brute-force ranking of SQLite would."""
+
+import sqlite3
+
+import pytest
+
+import flask_backend
+from benchmarks.bench_suggest import SQL_SUGGEST, sample_prefixes
+from benchmarks.generate import generate
+from test_merge import add_appearance, legacy_actors
+
+LIMIT = flask_backend.SUGGEST_LIMIT
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'suggest.db')
+    generate(path, 2000)
+    monkeypatch.setattr(flask_backend, 'DB_PATH', path)
+    flask_backend.POOL.close_all()
+    monkeypatch.setattr(flask_backend, 'SUGGEST_INDEX', flask_backend.SuggestIndex())
+    return path
+
+
+def brute_force(conn, kind, prefix, limit):
+    """Rank every name with a word starting with prefix, as SUGGEST_INDEX should."""
+    column, sql = SQL_SUGGEST[kind]
+    sql = sql.replace("LIKE ? || '%'", "IS NOT NULL").replace("LIMIT ?", "")
+    folded = flask_backend.fold_text(prefix.strip())[0]
+    rows = [(-n, name, row_id) for row_id, name, n in conn.execute(sql)
+            if any(suffix.startswith(folded) for suffix in flask_backend._word_suffixes(name))]
+    return [(row_id, name, -n) for n, name, row_id in sorted(rows)[:limit]]
+
+
+def suggest(kind, prefix):
+    response = flask_backend.app.test_client().get('/api/suggest', query_string={'type': kind, 'prefix': prefix})
+    assert response.status_code == 200
+    return [(s['id'], s['name'], s['count']) for s in response.json['suggestions']]
+
+
+def wrong_answers(db_path, prefixes):
+    """The (kind, prefix) pairs the index ranks differently from brute force."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [(kind, prefix) for kind, typed in prefixes.items() for prefix in typed
+                if suggest(kind, prefix) != brute_force(conn, kind, prefix, LIMIT)]
+    finally:
+        conn.close()
+
+
+def test_suggestions_match_brute_force(db_path):
+    prefixes = sample_prefixes(db_path, names=10, keystrokes=4, seed=1)
+    prefixes['actor'] += ['craig', ' SEAN ', 'zzz']
+
+    assert wrong_answers(db_path, prefixes) == []
+    assert flask_backend.SUGGEST_INDEX.stats()['builds'] == 1
+
+
+def test_suggestions_follow_adds_and_deletes(db_path):
+    prefixes = sample_prefixes(db_path, names=10, keystrokes=4, seed=2)
+    prefixes['actor'] += ['Zachary', 'Quin']
+    prefixes['model'] += ['Model Z']
+    assert wrong_answers(db_path, prefixes) == []
+
+    client = flask_backend.app.test_client()
+    added = [client.post('/api/add', json={
+        'entry': f"In Golden Signal (1999), Zachary Quinto as Agent {n} wears a Rolex Model Z{n}"}) for n in range(3)]
+    assert [response.status_code for response in added] == [200] * 3
+    assert suggest('actor', 'quin') == [(suggest('actor', 'zach')[0][0], 'Zachary Quinto', 3)]
+    assert wrong_answers(db_path, prefixes) == []
+
+    conn = sqlite3.connect(db_path)
+    faw_ids = [row[0] for row in conn.execute("""SELECT faw_id FROM film_actor_watch faw
+        JOIN actors a ON faw.actor_id = a.actor_id WHERE a.actor_name = 'Zachary Quinto'""")]
+    # and one appearance from the generated data, so a ranked name loses a count
+    faw_ids.append(conn.execute("SELECT MIN(faw_id) FROM film_actor_watch").fetchone()[0])
+    conn.close()
+    for faw_id in faw_ids[1:]:
+        assert client.delete(f'/api/delete-entry/{faw_id}').status_code == 200
+
+    assert suggest('actor', 'quin')[0][2] == 1
+    assert wrong_answers(db_path, prefixes) == []
+    assert flask_backend.SUGGEST_INDEX.stats()['builds'] == 1
+
+
+def test_suggestions_follow_an_actor_merge(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    legacy_actors(conn)
+    actor, film = conn.execute("""SELECT a.actor_name, f.title FROM film_actor_watch faw
+        JOIN actors a ON faw.actor_id = a.actor_id JOIN films f ON faw.film_id = f.film_id
+        ORDER BY faw.faw_id LIMIT 1""").fetchone()
+    watches = [row[0] for row in conn.execute("SELECT model_reference FROM watches ORDER BY watch_id LIMIT 3")]
+    duplicate_id = conn.execute("INSERT INTO actors (actor_name) VALUES (?)", (actor,)).lastrowid
+    for watch in watches:
+        add_appearance(conn, film, duplicate_id, f'Double {watch}', watch)
+    conn.close()
+
+    prefixes = sample_prefixes(db_path, names=5, keystrokes=3, seed=3)
+    prefixes['actor'] += [actor[:3], actor.split()[-1]]
+    assert wrong_answers(db_path, prefixes) == []
+    assert len([name for _, name, _ in suggest('actor', actor) if name == actor]) == 2
+
+    report = flask_backend.app.test_client().post('/api/cleanup-duplicate-actors').json
+    assert report['merged'] == 1
+
+    assert [name for _, name, _ in suggest('actor', actor)].count(actor) == 1
+    assert wrong_answers(db_path, prefixes) == []
+    assert flask_backend.SUGGEST_INDEX.stats()['builds'] == 1
+
+
+def test_suggestions_follow_a_brand_rename(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    film_id, actor_id = conn.execute("SELECT film_id, actor_id FROM film_actor_watch LIMIT 1").fetchone()
+    # An entry the old parser stored as brand "A", model "Vulcain Cricket"
+    brand_id = conn.execute("INSERT INTO brands (brand_name) VALUES ('A')").lastrowid
+    watch_id = conn.execute("INSERT INTO watches (brand_id, model_reference) VALUES (?, 'Vulcain Cricket')",
+                            (brand_id,)).lastrowid
+    character_id = conn.execute("INSERT INTO characters (character_name, film_id, actor_id) VALUES ('Caller', ?, ?)",
+                                (film_id, actor_id)).lastrowid
+    conn.execute("INSERT INTO film_actor_watch (film_id, actor_id, character_id, watch_id) VALUES (?, ?, ?, ?)",
+                 (film_id, actor_id, character_id, watch_id))
+    conn.close()
+
+    prefixes = {'brand': ['A', 'Vul', 'Ro'], 'model': ['Vulcain', 'Cri', 'Sub']}
+    assert wrong_answers(db_path, prefixes) == []
+    assert (brand_id, 'A', 1) in suggest('brand', 'a')
+
+    assert flask_backend.app.test_client().post('/api/cleanup-bad-brands').json['fixed_count'] == 1
+
+    assert [name for _, name, _ in suggest('brand', 'a')].count('A') == 0
+    assert [(name, count) for _, name, count in suggest('brand', 'vulcain')] == [('Vulcain', 1)]
+    assert [(name, count) for _, name, count in suggest('model', 'cricket')] == [('Cricket', 1)]
+    assert wrong_answers(db_path, prefixes) == []